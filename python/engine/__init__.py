@@ -0,0 +1,66 @@
+"""
+Python 分析引擎（可复用核心）
+与 `r/engine/` 对应：放置被多个分析脚本共享的加载、计算逻辑，
+`python/scripts/` 下的脚本只负责编排与输出。
+"""
+
+from .backtest import BacktestResult, backtest_tradingview_aligned, run_backtest
+from .buildcache import BuildCache
+from .cooldown import cooldown_sweep
+from .excursion import ExcursionIndex, RangeExtrema, trade_excursions
+from .grid import GridEvaluator, evaluate_grid
+from .indicators import IndicatorCache
+from .matching import TradeMatch, match_trades
+from .metrics import ReentryMetrics, reentry_metrics
+from .pipeline import Pipeline, Stage, StageResult
+from .resample import open_timeframe, resample_ohlcv
+from .signals import generate_drop_signals
+from .store import OHLCVStore, StoredSeries
+from .streaming import DropSignalStream
+from .tracing import StageProfiler, phase, span, write_trace
+from .trades import TRADES_CSV, load_trades
+from .tradingview import TV_TRADES_CSV, load_tradingview_trades
+from .tvexports import load_tradingview_dir, scan_tradingview_exports
+from .violations import Violations, detect_violations
+from .walkforward import WalkForwardConfig, run_walkforward
+
+__all__ = [
+    "BacktestResult",
+    "backtest_tradingview_aligned",
+    "run_backtest",
+    "BuildCache",
+    "cooldown_sweep",
+    "ExcursionIndex",
+    "RangeExtrema",
+    "trade_excursions",
+    "GridEvaluator",
+    "evaluate_grid",
+    "IndicatorCache",
+    "TradeMatch",
+    "match_trades",
+    "ReentryMetrics",
+    "reentry_metrics",
+    "Pipeline",
+    "Stage",
+    "StageResult",
+    "open_timeframe",
+    "resample_ohlcv",
+    "generate_drop_signals",
+    "OHLCVStore",
+    "StoredSeries",
+    "DropSignalStream",
+    "StageProfiler",
+    "phase",
+    "span",
+    "write_trace",
+    "TRADES_CSV",
+    "load_trades",
+    "TV_TRADES_CSV",
+    "load_tradingview_trades",
+    "load_tradingview_dir",
+    "scan_tradingview_exports",
+    "Violations",
+    "detect_violations",
+    "WalkForwardConfig",
+    "run_walkforward",
+]
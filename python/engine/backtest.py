@@ -0,0 +1,611 @@
+"""
+TradingView 对齐版回测内核（Python 版）
+复现 `r/engine/backtest_tradingview_aligned.R::backtest_tradingview_aligned`：
+
+- 严格的持仓管理：一次只持有一个仓位，出场K线上不再入场
+- 入场：信号K线收盘价成交（process_orders_on_close）；`process_on_close=False` 时下一根开盘价成交
+- 出场（入场后下一根K线起检查）：
+  - exit_mode="close"：Close 触发 + Close 成交
+  - exit_mode="tradingview"：High/Low 盘中触发 + 精确 TP/SL 价成交；
+    同一K线同时触发时阳线（Close >= Open）止盈优先、阴线止损优先，Open 缺失时默认止盈
+- 手续费：按成交额在入场/出场各收取一次 `fee_rate`
+- 数据结束仍持仓时以最后一根K线收盘价强制平仓（ForceClose）
+- 可选交易节奏规则（默认关闭，结果与 R 版一致）：
+  - cooldown_bars：出场后至少间隔该数量的K线才能再入场（入场K线 - 出场K线 > cooldown_bars）
+  - max_trades_per_day：每个自然日（UTC，按入场K线）最多入场次数，0 表示不限
+  - min_holding_bars：入场后至少持有该数量的K线才检查止盈止损（默认 1，即下一根K线起）
+  被规则挡下的信号计入被忽略信号数
+
+安装 numba 时逐K线循环在编译后的内核中执行；未安装时使用数组内核：持仓期间向量化分段搜索
+第一根触发出场的K线，空仓期间用 searchsorted 跳到下一个信号，Python 层的循环次数等于交易笔数。
+交易明细经 `format_trades_df` 输出为与 `trades_tradingview_aligned.csv` 相同的格式。
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+from dataclasses import dataclass, field
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+from .signals import generate_drop_signals
+
+EXIT_MODES = ("close", "tradingview")
+
+# 交易明细列（与 R 版 trades 列表字段一致；EntryBar/ExitBar 为 0 起始的K线位置）
+TRADE_COLUMNS = [
+    "TradeId", "EntryBar", "EntryTime", "EntryPrice", "ExitBar", "ExitTime", "ExitPrice",
+    "ExitReason", "Position", "PnLPercent", "PnLAmount", "EntryFee", "ExitFee", "TotalFee", "HoldingBars",
+]
+
+# trades_tradingview_aligned.csv 的列（同 R `format_trades_df`）
+CSV_COLUMNS = [
+    "TradeId", "EntryTime", "EntryPrice", "ExitTime", "ExitPrice",
+    "ExitReason", "HoldingBars", "PnLPercent", "PnLAmount", "TotalFee",
+]
+
+# 出场搜索的首个分段长度，未命中时按 4 倍扩大
+_SCAN_CHUNK = 64
+
+
+@dataclass(frozen=True)
+class BacktestResult:
+    """回测结果（字段对应 R 版返回列表）
+
+    Attributes:
+        trades: 交易明细，列见 TRADE_COLUMNS
+        capital_curve: 每根K线的净值（持仓时为持仓市值，空仓时为现金）
+        error: R 版提前返回时的说明（"数据行数不足"/"无信号"/"无交易"），正常为 None
+    """
+
+    signal_count: int
+    trade_count: int
+    ignored_signal_count: int
+    initial_capital: float
+    final_capital: float
+    return_percent: float
+    win_rate: float
+    max_drawdown: float
+    total_fees: float
+    tp_count: int
+    sl_count: int
+    both_trigger_count: int
+    trades: pd.DataFrame = field(repr=False)
+    capital_curve: np.ndarray = field(repr=False)
+    error: str | None = None
+
+
+def _empty_trades() -> pd.DataFrame:
+    return pd.DataFrame({c: [] for c in TRADE_COLUMNS})
+
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+
+def day_index(times: np.ndarray) -> np.ndarray:
+    """每根K线所在自然日（UTC）的编号，供 max_trades_per_day 计数"""
+    ns = np.asarray(times, dtype="datetime64[ns]").view(np.int64)
+    return np.ascontiguousarray(ns // NS_PER_DAY)
+
+
+def check_trade_rules(cooldown_bars, max_trades_per_day, min_holding_bars) -> None:
+    """校验交易节奏规则参数（标量或数组）"""
+    if np.any(np.asarray(cooldown_bars) < 0):
+        raise ValueError(f"cooldown_bars 不能为负数，当前为: {cooldown_bars!r}")
+    if np.any(np.asarray(max_trades_per_day) < 0):
+        raise ValueError(f"max_trades_per_day 不能为负数，当前为: {max_trades_per_day!r}")
+    if np.any(np.asarray(min_holding_bars) < 1):
+        raise ValueError(f"min_holding_bars 至少为 1，当前为: {min_holding_bars!r}")
+
+
+# 内核输出的出场原因编码
+EXIT_REASONS = np.array(["TP", "SL", "TP_first_in_both", "SL_first_in_both", "TP_default_in_both", "ForceClose"])
+_TP, _SL, _TP_FIRST, _SL_FIRST, _TP_DEFAULT, _FORCE_CLOSE = range(6)
+
+
+def _simulate_loop(open_, high, low, close, signals, take_profit_percent, stop_loss_percent,
+                   initial_capital, fee_rate, process_on_close, tradingview,
+                   cooldown_bars, max_trades_per_day, min_holding_bars, days):
+    """逐K线内核（与 R 版循环逐行对应；安装 numba 时编译执行）
+
+    Returns:
+        (交易数, 入场K线, 出场K线, 入场价, 出场价, 原因编码, 持仓数量, 入场资金, 入场手续费, 出场手续费,
+         净值曲线, 最终资金, 总手续费, 止盈数, 止损数, 同时触发数, 被忽略信号数)
+    """
+    n = len(close)
+    cap = int(signals.sum()) + 1
+    entry_bars = np.empty(cap, np.int64)
+    exit_bars = np.empty(cap, np.int64)
+    entry_prices = np.empty(cap)
+    exit_prices = np.empty(cap)
+    reasons = np.empty(cap, np.int64)
+    positions = np.empty(cap)
+    entry_capitals = np.empty(cap)
+    entry_fees = np.empty(cap)
+    exit_fees = np.empty(cap)
+    curve = np.empty(n)
+
+    capital = initial_capital
+    total_fees = 0.0
+    tp_count = 0
+    sl_count = 0
+    both_count = 0
+    ignored = 0
+    count = 0
+    in_position = False
+    position = 0.0
+    entry_price = 0.0
+    entry_bar = -1
+    entry_capital = 0.0
+    entry_fee = 0.0
+    last_exit = -1
+    entry_day = -1
+    day_entries = 0
+
+    for i in range(n):
+        if in_position and signals[i]:
+            ignored += 1
+
+        # 阶段1: 出场（入场后第 min_holding_bars 根K线起）
+        if in_position and i >= entry_bar + min_holding_bars:
+            h = high[i]
+            lo = low[i]
+            c = close[i]
+            if not (np.isnan(h) or np.isnan(lo) or np.isnan(c)):
+                tp_price = entry_price * (1 + take_profit_percent / 100)
+                sl_price = entry_price * (1 - stop_loss_percent / 100)
+                if tradingview:
+                    hit_tp = h >= tp_price
+                    hit_sl = lo <= sl_price
+                else:
+                    hit_tp = c >= tp_price
+                    hit_sl = c <= sl_price
+
+                if hit_tp or hit_sl:
+                    if hit_tp and hit_sl:
+                        both_count += 1
+                        if np.isnan(open_[i]):
+                            reason = _TP_DEFAULT
+                        elif c >= open_[i]:
+                            reason = _TP_FIRST
+                        else:
+                            reason = _SL_FIRST
+                    elif hit_tp:
+                        reason = _TP
+                    else:
+                        reason = _SL
+                    take_profit = reason == _TP or reason == _TP_FIRST or reason == _TP_DEFAULT
+                    if take_profit:
+                        tp_count += 1
+                    else:
+                        sl_count += 1
+                    if tradingview:
+                        exit_price = tp_price if take_profit else sl_price
+                    else:
+                        exit_price = c
+
+                    exit_value = position * exit_price
+                    exit_fee = exit_value * fee_rate
+                    entry_bars[count] = entry_bar
+                    exit_bars[count] = i
+                    entry_prices[count] = entry_price
+                    exit_prices[count] = exit_price
+                    reasons[count] = reason
+                    positions[count] = position
+                    entry_capitals[count] = entry_capital
+                    entry_fees[count] = entry_fee
+                    exit_fees[count] = exit_fee
+                    count += 1
+
+                    capital = exit_value - exit_fee
+                    total_fees += exit_fee
+                    in_position = False
+                    position = 0.0
+                    last_exit = i
+
+        # 阶段2: 入场（出场K线上不再入场；冷却期内与当日入场次数已满时忽略信号）
+        if signals[i] and not in_position and i != last_exit:
+            if process_on_close:
+                price = close[i]
+                bar = i
+            elif i < n - 1:
+                price = open_[i + 1]
+                bar = i + 1
+            else:
+                price = np.nan
+                bar = i
+            cooling = last_exit >= 0 and i - last_exit <= cooldown_bars
+            capped = max_trades_per_day > 0 and days[bar] == entry_day and day_entries >= max_trades_per_day
+            if cooling or capped:
+                ignored += 1
+            elif price > 0:
+                if days[bar] != entry_day:
+                    entry_day = days[bar]
+                    day_entries = 0
+                day_entries += 1
+                entry_price = price
+                entry_bar = bar
+                entry_fee = capital * fee_rate
+                entry_capital = capital - entry_fee
+                position = entry_capital / entry_price
+                capital = 0.0
+                in_position = True
+                total_fees += entry_fee
+            else:
+                ignored += 1
+
+        # 阶段3: 净值
+        if in_position and close[i] > 0:
+            curve[i] = position * close[i]
+        else:
+            curve[i] = capital
+
+    # 强制平仓（入场手续费已计入 total_fees，明细中 EntryFee 记为 0）
+    if in_position:
+        final_price = close[n - 1]
+        if final_price > 0:
+            exit_value = position * final_price
+            exit_fee = exit_value * fee_rate
+            entry_bars[count] = entry_bar
+            exit_bars[count] = n - 1
+            entry_prices[count] = entry_price
+            exit_prices[count] = final_price
+            reasons[count] = _FORCE_CLOSE
+            positions[count] = position
+            entry_capitals[count] = entry_capital
+            entry_fees[count] = 0.0
+            exit_fees[count] = exit_fee
+            count += 1
+            capital = exit_value - exit_fee
+            total_fees += exit_fee
+
+    return (count, entry_bars, exit_bars, entry_prices, exit_prices, reasons, positions, entry_capitals,
+            entry_fees, exit_fees, curve, capital, total_fees, tp_count, sl_count, both_count, ignored)
+
+
+def _simulate_numpy(open_, high, low, close, signals, take_profit_percent, stop_loss_percent,
+                    initial_capital, fee_rate, process_on_close, tradingview,
+                    cooldown_bars, max_trades_per_day, min_holding_bars, days):
+    """数组内核（未安装 numba 时使用），输出同 `_simulate_loop`
+
+    持仓期间按分段向量化搜索第一根触发出场的K线，空仓期间用 searchsorted 跳到下一个信号，
+    Python 层循环次数等于交易笔数。
+    """
+    n = len(close)
+    signal_bars = np.flatnonzero(signals)
+    signal_count = len(signal_bars)
+    valid = ~(np.isnan(high) | np.isnan(low) | np.isnan(close))
+
+    def first_exit(start, tp_price, sl_price):
+        size = _SCAN_CHUNK
+        while start < n:
+            stop = min(start + size, n)
+            if tradingview:
+                hit = (high[start:stop] >= tp_price) | (low[start:stop] <= sl_price)
+            else:
+                c = close[start:stop]
+                hit = (c >= tp_price) | (c <= sl_price)
+            hit &= valid[start:stop]
+            k = int(hit.argmax())
+            if hit[k]:
+                return start + k
+            start = stop
+            size *= 4
+        return -1
+
+    capital = float(initial_capital)
+    total_fees = 0.0
+    tp_count = sl_count = both_count = ignored = 0
+    curve = np.empty(n)
+    records = []
+
+    cursor = 0
+    cash_from = 0
+    entry_day = -1
+    day_entries = 0
+    while cursor < signal_count:
+        i = int(signal_bars[cursor])
+        cursor += 1
+        if process_on_close:
+            entry_bar, entry_price = i, close[i]
+        elif i < n - 1:
+            entry_bar, entry_price = i + 1, open_[i + 1]
+        else:
+            ignored += 1
+            continue
+        if max_trades_per_day > 0 and days[entry_bar] == entry_day and day_entries >= max_trades_per_day:
+            # 当日入场次数已满：跳到入场K线落在下一个自然日的第一个信号
+            next_day = int(np.searchsorted(days, entry_day, side="right")) - (0 if process_on_close else 1)
+            skip_to = max(cursor, int(np.searchsorted(signal_bars, next_day, side="left")))
+            ignored += 1 + skip_to - cursor
+            cursor = skip_to
+            continue
+        if not entry_price > 0:
+            ignored += 1
+            continue
+        if days[entry_bar] != entry_day:
+            entry_day = days[entry_bar]
+            day_entries = 0
+        day_entries += 1
+
+        curve[cash_from:i] = capital
+        entry_fee = capital * fee_rate
+        entry_capital = capital - entry_fee
+        position = entry_capital / entry_price
+        capital = 0.0
+        total_fees += entry_fee
+
+        tp_price = entry_price * (1 + take_profit_percent / 100)
+        sl_price = entry_price * (1 - stop_loss_percent / 100)
+        j = first_exit(entry_bar + min_holding_bars, tp_price, sl_price)
+        held_to = j if j >= 0 else n
+        held_close = close[i:held_to]
+        curve[i:held_to] = np.where(held_close > 0, position * held_close, capital)
+
+        # 持仓期间（开始时已持仓的K线）与出场后冷却期内出现的信号被忽略
+        skip_to = int(np.searchsorted(signal_bars, held_to + cooldown_bars, side="right"))
+        ignored += skip_to - cursor
+        cursor = skip_to
+
+        if j < 0:
+            final_price = close[n - 1]
+            if final_price > 0:
+                exit_value = position * final_price
+                exit_fee = exit_value * fee_rate
+                records.append((entry_bar, n - 1, entry_price, final_price, _FORCE_CLOSE, position,
+                                entry_capital, 0.0, exit_fee))
+                capital = exit_value - exit_fee
+                total_fees += exit_fee
+            cash_from = n
+            break
+
+        if tradingview:
+            hit_tp, hit_sl = high[j] >= tp_price, low[j] <= sl_price
+        else:
+            hit_tp, hit_sl = close[j] >= tp_price, close[j] <= sl_price
+        if hit_tp and hit_sl:
+            both_count += 1
+            if np.isnan(open_[j]):
+                reason = _TP_DEFAULT
+            elif close[j] >= open_[j]:
+                reason = _TP_FIRST
+            else:
+                reason = _SL_FIRST
+        else:
+            reason = _TP if hit_tp else _SL
+        take_profit = reason in (_TP, _TP_FIRST, _TP_DEFAULT)
+        if take_profit:
+            tp_count += 1
+        else:
+            sl_count += 1
+        if tradingview:
+            exit_price = tp_price if take_profit else sl_price
+        else:
+            exit_price = close[j]
+
+        exit_value = position * exit_price
+        exit_fee = exit_value * fee_rate
+        records.append((entry_bar, j, entry_price, exit_price, reason, position, entry_capital, entry_fee, exit_fee))
+        capital = exit_value - exit_fee
+        total_fees += exit_fee
+        cash_from = j
+
+    curve[cash_from:] = capital
+
+    columns = list(zip(*records)) if records else [()] * 9
+    int_cols = {0, 1, 4}
+    arrays = [np.array(col, dtype=np.int64 if k in int_cols else np.float64) for k, col in enumerate(columns)]
+    return (len(records), *arrays, curve, capital, total_fees, tp_count, sl_count, both_count, ignored)
+
+
+_JIT_KERNEL: list = []
+
+
+def _jit_kernel():
+    """编译后的逐K线内核；numba 为可选依赖，首次使用时才导入（不拖慢只用加载器的脚本）"""
+    if not _JIT_KERNEL:
+        try:
+            from numba import njit
+        except ImportError:
+            _JIT_KERNEL.append(None)
+        else:
+            _JIT_KERNEL.append(njit(cache=True, nogil=True)(_simulate_loop))
+    return _JIT_KERNEL[0]
+
+
+def run_backtest(open_: np.ndarray,
+                 high: np.ndarray,
+                 low: np.ndarray,
+                 close: np.ndarray,
+                 signals: np.ndarray,
+                 take_profit_percent: float,
+                 stop_loss_percent: float,
+                 initial_capital: float = 10000,
+                 fee_rate: float = 0.00075,
+                 process_on_close: bool = True,
+                 exit_mode: str = "close",
+                 times: np.ndarray | None = None,
+                 cooldown_bars: int = 0,
+                 max_trades_per_day: int = 0,
+                 min_holding_bars: int = 1) -> BacktestResult:
+    """在给定信号上执行单仓位回测
+
+    安装 numba 时使用编译后的逐K线内核，否则使用数组内核，两者结果逐笔一致。
+
+    Args:
+        open_, high, low, close: 价格数组
+        signals: 布尔信号数组（见 `engine.signals.generate_drop_signals`）
+        take_profit_percent: 止盈百分比（如 10 表示 10%）
+        stop_loss_percent: 止损百分比
+        initial_capital: 初始资金
+        fee_rate: 手续费率（如 0.00075 表示 0.075%）
+        process_on_close: 是否在信号K线收盘时成交
+        exit_mode: "close" 或 "tradingview"
+        times: K线时间（datetime64），用于填充 EntryTime/ExitTime 与按自然日计数；缺省为 NaT
+        cooldown_bars: 出场后的冷却K线数（入场K线 - 出场K线需大于该值），0 为不限制
+        max_trades_per_day: 每个自然日最多入场次数（需要 times），0 为不限制
+        min_holding_bars: 最少持有K线数（>= 1），之前的K线不检查止盈止损
+
+    Returns:
+        BacktestResult
+    """
+    if exit_mode not in EXIT_MODES:
+        raise ValueError(f"exit_mode 必须是 {EXIT_MODES} 之一，当前为: {exit_mode!r}")
+    check_trade_rules(cooldown_bars, max_trades_per_day, min_holding_bars)
+    if max_trades_per_day > 0 and times is None:
+        raise ValueError("max_trades_per_day 需要K线时间 times")
+
+    prices = [np.ascontiguousarray(a, dtype=np.float64) for a in (open_, high, low, close)]
+    signals = np.ascontiguousarray(signals, dtype=np.bool_)
+    n = len(prices[3])
+    signal_count = int(signals.sum())
+    if signal_count == 0:
+        return BacktestResult(0, 0, 0, initial_capital, initial_capital, 0.0, 0.0, 0.0, 0.0, 0, 0, 0,
+                              _empty_trades(), np.full(n, float(initial_capital)), error="无信号")
+
+    days = day_index(times) if max_trades_per_day > 0 else np.zeros(n, dtype=np.int64)
+    simulate = _jit_kernel() or _simulate_numpy
+    (count, entry_bars, exit_bars, entry_prices, exit_prices, reasons, positions, entry_capitals,
+     entry_fees, exit_fees, capital_curve, capital, total_fees, tp_count, sl_count, both_count,
+     ignored) = simulate(*prices, signals, float(take_profit_percent), float(stop_loss_percent),
+                         float(initial_capital), float(fee_rate), bool(process_on_close),
+                         exit_mode == "tradingview", int(cooldown_bars), int(max_trades_per_day),
+                         int(min_holding_bars), days)
+
+    if count == 0:
+        return BacktestResult(signal_count, 0, ignored, initial_capital, capital, 0.0, 0.0, 0.0,
+                              total_fees, tp_count, sl_count, both_count, _empty_trades(), capital_curve,
+                              error="无交易")
+
+    entry_bars, exit_bars = entry_bars[:count], exit_bars[:count]
+    entry_prices, exit_prices = entry_prices[:count], exit_prices[:count]
+    positions, entry_fees, exit_fees = positions[:count], entry_fees[:count], exit_fees[:count]
+    pnl_percent = (exit_prices - entry_prices) / entry_prices * 100
+    exit_value = positions * exit_prices
+    if times is None:
+        times = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+    times = np.asarray(times)
+    trades = pd.DataFrame({
+        "TradeId": np.arange(1, count + 1),
+        "EntryBar": entry_bars,
+        "EntryTime": times[entry_bars],
+        "EntryPrice": entry_prices,
+        "ExitBar": exit_bars,
+        "ExitTime": times[exit_bars],
+        "ExitPrice": exit_prices,
+        "ExitReason": EXIT_REASONS[reasons[:count]],
+        "Position": positions,
+        "PnLPercent": pnl_percent,
+        "PnLAmount": (exit_value - exit_fees) - entry_capitals[:count],
+        "EntryFee": entry_fees,
+        "ExitFee": exit_fees,
+        "TotalFee": entry_fees + exit_fees,
+        "HoldingBars": exit_bars - entry_bars,
+    })
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        peak = np.maximum.accumulate(capital_curve)
+        drawdown = (capital_curve - peak) / peak * 100
+    max_drawdown = float(np.nanmin(drawdown)) if not np.isnan(drawdown).all() else 0.0
+
+    return BacktestResult(
+        signal_count=signal_count,
+        trade_count=count,
+        ignored_signal_count=ignored,
+        initial_capital=initial_capital,
+        final_capital=capital,
+        return_percent=(capital - initial_capital) / initial_capital * 100,
+        win_rate=float((pnl_percent > 0).sum()) / count * 100,
+        max_drawdown=max_drawdown,
+        total_fees=total_fees,
+        tp_count=tp_count,
+        sl_count=sl_count,
+        both_trigger_count=both_count,
+        trades=trades,
+        capital_curve=capital_curve,
+    )
+
+
+def backtest_tradingview_aligned(data: pd.DataFrame | Mapping[str, np.ndarray],
+                                 lookback_bars: int,
+                                 min_drop_percent: float,
+                                 take_profit_percent: float,
+                                 stop_loss_percent: float,
+                                 initial_capital: float = 10000,
+                                 fee_rate: float = 0.00075,
+                                 process_on_close: bool = True,
+                                 include_current_bar: bool = True,
+                                 exit_mode: str = "close",
+                                 signal_mode: str = "absolute",
+                                 atr_length: int = 14,
+                                 cooldown_bars: int = 0,
+                                 max_trades_per_day: int = 0,
+                                 min_holding_bars: int = 1) -> BacktestResult:
+    """TradingView 对齐版回测（参数与 R 版一一对应，lookbackDays 即 lookback_bars）
+
+    Args:
+        data: 含 Open/High/Low/Close 列的 DataFrame（索引为K线时间）或数组字典
+        cooldown_bars, max_trades_per_day, min_holding_bars: 交易节奏规则（见 `run_backtest`），默认关闭
+    """
+    close = np.asarray(data["Close"], dtype=np.float64)
+    n = len(close)
+    if n < 10:
+        return BacktestResult(0, 0, 0, initial_capital, np.nan, np.nan, np.nan, np.nan, 0.0, 0, 0, 0,
+                              _empty_trades(), np.empty(0), error="数据行数不足")
+
+    signals = generate_drop_signals(data, lookback_bars, min_drop_percent,
+                                    include_current_bar=include_current_bar,
+                                    signal_mode=signal_mode, atr_length=atr_length)
+    times = None
+    if isinstance(data, pd.DataFrame) and isinstance(data.index, pd.DatetimeIndex):
+        times = data.index.to_numpy()
+    return run_backtest(data["Open"], data["High"], data["Low"], close, signals,
+                        take_profit_percent, stop_loss_percent,
+                        initial_capital=initial_capital, fee_rate=fee_rate,
+                        process_on_close=process_on_close, exit_mode=exit_mode, times=times,
+                        cooldown_bars=cooldown_bars, max_trades_per_day=max_trades_per_day,
+                        min_holding_bars=min_holding_bars)
+
+
+def _format_times(times: pd.Series) -> pd.Series:
+    # 同 R as.character(POSIXct)：整点午夜只输出日期，有亚秒部分时保留小数秒
+    times = pd.to_datetime(times)
+    text = times.dt.strftime("%Y-%m-%d %H:%M:%S")
+    fraction = times.dt.microsecond > 0
+    if fraction.any():
+        text[fraction] = times[fraction].dt.strftime("%Y-%m-%d %H:%M:%S.%f").str.rstrip("0")
+    midnight = times == times.dt.normalize()
+    text[midnight] = times[midnight].dt.strftime("%Y-%m-%d")
+    return text
+
+
+def format_trades_df(trades: pd.DataFrame) -> pd.DataFrame:
+    """交易明细格式化为 trades_tradingview_aligned.csv 的列与文本格式（同 R `format_trades_df`）"""
+    if len(trades) == 0:
+        return pd.DataFrame(columns=CSV_COLUMNS)
+
+    def fmt(values, pattern: str) -> list[str]:
+        return [pattern % v for v in values]
+
+    return pd.DataFrame({
+        "TradeId": trades["TradeId"].to_numpy(),
+        "EntryTime": _format_times(trades["EntryTime"]).to_numpy(),
+        "EntryPrice": fmt(trades["EntryPrice"], "%.8f"),
+        "ExitTime": _format_times(trades["ExitTime"]).to_numpy(),
+        "ExitPrice": fmt(trades["ExitPrice"], "%.8f"),
+        "ExitReason": trades["ExitReason"].to_numpy(),
+        "HoldingBars": trades["HoldingBars"].to_numpy(),
+        "PnLPercent": fmt(trades["PnLPercent"], "%.2f%%"),
+        "PnLAmount": fmt(trades["PnLAmount"], "%.2f"),
+        "TotalFee": fmt(trades["TotalFee"], "%.4f"),
+    })
+
+
+def write_trades_csv(result: BacktestResult, path: str | os.PathLike) -> pd.DataFrame:
+    """按 R `write.csv(format_trades_df(result), row.names = FALSE)` 的格式写出交易明细"""
+    formatted = format_trades_df(result.trades)
+    formatted.to_csv(path, index=False, quoting=csv.QUOTE_NONNUMERIC)
+    return formatted
@@ -0,0 +1,312 @@
+"""
+基准测试框架
+每个基准在独立的 spawn 子进程中运行，记录墙钟时间、CPU 时间（含其子进程）与峰值常驻内存（RSS），
+结果写为 JSON，并与存档的基线比较，超出容差的项记为回归。
+
+- 用 spawn 而不是 fork：峰值 RSS 只反映该基准本身，不会把父进程中生成的合成数据计入
+- setup（加载数据、切换工作目录）在子进程中、计时开始前执行；其内存计入峰值 RSS
+- repeat > 1 时每次都在新进程中运行，取墙钟时间最短的一次
+
+分析基准套件（analysis_suite）覆盖：交易明细解析、四个分析阶段脚本、暴跌信号生成与交易时间线绘制。
+阶段脚本在合成数据工作目录（prepare_workdir）中运行，与 `run_full_analysis.py` 一样先在进程内预加载交易表。
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import time
+import traceback
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "python" / "scripts"
+BASELINE_PATH = REPO_ROOT / "python" / "benchmarks" / "baseline.json"
+
+ANALYSIS_SCRIPTS = (
+    "analyze_reentry_pattern.py",
+    "violation_cases_analysis.py",
+    "visualize_intervals.py",
+    "generate_final_report.py",
+)
+
+# 低于该墙钟时间差的变化视为计时噪声，不判为回归
+MIN_TIME_DELTA_S = 0.05
+
+
+class BenchmarkError(RuntimeError):
+    """基准执行失败（子进程异常或超时）"""
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """一个基准：setup(*args) 的返回值传给 run，只对 run 计时
+
+    run/setup 需为模块级函数（spawn 子进程通过 pickle 按名称导入）。
+    """
+
+    name: str
+    rows: int
+    run: Callable[[Any], Any]
+    setup: Callable[..., Any] | None = None
+    args: tuple = ()
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.rows}"
+
+
+@dataclass(frozen=True)
+class Measurement:
+    name: str
+    rows: int
+    wall_s: float
+    cpu_s: float
+    peak_rss_mb: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.rows}"
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return float("nan")
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _children_cpu() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _child(benchmark: Benchmark, conn) -> None:
+    try:
+        state = benchmark.setup(*benchmark.args) if benchmark.setup is not None else benchmark.args
+        cpu_start = time.process_time()
+        children_start = _children_cpu()
+        start = time.perf_counter()
+        benchmark.run(state)
+        wall = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start + _children_cpu() - children_start
+        conn.send(("ok", wall, cpu, _peak_rss_mb()))
+    except BaseException:  # noqa: BLE001 - 失败信息传回父进程
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int = 1, timeout: float | None = None) -> Measurement:
+    """在新的 spawn 子进程中运行基准 repeat 次，返回墙钟时间最短的一次（峰值 RSS 取各次最大值）"""
+    ctx = multiprocessing.get_context("spawn")
+    best = None
+    peak = 0.0
+    for _ in range(max(repeat, 1)):
+        receiver, sender = ctx.Pipe(duplex=False)
+        process = ctx.Process(target=_child, args=(benchmark, sender))
+        process.start()
+        sender.close()
+        try:
+            if not receiver.poll(timeout):
+                process.kill()
+                raise BenchmarkError(f"{benchmark.key} 超时（{timeout}秒）")
+            message = receiver.recv()
+        except EOFError:
+            raise BenchmarkError(f"{benchmark.key} 子进程异常退出") from None
+        finally:
+            process.join()
+            receiver.close()
+
+        if message[0] == "error":
+            raise BenchmarkError(f"{benchmark.key} 失败:\n{message[1]}")
+        _, wall, cpu, rss = message
+        peak = max(peak, rss)
+        if best is None or wall < best[0]:
+            best = (wall, cpu)
+
+    return Measurement(benchmark.name, benchmark.rows, best[0], best[1], peak)
+
+
+def write_results(measurements: Iterable[Measurement], path: str | os.PathLike, **meta) -> dict:
+    """结果写为 JSON：{"meta": 运行环境与参数, "results": [每项测量]}"""
+    payload = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            **meta,
+        },
+        "results": [asdict(m) for m in measurements],
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return payload
+
+
+def load_results(path: str | os.PathLike) -> dict[str, Measurement]:
+    """读取结果 JSON，返回 {name@rows: Measurement}"""
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    return {m.key: m for m in (Measurement(**row) for row in payload["results"])}
+
+
+def compare_to_baseline(measurements: Iterable[Measurement], baseline: dict[str, Measurement],
+                        time_tolerance: float = 0.25, memory_tolerance: float = 0.25) -> list[dict]:
+    """逐项与基线比较
+
+    Returns:
+        每项一行：key、指标（wall_s/peak_rss_mb）、基线值、当前值、比值、是否回归。
+        墙钟时间超过基线 (1 + time_tolerance) 倍且差值超过 MIN_TIME_DELTA_S，
+        或峰值 RSS 超过基线 (1 + memory_tolerance) 倍时记为回归；基线中没有的项不比较。
+    """
+    rows = []
+    for m in measurements:
+        base = baseline.get(m.key)
+        if base is None:
+            continue
+        time_ratio = m.wall_s / base.wall_s if base.wall_s > 0 else float("inf")
+        rows.append({
+            "key": m.key, "metric": "wall_s", "baseline": base.wall_s, "current": m.wall_s, "ratio": time_ratio,
+            "regressed": time_ratio > 1 + time_tolerance and m.wall_s - base.wall_s > MIN_TIME_DELTA_S,
+        })
+        if np.isfinite(m.peak_rss_mb) and np.isfinite(base.peak_rss_mb) and base.peak_rss_mb > 0:
+            rss_ratio = m.peak_rss_mb / base.peak_rss_mb
+            rows.append({
+                "key": m.key, "metric": "peak_rss_mb", "baseline": base.peak_rss_mb, "current": m.peak_rss_mb,
+                "ratio": rss_ratio, "regressed": rss_ratio > 1 + memory_tolerance,
+            })
+    return rows
+
+
+# ============================================================================
+# 分析基准套件
+# ============================================================================
+def prepare_workdir(root: str | os.PathLike, rows: int, seed: int = 0) -> Path:
+    """生成 rows 规模的合成数据工作目录（已存在且种子相同时复用）
+
+    目录结构与仓库根目录一致：outputs/trades_tradingview_aligned.csv、outputs/sell_signals_detail.csv、
+    data/tradingview_trades.csv（拷贝仓库中的真实导出）、data/ohlcv.npz（rows 根K线的 High/Low/Close）。
+    """
+    from .synthetic import synthetic_ohlcv, synthetic_sell_signals, synthetic_trades, write_synthetic_trades_csv
+
+    workdir = Path(root) / f"n{rows}"
+    marker = workdir / ".seed"
+    if marker.exists() and marker.read_text(encoding="utf-8") == str(seed):
+        return workdir
+
+    outputs = workdir / "outputs"
+    outputs.mkdir(parents=True, exist_ok=True)
+    (workdir / "data").mkdir(exist_ok=True)
+    (workdir / "docs" / "reports").mkdir(parents=True, exist_ok=True)
+    shutil.rmtree(outputs / ".cache", ignore_errors=True)
+
+    write_synthetic_trades_csv(synthetic_trades(rows, seed=seed), outputs / "trades_tradingview_aligned.csv")
+    synthetic_sell_signals(max(rows // 10, 1), seed=seed).to_csv(outputs / "sell_signals_detail.csv", index=False)
+    shutil.copyfile(REPO_ROOT / "data" / "tradingview_trades.csv", workdir / "data" / "tradingview_trades.csv")
+    bars = synthetic_ohlcv(rows, seed=seed)
+    np.savez(workdir / "data" / "ohlcv.npz", **{col: bars[col].to_numpy() for col in ("High", "Low", "Close")})
+
+    marker.write_text(str(seed), encoding="utf-8")
+    return workdir
+
+
+def _stage_setup(workdir: str, script: str):
+    from .pipeline import Stage
+    from .trades import TRADES_CSV, load_trades
+
+    os.chdir(workdir)
+    # 与 run_full_analysis.py 一致：交易表在阶段开始前解析一次，阶段内 load_trades() 命中进程内缓存
+    load_trades(TRADES_CSV)
+    return Stage(script, script, SCRIPTS_DIR / script)
+
+
+def _stage_run(stage) -> None:
+    from .pipeline import run_stage
+
+    result = run_stage(stage)
+    if not result.success:
+        raise RuntimeError(f"{stage.name} 执行失败 ({result.error}):\n{result.stderr[-4000:]}")
+
+
+def _load_trades_setup(workdir: str) -> Path:
+    return Path(workdir) / "outputs" / "trades_tradingview_aligned.csv"
+
+
+def _load_trades_run(path: Path) -> None:
+    from .trades import load_trades
+
+    load_trades(path, use_cache=False)
+
+
+def _signals_setup(workdir: str, signal_mode: str):
+    with np.load(Path(workdir) / "data" / "ohlcv.npz") as npz:
+        data = {col: npz[col] for col in npz.files}
+    return data, signal_mode
+
+
+def _signals_run(state) -> None:
+    from .signals import generate_drop_signals
+
+    data, signal_mode = state
+    min_drop = 3.0 if signal_mode == "atr" else 20.0
+    generate_drop_signals(data, lookback_bars=3, min_drop_percent=min_drop, signal_mode=signal_mode)
+
+
+def _timeline_setup(workdir: str):
+    import matplotlib
+    matplotlib.use("Agg")
+    from .trades import load_trades
+
+    trades = load_trades(Path(workdir) / "outputs" / "trades_tradingview_aligned.csv", use_cache=False)
+    return (trades["EntryTime"].to_numpy(dtype="datetime64[ns]"),
+            trades["ExitTime"].to_numpy(dtype="datetime64[ns]"),
+            trades["PnLPercent"].to_numpy(dtype=np.float64),
+            np.flatnonzero(trades["ReentryInterval"].to_numpy(dtype=np.float64) <= 15))
+
+
+def _timeline_run(state) -> None:
+    import matplotlib.pyplot as plt
+    from .plotting import draw_trade_timeline
+
+    entry, exit_, pnl, highlight = state
+    fig, ax = plt.subplots(figsize=(18, 5))
+    draw_trade_timeline(ax, entry, exit_, pnl, highlight_rows=highlight)
+    fig.savefig(io.BytesIO(), format="png", dpi=100)
+    plt.close(fig)
+
+
+def analysis_suite(workdir: str | os.PathLike, rows: int) -> list[Benchmark]:
+    """workdir（prepare_workdir 生成）上的全部分析基准"""
+    workdir = str(Path(workdir).resolve())
+    benchmarks = [Benchmark("load_trades", rows, _load_trades_run, _load_trades_setup, (workdir,))]
+    benchmarks += [Benchmark(f"stage:{script}", rows, _stage_run, _stage_setup, (workdir, script))
+                   for script in ANALYSIS_SCRIPTS]
+    benchmarks += [Benchmark(f"signals:{mode}", rows, _signals_run, _signals_setup, (workdir, mode))
+                   for mode in ("absolute", "atr")]
+    benchmarks.append(Benchmark("plot:timeline", rows, _timeline_run, _timeline_setup, (workdir,)))
+    return benchmarks
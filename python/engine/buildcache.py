@@ -0,0 +1,101 @@
+"""
+流水线增量构建缓存
+在 `outputs/.build_manifest.json` 中为每个阶段记录指纹：
+
+- 输入文件内容哈希（SHA-256；按 mtime/大小缓存，未变化的大文件不重复哈希）
+- 阶段参数（JSON 序列化）
+- 代码版本：阶段脚本与 `python/engine/` 源码的哈希
+
+指纹一致且输出文件齐全的阶段可以跳过。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+from .trades import file_sha256
+
+if TYPE_CHECKING:
+    from .pipeline import Stage
+
+MANIFEST_PATH = Path("outputs") / ".build_manifest.json"
+ENGINE_DIR = Path(__file__).resolve().parent
+
+# 清单格式版本：字段含义变化时递增，旧清单整体作废
+MANIFEST_VERSION = 1
+
+
+class BuildCache:
+    """阶段指纹清单"""
+
+    def __init__(self, path: str | os.PathLike = MANIFEST_PATH, code_paths: Iterable[Path] | None = None):
+        self.path = Path(path)
+        if code_paths is None:
+            code_paths = sorted(ENGINE_DIR.glob("*.py"))
+        self.code_paths = [Path(p) for p in code_paths]
+        self.stages: dict[str, dict] = {}
+        self.files: dict[str, dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if manifest.get("version") != MANIFEST_VERSION:
+            return
+        self.stages = manifest.get("stages", {})
+        self.files = manifest.get("files", {})
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "stages": self.stages, "files": self.files},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def file_hash(self, path: str | os.PathLike) -> str | None:
+        """文件内容哈希；mtime 与大小未变时复用清单中的记录"""
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        key = str(path)
+        entry = self.files.get(key)
+        if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry["sha256"]
+        digest = file_sha256(path)
+        self.files[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest}
+        return digest
+
+    def fingerprint(self, stage: "Stage") -> str:
+        """阶段指纹：输入内容 + 参数 + 代码版本"""
+        payload = {
+            "inputs": {str(p): self.file_hash(p) for p in stage.inputs},
+            "params": stage.params,
+            "code": {str(p): self.file_hash(p) for p in [Path(stage.script), *self.code_paths]},
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def is_fresh(self, stage: "Stage", fingerprint: str) -> bool:
+        entry = self.stages.get(stage.name)
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return False
+        return all(Path(p).exists() for p in stage.outputs)
+
+    def record(self, stage: "Stage", fingerprint: str) -> None:
+        self.stages[stage.name] = {"fingerprint": fingerprint}
+        # 输出文件可能是下游阶段的输入，刷新其哈希记录
+        for p in stage.outputs:
+            self.file_hash(p)
+
+    def invalidate(self, stage: "Stage") -> None:
+        self.stages.pop(stage.name, None)
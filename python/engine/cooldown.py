@@ -0,0 +1,135 @@
+"""
+冷却期重新回测
+评估"出场后冷却 N 分钟再入场"等交易节奏规则的真实影响。
+
+直接删除历史间隔低于冷却期的交易并不等价于加冷却期：冷却期会改变之后哪些信号被执行
+（被挡下的信号之后可能紧接着出现新的信号并入场），交易笔数、收益与回撤都需要重新模拟。
+这里把每个冷却期换算成 `cooldown` 规则（K线数）交给 `engine.grid.GridEvaluator`：
+同一 lookback 的全部规则组合共享一条跌幅序列与分块统计，在一次内核调用中完成。
+
+约定：
+- 冷却 c 分钟 = 再入场间隔（下次入场时间 - 出场时间）必须大于 c 分钟，即 cooldown = floor(c / K线分钟数)
+- 结果第一行为不加任何规则的基准，其余行按 冷却期 × 每日次数上限 × 最少持有K线数 的组合排列
+- 参考策略默认取 `r/scripts/run/run_and_export_trades.R` 生成交易明细时的参数（PEPEUSDT_15m，3/20/10/10）
+- 参考K线依次查找 `data/ohlcv/PEPEUSDT_15m.parquet/.csv` 与列式存储 `data/store`
+  （由 `python python/scripts/build_ohlcv_store.py --rdata data/liaochu.RData` 从 R 数据生成；
+  存储中只有 5m 基础周期时自动合成 15m）；都没有时调用方跳过重新回测
+"""
+
+from __future__ import annotations
+
+import itertools
+from pathlib import Path
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .grid import GRID_COLUMNS, RULE_COLUMNS, GridEvaluator
+from .ohlcv import OHLCV_SUFFIXES, find_dataset, read_ohlcv
+from .resample import BASE_TIMEFRAME, open_timeframe
+from .store import STORE_DIR, OHLCVStore
+
+REFERENCE_DATA_DIR = Path("data") / "ohlcv"
+REFERENCE_DATASET = "PEPEUSDT_15m"
+REFERENCE_PARAMS = {"lookback": 3, "minDrop": 20.0, "TP": 10.0, "SL": 10.0}
+# 找不到参考K线时的提示
+REFERENCE_HINT = (f"{REFERENCE_DATA_DIR / REFERENCE_DATASET}.parquet/.csv 或 {STORE_DIR}"
+                  f"（python python/scripts/build_ohlcv_store.py --rdata data/liaochu.RData）")
+
+SWEEP_COLUMNS = ["cooldown_min", *RULE_COLUMNS, *GRID_COLUMNS[4:], "trade_change", "trade_change_pct"]
+
+
+def find_reference_ohlcv(data_dir: str | Path = REFERENCE_DATA_DIR,
+                         dataset: str = REFERENCE_DATASET,
+                         store_dir: str | Path | None = STORE_DIR) -> Path | None:
+    """参考K线的来源：data_dir 下的导出文件，或能提供该数据集的列式存储的索引文件；都没有时返回 None"""
+    path = find_dataset(data_dir, dataset)
+    if path is not None:
+        return path
+    if store_dir is None:
+        return None
+    store = OHLCVStore(store_dir)
+    if not store.catalog_path.exists():
+        return None
+    symbol, _, _ = dataset.rpartition("_")
+    if dataset in store or f"{symbol}_{BASE_TIMEFRAME}" in store:
+        return store.catalog_path
+    return None
+
+
+def load_reference_ohlcv(data_dir: str | Path = REFERENCE_DATA_DIR,
+                         dataset: str = REFERENCE_DATASET,
+                         store_dir: str | Path | None = STORE_DIR) -> pd.DataFrame | None:
+    """读取参考策略的K线数据：先找 data_dir 下的导出文件，再找列式存储；都没有时返回 None"""
+    path = find_reference_ohlcv(data_dir, dataset, store_dir)
+    if path is None:
+        return None
+    if path.suffix in OHLCV_SUFFIXES:
+        return read_ohlcv(path)
+    store = OHLCVStore(path.parent)
+    if dataset in store:
+        return store.open(dataset).to_frame()
+    symbol, _, timeframe = dataset.rpartition("_")
+    return open_timeframe(store, symbol, timeframe).to_frame()
+
+
+def infer_bar_minutes(index: pd.DatetimeIndex) -> float:
+    """K线周期（分钟）：相邻K线时间差的中位数"""
+    if len(index) < 2:
+        raise ValueError("至少需要两根K线才能推断K线周期")
+    # pandas 3 的 read_ohlcv 可能返回 datetime64[us]，统一换成纳秒再计算
+    diffs = np.diff(pd.DatetimeIndex(index).as_unit("ns").asi8)
+    return float(np.median(diffs)) / 60e9
+
+
+def cooldown_bars(cooldown_minutes: float, bar_minutes: float) -> int:
+    """冷却分钟数换算为规则中的K线数（间隔需大于冷却分钟数）"""
+    if cooldown_minutes < 0:
+        raise ValueError(f"冷却期不能为负数，当前为: {cooldown_minutes!r}")
+    return int(np.floor(cooldown_minutes / bar_minutes + 1e-9))
+
+
+def _as_list(values) -> list:
+    return [values] if np.isscalar(values) else list(values)
+
+
+def cooldown_sweep(data: pd.DataFrame,
+                   cooldown_minutes: Iterable[float],
+                   max_trades_per_day: int | Iterable[int] = 0,
+                   min_holding_bars: int | Iterable[int] = 1,
+                   params: Mapping[str, float] = REFERENCE_PARAMS,
+                   bar_minutes: float | None = None,
+                   **kwargs) -> pd.DataFrame:
+    """按冷却期（及可选的每日次数上限、最少持有K线数）重新回测
+
+    Args:
+        data: 以K线时间为索引的 OHLCV DataFrame
+        cooldown_minutes: 冷却期取值（分钟）
+        max_trades_per_day: 每日最多入场次数（0 为不限），可传多个取值
+        min_holding_bars: 最少持有K线数（>= 1），可传多个取值
+        params: 策略参数 lookback / minDrop / TP / SL
+        bar_minutes: K线周期（分钟）；缺省由索引推断
+        **kwargs: 传给 GridEvaluator（fee_rate、exit_mode、signal_mode 等）
+
+    Returns:
+        列为 SWEEP_COLUMNS 的结果表，第一行为不加规则的基准；
+        trade_change / trade_change_pct 为相对基准的交易笔数变化
+    """
+    if bar_minutes is None:
+        bar_minutes = infer_bar_minutes(data.index)
+    minutes = [float(c) for c in cooldown_minutes]
+    combos = [(0.0, 0, 0, 1)]
+    for c, daily, hold in itertools.product(minutes, _as_list(max_trades_per_day), _as_list(min_holding_bars)):
+        combos.append((c, cooldown_bars(c, bar_minutes), int(daily), int(hold)))
+
+    table = pd.DataFrame(combos, columns=["cooldown_min", *RULE_COLUMNS])
+    grid = table[list(RULE_COLUMNS)].assign(**{name: params[name] for name in ("lookback", "minDrop", "TP", "SL")})
+    results = GridEvaluator(data, **kwargs).evaluate(grid)
+
+    sweep = pd.concat([table, results[GRID_COLUMNS[4:]]], axis=1)
+    sweep["trades"] = sweep["trades"].astype(np.int64)
+    baseline = int(sweep["trades"].iloc[0])
+    sweep["trade_change"] = sweep["trades"] - baseline
+    sweep["trade_change_pct"] = sweep["trade_change"] / baseline * 100 if baseline else np.nan
+    return sweep[SWEEP_COLUMNS]
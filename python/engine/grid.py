@@ -0,0 +1,435 @@
+"""
+参数网格批量评估
+对 (lookback, minDrop, TP, SL) 网格计算与 `optimization/parallel_smart_search.R` 相同的指标：
+score, return_pct, win_rate, max_dd, trades（列同 `parallel_search_all_results.csv`）。
+
+与逐组合调用回测不同，这里共享所有只依赖部分参数的计算：
+
+- 跌幅序列（窗口最高价与跌幅）每个 lookback 只算一次，所有 minDrop 阈值直接与它比较得到信号；
+  窗口最高价取自每个数据集只建一次的 `WindowMaxIndex`（atr 模式的 ATR 也只算一次，
+  传入 `indicator_cache` 时跨运行从磁盘缓存读取），扫描几十个 lookback 时开销集中在出场模拟而不是窗口计算
+- 出场触发价序列、净值用价格序列及其分块统计（每 64 根K线的最大/最小值与块内回撤）每个数据集只算一次
+- 同一 lookback 的全部组合在一次内核调用中完成：寻找下一个信号、寻找出场K线时整块跳过
+  不可能命中的K线，持仓期间的净值回撤由分块统计直接合成，单个组合的开销与交易笔数成正比，
+  而不是与K线数成正比
+
+参数表可选带交易节奏规则列 cooldown / maxDaily / minHold（含义同 `run_backtest` 的
+cooldown_bars / max_trades_per_day / min_holding_bars，缺省为不限制），这些列原样出现在结果表中。
+规则只改变内核中"下一次从哪根K线开始找信号/出场"，同一 lookback 下几十个冷却期取值仍在一次内核调用中完成，
+不需要重新生成信号。
+
+内核需要 numba（可选依赖）；未安装时逐组合退回 `engine.backtest.run_backtest`，结果相同但速度慢得多。
+收益率、胜率、交易数与 `run_backtest` 完全一致；最大回撤的计算顺序不同，仅在末位浮点精度上有差异。
+"""
+
+from __future__ import annotations
+
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+from .backtest import EXIT_MODES, check_trade_rules, day_index, run_backtest
+from .indicators import IndicatorCache
+from .signals import WindowMaxIndex, atr_wilder, drop_series, true_range
+
+GRID_COLUMNS = ["lookback", "minDrop", "TP", "SL", "score", "return_pct", "win_rate", "max_dd", "trades"]
+PARAM_COLUMNS = ["lookback", "minDrop", "TP", "SL"]
+# 可选的交易节奏规则列及其缺省值（冷却K线数、每日最多入场次数、最少持有K线数）
+RULE_COLUMNS = {"cooldown": 0, "maxDaily": 0, "minHold": 1}
+
+# 分块跳过的块长度
+BLOCK = 64
+
+# 综合得分（同 parallel_smart_search.R 的加权加法目标函数）
+SCORE_WEIGHTS = {"return": 0.35, "drawdown": 0.30, "win_rate": 0.05, "trades": 0.30}
+SCORE_MAX_RETURN = 2500
+SCORE_MAX_TRADES = 400
+
+
+def composite_score(return_pct: np.ndarray, win_rate: np.ndarray,
+                    max_dd: np.ndarray, trades: np.ndarray) -> np.ndarray:
+    """Score = 0.35×收益率 + 0.30×回撤控制 + 0.05×胜率 + 0.30×交易数量（无交易时为 0）"""
+    trades = np.asarray(trades)
+    score = (SCORE_WEIGHTS["return"] * np.minimum(np.asarray(return_pct) / SCORE_MAX_RETURN, 1.0)
+             + SCORE_WEIGHTS["drawdown"] * (1 - np.abs(max_dd) / 100)
+             + SCORE_WEIGHTS["win_rate"] * (np.asarray(win_rate) / 100)
+             + SCORE_WEIGHTS["trades"] * np.minimum(np.sqrt(trades) / np.sqrt(SCORE_MAX_TRADES), 1.0))
+    return np.where(trades > 0, score, 0.0)
+
+
+def _block_max(values: np.ndarray) -> np.ndarray:
+    full = len(values) // BLOCK
+    return np.fmax.reduce(values[:full * BLOCK].reshape(full, BLOCK), axis=1)
+
+
+def _block_min(values: np.ndarray) -> np.ndarray:
+    full = len(values) // BLOCK
+    return np.fmin.reduce(values[:full * BLOCK].reshape(full, BLOCK), axis=1)
+
+
+def _block_drawdown(prices: np.ndarray) -> np.ndarray:
+    """每块内 min(price_t / 块内截至 t 的最高价)（最高价为 0 时记为 1）"""
+    full = len(prices) // BLOCK
+    blocks = prices[:full * BLOCK].reshape(full, BLOCK)
+    running = np.maximum.accumulate(blocks, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(running > 0, blocks / running, 1.0)
+    return ratio.min(axis=1)
+
+
+def _grid_loop(open_, close, trig_hi, trig_lo, curve_px, drop, drop_bmax,
+               hi_bmax, lo_bmin, px_bmax, px_bmin, px_bdd,
+               min_drops, tps, sls, cooldowns, max_dailys, min_holds, days, next_day,
+               initial_capital, fee_rate, tradingview,
+               out_capital, out_trades, out_wins, out_dd):
+    """批量内核：逐组合模拟，结果写入 out_* 数组（由 numba 编译执行）"""
+    n = len(close)
+    for k in range(len(min_drops)):
+        m = min_drops[k]
+        tp_pct = tps[k]
+        sl_pct = sls[k]
+        cooldown = cooldowns[k]
+        max_daily = max_dailys[k]
+        min_hold = min_holds[k]
+        capital = initial_capital
+        peak = initial_capital
+        dd = 0.0
+        trades = 0
+        wins = 0
+        start = 0
+        entry_day = -1
+        day_entries = 0
+
+        while True:
+            # 下一个信号：drop >= m（整块最大值不足时跳过）
+            i = -1
+            t = start
+            while t < n:
+                if t % BLOCK == 0 and t + BLOCK <= n and not drop_bmax[t // BLOCK] >= m:
+                    t += BLOCK
+                    continue
+                if drop[t] >= m:
+                    i = t
+                    break
+                t += 1
+            if i < 0:
+                break
+
+            price = close[i]
+            if not price > 0:
+                start = i + 1
+                continue
+            if max_daily > 0:
+                # 当日入场次数已满：从下一个自然日的第一根K线继续找信号
+                if days[i] == entry_day and day_entries >= max_daily:
+                    start = next_day[i]
+                    continue
+                if days[i] != entry_day:
+                    entry_day = days[i]
+                    day_entries = 0
+                day_entries += 1
+
+            entry_capital = capital - capital * fee_rate
+            q = entry_capital / price
+            tp_price = price * (1 + tp_pct / 100)
+            sl_price = price * (1 - sl_pct / 100)
+
+            # 持仓期间净值 = q * curve_px；以价格单位跟踪历史最高净值与最小 净值/最高值 比
+            run = peak / q
+            low_ratio = 1.0
+            c = curve_px[i]
+            if c > run:
+                run = c
+            if c / run < low_ratio:
+                low_ratio = c / run
+
+            j = -1
+            t = i + 1
+            exit_from = i + min_hold
+            while t < n:
+                if t % BLOCK == 0 and t + BLOCK <= n:
+                    b = t // BLOCK
+                    if (hi_bmax[b] < tp_price and lo_bmin[b] > sl_price) or t + BLOCK <= exit_from:
+                        r = px_bmin[b] / run
+                        if r < low_ratio:
+                            low_ratio = r
+                        if px_bdd[b] < low_ratio:
+                            low_ratio = px_bdd[b]
+                        if px_bmax[b] > run:
+                            run = px_bmax[b]
+                        t += BLOCK
+                        continue
+                if t >= exit_from and (trig_hi[t] >= tp_price or trig_lo[t] <= sl_price):
+                    j = t
+                    break
+                c = curve_px[t]
+                if c > run:
+                    run = c
+                if c / run < low_ratio:
+                    low_ratio = c / run
+                t += 1
+
+            if low_ratio - 1 < dd:
+                dd = low_ratio - 1
+            peak = run * q
+
+            if j < 0:
+                # 强制平仓
+                final_price = close[n - 1]
+                if final_price > 0:
+                    exit_value = q * final_price
+                    capital = exit_value - exit_value * fee_rate
+                    trades += 1
+                    if final_price > price:
+                        wins += 1
+                else:
+                    capital = 0.0
+                break
+
+            hit_tp = trig_hi[j] >= tp_price
+            hit_sl = trig_lo[j] <= sl_price
+            if hit_tp and hit_sl:
+                take_profit = np.isnan(open_[j]) or close[j] >= open_[j]
+            else:
+                take_profit = hit_tp
+            if tradingview:
+                exit_price = tp_price if take_profit else sl_price
+            else:
+                exit_price = close[j]
+
+            exit_value = q * exit_price
+            capital = exit_value - exit_value * fee_rate
+            trades += 1
+            if exit_price > price:
+                wins += 1
+
+            if capital / peak - 1 < dd:
+                dd = capital / peak - 1
+            if capital > peak:
+                peak = capital
+            start = j + 1 + cooldown
+
+        out_capital[k] = capital
+        out_trades[k] = trades
+        out_wins[k] = wins
+        out_dd[k] = dd * 100
+
+
+_JIT_KERNEL: list = []
+
+
+def _jit_kernel():
+    if not _JIT_KERNEL:
+        try:
+            from numba import njit
+        except ImportError:
+            _JIT_KERNEL.append(None)
+        else:
+            _JIT_KERNEL.append(njit(cache=True, nogil=True)(_grid_loop))
+    return _JIT_KERNEL[0]
+
+
+class GridEvaluator:
+    """参数网格评估器：绑定一个数据集与固定的回测设置，按需评估参数组合
+
+    Args:
+        data: 含 Open/High/Low/Close 列的 DataFrame 或数组字典
+        initial_capital, fee_rate, exit_mode, include_current_bar, signal_mode, atr_length:
+            同 `engine.backtest.backtest_tradingview_aligned`（入场固定为信号K线收盘）
+        window_index: High 的 `WindowMaxIndex`（可为整段数据上缓存的索引的 `.rows()` 视图）；缺省在 data 上新建
+        indicator_cache: 指标磁盘缓存（`engine.indicators.IndicatorCache`），atr 模式的 ATR 从中读取
+    """
+
+    def __init__(self,
+                 data: pd.DataFrame | Mapping[str, np.ndarray],
+                 initial_capital: float = 10000,
+                 fee_rate: float = 0.00075,
+                 exit_mode: str = "close",
+                 include_current_bar: bool = True,
+                 signal_mode: str = "absolute",
+                 atr_length: int = 14,
+                 window_index: WindowMaxIndex | None = None,
+                 indicator_cache: IndicatorCache | None = None):
+        if exit_mode not in EXIT_MODES:
+            raise ValueError(f"exit_mode 必须是 {EXIT_MODES} 之一，当前为: {exit_mode!r}")
+        self.data = data
+        self.initial_capital = float(initial_capital)
+        self.fee_rate = float(fee_rate)
+        self.exit_mode = exit_mode
+        self.include_current_bar = include_current_bar
+        self.signal_mode = signal_mode
+        self.atr_length = atr_length
+
+        self.open = np.ascontiguousarray(data["Open"], dtype=np.float64)
+        self.high = np.ascontiguousarray(data["High"], dtype=np.float64)
+        self.low = np.ascontiguousarray(data["Low"], dtype=np.float64)
+        self.close = np.ascontiguousarray(data["Close"], dtype=np.float64)
+
+        # 出场触发价：无效K线（High/Low/Close 任一缺失）不触发
+        valid = ~(np.isnan(self.high) | np.isnan(self.low) | np.isnan(self.close))
+        hi, lo = (self.high, self.low) if exit_mode == "tradingview" else (self.close, self.close)
+        self.trig_hi = np.where(valid, hi, -np.inf)
+        self.trig_lo = np.where(valid, lo, np.inf)
+        # 持仓净值用价格：收盘价无效时净值为现金（持仓中为 0）
+        self.curve_px = np.where(self.close > 0, self.close, 0.0)
+
+        self.hi_bmax = _block_max(self.trig_hi)
+        self.lo_bmin = _block_min(self.trig_lo)
+        self.px_bmax = _block_max(self.curve_px)
+        self.px_bmin = _block_min(self.curve_px)
+        self.px_bdd = _block_drawdown(self.curve_px)
+
+        # K线时间（DatetimeIndex 时）：maxDaily 规则按自然日计数
+        self.times = data.index.to_numpy() if isinstance(data, pd.DataFrame) and isinstance(
+            data.index, pd.DatetimeIndex) else None
+        self._days: tuple[np.ndarray, np.ndarray] | None = None
+
+        self.window_index = window_index if window_index is not None else WindowMaxIndex(self.high)
+        self.indicator_cache = indicator_cache
+        self._atr: np.ndarray | None = None
+        self._drops: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+
+    def drop(self, lookback: int) -> tuple[np.ndarray, np.ndarray]:
+        """lookback 对应的跌幅序列及其分块最大值（缓存）"""
+        lookback = int(lookback)
+        if lookback not in self._drops:
+            if self.signal_mode == "atr" and self._atr is None:
+                self._atr = self.atr()
+            drop = drop_series(self.data, lookback, self.include_current_bar, self.signal_mode, self.atr_length,
+                               window_index=self.window_index, atr=self._atr)
+            drop = np.ascontiguousarray(drop)
+            self._drops[lookback] = (drop, _block_max(drop))
+        return self._drops[lookback]
+
+    def atr(self) -> np.ndarray:
+        """Wilder ATR（有指标缓存时从缓存读取）"""
+        if self.indicator_cache is not None:
+            data = {"High": self.high, "Low": self.low, "Close": self.close}
+            return self.indicator_cache.compute("atr_wilder", data, atr_length=int(self.atr_length))
+        return atr_wilder(true_range(self.high, self.low, self.close), self.atr_length)
+
+    def days(self) -> tuple[np.ndarray, np.ndarray]:
+        """每根K线的自然日编号及下一个自然日第一根K线的位置（缓存）"""
+        if self._days is None:
+            if self.times is None:
+                raise ValueError("maxDaily 规则需要以K线时间为索引的 DataFrame")
+            days = day_index(self.times)
+            self._days = (days, np.searchsorted(days, days, side="right").astype(np.int64))
+        return self._days
+
+    def _evaluate_lookback(self, lookback: int, min_drops: np.ndarray, tps: np.ndarray, sls: np.ndarray,
+                           rules: dict[str, np.ndarray] | None = None):
+        k = len(min_drops)
+        if rules is None:
+            rules = {name: np.full(k, default, dtype=np.int64) for name, default in RULE_COLUMNS.items()}
+        out_capital = np.empty(k)
+        out_trades = np.empty(k, dtype=np.int64)
+        out_wins = np.empty(k, dtype=np.int64)
+        out_dd = np.empty(k)
+
+        if len(self.close) < 10:
+            # R 版数据行数不足时直接返回，目标函数记为 0
+            out_capital[:] = self.initial_capital
+            out_trades[:] = 0
+            out_wins[:] = 0
+            out_dd[:] = 0.0
+            return out_capital, out_trades, out_wins, out_dd
+
+        drop, drop_bmax = self.drop(lookback)
+        if (rules["maxDaily"] > 0).any():
+            days, next_day = self.days()
+        else:
+            days = next_day = np.zeros(len(self.close), dtype=np.int64)
+        kernel = _jit_kernel()
+        if kernel is not None:
+            kernel(self.open, self.close, self.trig_hi, self.trig_lo, self.curve_px, drop, drop_bmax,
+                   self.hi_bmax, self.lo_bmin, self.px_bmax, self.px_bmin, self.px_bdd,
+                   min_drops, tps, sls, rules["cooldown"], rules["maxDaily"], rules["minHold"], days, next_day,
+                   self.initial_capital, self.fee_rate, self.exit_mode == "tradingview",
+                   out_capital, out_trades, out_wins, out_dd)
+            return out_capital, out_trades, out_wins, out_dd
+
+        signals_by_drop: dict[float, np.ndarray] = {}
+        for idx in range(k):
+            m = float(min_drops[idx])
+            if m not in signals_by_drop:
+                signals_by_drop[m] = drop >= m
+            result = run_backtest(self.open, self.high, self.low, self.close, signals_by_drop[m],
+                                  tps[idx], sls[idx], initial_capital=self.initial_capital,
+                                  fee_rate=self.fee_rate, exit_mode=self.exit_mode, times=self.times,
+                                  cooldown_bars=int(rules["cooldown"][idx]),
+                                  max_trades_per_day=int(rules["maxDaily"][idx]),
+                                  min_holding_bars=int(rules["minHold"][idx]))
+            out_capital[idx] = result.final_capital
+            out_trades[idx] = result.trade_count
+            out_wins[idx] = (result.trades["PnLPercent"] > 0).sum() if result.trade_count else 0
+            out_dd[idx] = result.max_drawdown
+        return out_capital, out_trades, out_wins, out_dd
+
+    def evaluate(self, params: pd.DataFrame) -> pd.DataFrame:
+        """评估参数组合
+
+        Args:
+            params: 含 lookback, minDrop, TP, SL 列的表，可选 cooldown, maxDaily, minHold 规则列
+
+        Returns:
+            列为 GRID_COLUMNS 的结果表（params 中的规则列插在 SL 之后），行顺序与 params 一致
+        """
+        missing = [c for c in PARAM_COLUMNS if c not in params.columns]
+        if missing:
+            raise ValueError(f"参数表缺少列: {missing}")
+
+        lookbacks = params["lookback"].to_numpy(dtype=np.int64)
+        min_drops = params["minDrop"].to_numpy(dtype=np.float64)
+        tps = params["TP"].to_numpy(dtype=np.float64)
+        sls = params["SL"].to_numpy(dtype=np.float64)
+        rules = {name: (params[name].to_numpy(dtype=np.int64) if name in params.columns
+                        else np.full(len(params), default, dtype=np.int64))
+                 for name, default in RULE_COLUMNS.items()}
+        check_trade_rules(rules["cooldown"], rules["maxDaily"], rules["minHold"])
+
+        final_capital = np.empty(len(params))
+        trades = np.zeros(len(params), dtype=np.int64)
+        wins = np.zeros(len(params), dtype=np.int64)
+        max_dd = np.zeros(len(params))
+        for lookback in np.unique(lookbacks):
+            rows = np.flatnonzero(lookbacks == lookback)
+            out = self._evaluate_lookback(int(lookback), np.ascontiguousarray(min_drops[rows]),
+                                          np.ascontiguousarray(tps[rows]), np.ascontiguousarray(sls[rows]),
+                                          {name: np.ascontiguousarray(v[rows]) for name, v in rules.items()})
+            final_capital[rows], trades[rows], wins[rows], max_dd[rows] = out
+
+        results = grid_results(lookbacks, min_drops, tps, sls, final_capital, trades, wins, max_dd,
+                               self.initial_capital, index=params.index)
+        for pos, name in enumerate([c for c in RULE_COLUMNS if c in params.columns]):
+            results.insert(len(PARAM_COLUMNS) + pos, name, rules[name])
+        return results
+
+
+def grid_results(lookbacks: np.ndarray, min_drops: np.ndarray, tps: np.ndarray, sls: np.ndarray,
+                 final_capital: np.ndarray, trades: np.ndarray, wins: np.ndarray, max_dd: np.ndarray,
+                 initial_capital: float, index: pd.Index | None = None) -> pd.DataFrame:
+    """由逐组合的期末资金/交易数/盈利笔数/最大回撤组装 GRID_COLUMNS 结果表（无交易时收益、胜率、回撤记为 0）"""
+    has_trades = trades > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return_pct = np.where(has_trades, (final_capital - initial_capital) / initial_capital * 100, 0.0)
+        win_rate = np.where(has_trades, wins / trades * 100, 0.0)
+    max_dd = np.where(has_trades, max_dd, 0.0)
+
+    return pd.DataFrame({
+        "lookback": lookbacks,
+        "minDrop": min_drops,
+        "TP": tps,
+        "SL": sls,
+        "score": composite_score(return_pct, win_rate, max_dd, trades),
+        "return_pct": return_pct,
+        "win_rate": win_rate,
+        "max_dd": max_dd,
+        "trades": trades,
+    }, index=index)
+
+
+def evaluate_grid(data: pd.DataFrame | Mapping[str, np.ndarray], params: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """一次性评估参数网格（kwargs 传给 GridEvaluator）"""
+    return GridEvaluator(data, **kwargs).evaluate(params)
@@ -0,0 +1,553 @@
+"""
+增量 Walk-Forward 评估：按月缓存逐参数的交易分段，窗口指标由月分段拼接得到
+
+相邻滚动窗口共享 train_months-1 个训练月。这里把训练集模拟拆成「月 × 参数」的分段：
+
+- 每个 (月, 参数) 只模拟一次：从该月第一根K线空仓开始，记录每笔交易的入场K线，
+  以及从第 k 笔交易开始到月末的后缀汇总（资金倍数、净值相对最小/最大值、最大回撤、交易数、盈利笔数）
+  和月末是否仍持仓（持仓数量、入场价）
+- 窗口评估按月顺序拼接：空仓进入某月时直接套用该月的后缀汇总；
+  持仓跨月时，在新月份里逐K线推进这笔持仓直到出场，之后寻找下一笔入场，
+  一旦入场K线与该月分段中的某笔交易重合（此后路径完全相同），就直接套用那笔交易起的后缀汇总
+- 资金路径对初始资金是比例不变的，回撤按 c / max(P, m) = min(c / P, c / m) 拆开合成，
+  因此交易序列、交易数、胜率与连续模拟完全相同，收益率与最大回撤只在浮点末位有差异
+
+新窗口只需模拟新增的月份（以及本窗口新出现的参数），其余月份全部命中缓存。
+
+与逐窗口冷启动的差别：跌幅序列（滚动最高价、ATR）在整段数据上只计算一次，
+窗口开头的指标带有此前K线的预热，而 R 版在每个训练切片上重新起算
+（只影响每个窗口开头 ATR 收敛前的少量K线）。
+
+分段与拼接内核需要 numba（可选依赖）；未安装时 `IncrementalEvaluator.evaluate` 对每个窗口
+直接调用 `engine.backtest.run_backtest`（信号同样来自整段跌幅序列），结果相同但没有增量加速。
+"""
+
+from __future__ import annotations
+
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .backtest import run_backtest
+from .grid import BLOCK, PARAM_COLUMNS, RULE_COLUMNS, GridEvaluator, grid_results
+from .indicators import IndicatorCache
+
+
+def _month_loop(open_, close, trig_hi, trig_lo, curve_px, drop, drop_bmax,
+                hi_bmax, lo_bmin, px_bmax, px_bmin, px_bdd,
+                start, stop, min_drops, tps, sls, fee_rate, tradingview, offsets,
+                out_count, out_holding, out_qrel, out_price,
+                t_entry, t_factor, t_min, t_max, t_dd, t_trades, t_wins):
+    """月分段内核：每个参数从 start 空仓模拟到 stop，逐笔写入交易后缀汇总（由 numba 编译执行）
+
+    资金以入场前资金为 1 计：t_factor 为已平仓交易的资金倍数之积，t_min/t_max 为净值相对最小/最大值
+    （t_max 含入场前的 1），t_dd 为段内 min(净值 / 段内历史最高净值)。
+    """
+    for k in range(len(min_drops)):
+        m = min_drops[k]
+        tp_pct = tps[k]
+        sl_pct = sls[k]
+        base = offsets[k]
+        count = 0
+        holding = False
+        qrel = 0.0
+        entry_price = 0.0
+        s = start
+
+        while True:
+            i = -1
+            t = s
+            while t < stop:
+                if t % BLOCK == 0 and t + BLOCK <= stop and not drop_bmax[t // BLOCK] >= m:
+                    t += BLOCK
+                    continue
+                if drop[t] >= m:
+                    i = t
+                    break
+                t += 1
+            if i < 0:
+                break
+
+            price = close[i]
+            if not price > 0:
+                s = i + 1
+                continue
+
+            q = (1.0 - fee_rate) / price
+            tp_price = price * (1 + tp_pct / 100)
+            sl_price = price * (1 - sl_pct / 100)
+
+            run = 1.0 / q
+            c = curve_px[i]
+            lo_px = c
+            hi_px = c
+            if c > run:
+                run = c
+            low_ratio = 1.0
+            if c / run < low_ratio:
+                low_ratio = c / run
+
+            j = -1
+            t = i + 1
+            while t < stop:
+                if t % BLOCK == 0 and t + BLOCK <= stop:
+                    b = t // BLOCK
+                    if hi_bmax[b] < tp_price and lo_bmin[b] > sl_price:
+                        r = px_bmin[b] / run
+                        if r < low_ratio:
+                            low_ratio = r
+                        if px_bdd[b] < low_ratio:
+                            low_ratio = px_bdd[b]
+                        if px_bmax[b] > run:
+                            run = px_bmax[b]
+                        if px_bmin[b] < lo_px:
+                            lo_px = px_bmin[b]
+                        if px_bmax[b] > hi_px:
+                            hi_px = px_bmax[b]
+                        t += BLOCK
+                        continue
+                if trig_hi[t] >= tp_price or trig_lo[t] <= sl_price:
+                    j = t
+                    break
+                c = curve_px[t]
+                if c > run:
+                    run = c
+                if c / run < low_ratio:
+                    low_ratio = c / run
+                if c < lo_px:
+                    lo_px = c
+                if c > hi_px:
+                    hi_px = c
+                t += 1
+
+            e = base + count
+            count += 1
+            t_entry[e] = i
+            seg_max = q * hi_px
+            if seg_max < 1.0:
+                seg_max = 1.0
+
+            if j < 0:
+                # 月末仍持仓
+                t_factor[e] = 1.0
+                t_min[e] = q * lo_px
+                t_max[e] = seg_max
+                t_dd[e] = low_ratio
+                t_trades[e] = 0
+                t_wins[e] = 0
+                holding = True
+                qrel = q
+                entry_price = price
+                break
+
+            hit_tp = trig_hi[j] >= tp_price
+            hit_sl = trig_lo[j] <= sl_price
+            if hit_tp and hit_sl:
+                take_profit = np.isnan(open_[j]) or close[j] >= open_[j]
+            else:
+                take_profit = hit_tp
+            if tradingview:
+                exit_price = tp_price if take_profit else sl_price
+            else:
+                exit_price = close[j]
+
+            g = q * exit_price
+            g = g - g * fee_rate
+            if g / (run * q) < low_ratio:
+                low_ratio = g / (run * q)
+            t_factor[e] = g
+            t_min[e] = min(q * lo_px, g)
+            t_max[e] = max(seg_max, g)
+            t_dd[e] = low_ratio
+            t_trades[e] = 1
+            t_wins[e] = 1 if exit_price > price else 0
+            s = j + 1
+
+        # 由后向前合成后缀汇总
+        for r in range(count - 2, -1, -1):
+            e = base + r
+            n = e + 1
+            g = t_factor[e]
+            seg_max = t_max[e]
+            dd = t_dd[e]
+            if t_dd[n] < dd:
+                dd = t_dd[n]
+            if g * t_min[n] / seg_max < dd:
+                dd = g * t_min[n] / seg_max
+            t_dd[e] = dd
+            t_min[e] = min(t_min[e], g * t_min[n])
+            t_max[e] = max(seg_max, g * t_max[n])
+            t_factor[e] = g * t_factor[n]
+            t_trades[e] += t_trades[n]
+            t_wins[e] += t_wins[n]
+
+        out_count[k] = count
+        out_holding[k] = holding
+        out_qrel[k] = qrel
+        out_price[k] = entry_price
+
+
+def _combine_loop(open_, close, trig_hi, trig_lo, curve_px, drop, drop_bmax,
+                  hi_bmax, lo_bmin, px_bmax, px_bmin, px_bdd,
+                  starts, stops, records, st_offset, st_count, st_holding, st_qrel, st_price,
+                  t_entry, t_factor, t_min, t_max, t_dd, t_trades, t_wins,
+                  min_drops, tps, sls, initial_capital, fee_rate, tradingview,
+                  out_capital, out_trades, out_wins, out_dd):
+    """拼接内核：按月顺序合成每个参数在窗口上的结果（由 numba 编译执行）"""
+    months = len(starts)
+    last = stops[months - 1] - 1
+    for k in range(len(min_drops)):
+        m = min_drops[k]
+        tp_pct = tps[k]
+        sl_pct = sls[k]
+        capital = initial_capital
+        peak = initial_capital
+        dd = 1.0
+        trades = 0
+        wins = 0
+        holding = False
+        q = 0.0
+        price = 0.0
+        tp_price = 0.0
+        sl_price = 0.0
+
+        for mi in range(months):
+            a = starts[mi]
+            stop = stops[mi]
+            rec = records[k, mi]
+            off = st_offset[rec]
+            cnt = st_count[rec]
+            t = a
+            while True:
+                if holding:
+                    # 推进持仓直到出场（跨月持仓或未与月分段重合的交易）
+                    run = peak / q
+                    low_ratio = 1.0
+                    j = -1
+                    while t < stop:
+                        if t % BLOCK == 0 and t + BLOCK <= stop:
+                            b = t // BLOCK
+                            if hi_bmax[b] < tp_price and lo_bmin[b] > sl_price:
+                                r = px_bmin[b] / run
+                                if r < low_ratio:
+                                    low_ratio = r
+                                if px_bdd[b] < low_ratio:
+                                    low_ratio = px_bdd[b]
+                                if px_bmax[b] > run:
+                                    run = px_bmax[b]
+                                t += BLOCK
+                                continue
+                        if trig_hi[t] >= tp_price or trig_lo[t] <= sl_price:
+                            j = t
+                            break
+                        c = curve_px[t]
+                        if c > run:
+                            run = c
+                        if c / run < low_ratio:
+                            low_ratio = c / run
+                        t += 1
+                    if low_ratio < dd:
+                        dd = low_ratio
+                    peak = run * q
+                    if j < 0:
+                        break
+
+                    hit_tp = trig_hi[j] >= tp_price
+                    hit_sl = trig_lo[j] <= sl_price
+                    if hit_tp and hit_sl:
+                        take_profit = np.isnan(open_[j]) or close[j] >= open_[j]
+                    else:
+                        take_profit = hit_tp
+                    if tradingview:
+                        exit_price = tp_price if take_profit else sl_price
+                    else:
+                        exit_price = close[j]
+                    exit_value = q * exit_price
+                    capital = exit_value - exit_value * fee_rate
+                    trades += 1
+                    if exit_price > price:
+                        wins += 1
+                    if capital / peak < dd:
+                        dd = capital / peak
+                    if capital > peak:
+                        peak = capital
+                    holding = False
+                    t = j + 1
+
+                # 空仓：下一笔入场
+                s = -1
+                while t < stop:
+                    if t % BLOCK == 0 and t + BLOCK <= stop and not drop_bmax[t // BLOCK] >= m:
+                        t += BLOCK
+                        continue
+                    if drop[t] >= m and close[t] > 0:
+                        s = t
+                        break
+                    t += 1
+                if s < 0:
+                    break
+
+                e = off + np.searchsorted(t_entry[off:off + cnt], s)
+                # 窗口首根K线入场时净值曲线里没有入场前的资金（同 R 的 cummax(capitalCurve)），
+                # 而月分段的后缀汇总把入场前资金计入了最高净值，这笔交易改为逐K线推进
+                if s != starts[0] and e < off + cnt and t_entry[e] == s:
+                    # 与月分段重合：套用该笔交易起的后缀汇总
+                    if capital * t_min[e] / peak < dd:
+                        dd = capital * t_min[e] / peak
+                    if t_dd[e] < dd:
+                        dd = t_dd[e]
+                    if capital * t_max[e] > peak:
+                        peak = capital * t_max[e]
+                    trades += t_trades[e]
+                    wins += t_wins[e]
+                    if st_holding[rec]:
+                        q = capital * t_factor[e] * st_qrel[rec]
+                        price = st_price[rec]
+                        tp_price = price * (1 + tp_pct / 100)
+                        sl_price = price * (1 - sl_pct / 100)
+                        holding = True
+                    else:
+                        capital = capital * t_factor[e]
+                    break
+
+                price = close[s]
+                q = (capital - capital * fee_rate) / price
+                tp_price = price * (1 + tp_pct / 100)
+                sl_price = price * (1 - sl_pct / 100)
+                holding = True
+                value = q * curve_px[s]
+                if s == starts[0] or value > peak:
+                    peak = value
+                if value / peak < dd:
+                    dd = value / peak
+                t = s + 1
+
+        if holding:
+            # 强制平仓
+            final_price = close[last]
+            if final_price > 0:
+                exit_value = q * final_price
+                capital = exit_value - exit_value * fee_rate
+                trades += 1
+                if final_price > price:
+                    wins += 1
+            else:
+                capital = 0.0
+
+        out_capital[k] = capital
+        out_trades[k] = trades
+        out_wins[k] = wins
+        out_dd[k] = (dd - 1) * 100
+
+
+_JIT_KERNELS: list = []
+
+
+def _jit_kernels():
+    if not _JIT_KERNELS:
+        try:
+            from numba import njit
+        except ImportError:
+            _JIT_KERNELS.append(None)
+        else:
+            jit = njit(cache=True, nogil=True)
+            _JIT_KERNELS.append((jit(_month_loop), jit(_combine_loop)))
+    return _JIT_KERNELS[0]
+
+
+def _grow(values: np.ndarray, size: int) -> np.ndarray:
+    if size <= len(values):
+        return values
+    out = np.empty(max(size, 2 * len(values)), dtype=values.dtype)
+    out[:len(values)] = values
+    return out
+
+
+class _PartialStore:
+    """月分段存储：每条记录对应一个 (月, 参数)，交易后缀汇总按记录连续存放"""
+
+    def __init__(self):
+        self.records = 0
+        self.trades = 0
+        self.offset = np.empty(1024, dtype=np.int64)
+        self.count = np.empty(1024, dtype=np.int64)
+        self.holding = np.empty(1024, dtype=np.bool_)
+        self.qrel = np.empty(1024)
+        self.price = np.empty(1024)
+        self.entry = np.empty(4096, dtype=np.int64)
+        self.factor = np.empty(4096)
+        self.min = np.empty(4096)
+        self.max = np.empty(4096)
+        self.dd = np.empty(4096)
+        self.n_trades = np.empty(4096, dtype=np.int64)
+        self.wins = np.empty(4096, dtype=np.int64)
+
+    def reserve(self, records: int, trades: int) -> None:
+        need = self.records + records
+        for name in ("offset", "count", "holding", "qrel", "price"):
+            setattr(self, name, _grow(getattr(self, name), need))
+        need = self.trades + trades
+        for name in ("entry", "factor", "min", "max", "dd", "n_trades", "wins"):
+            setattr(self, name, _grow(getattr(self, name), need))
+
+
+class IncrementalEvaluator:
+    """增量评估器：绑定整段数据与月份划分，按窗口（训练月列表）评估参数组合
+
+    Args:
+        data: 含 Open/High/Low/Close 列的 DataFrame 或数组字典（整段数据，跌幅序列在其上只算一次）
+        months: {"YYYY-MM": (start, stop)}，见 `engine.walkforward.month_ranges`
+        其余参数同 `engine.grid.GridEvaluator`
+    """
+
+    def __init__(self,
+                 data: pd.DataFrame | Mapping[str, np.ndarray],
+                 months: Mapping[str, tuple[int, int]],
+                 initial_capital: float = 10000,
+                 fee_rate: float = 0.00075,
+                 exit_mode: str = "close",
+                 include_current_bar: bool = True,
+                 signal_mode: str = "absolute",
+                 atr_length: int = 14,
+                 indicator_cache: IndicatorCache | None = None):
+        self.grid = GridEvaluator(data, initial_capital=initial_capital, fee_rate=fee_rate,
+                                  exit_mode=exit_mode, include_current_bar=include_current_bar,
+                                  signal_mode=signal_mode, atr_length=atr_length,
+                                  indicator_cache=indicator_cache)
+        self.months = dict(months)
+        self._store = _PartialStore()
+        self._index: dict[tuple[str, int, float, float, float], int] = {}
+        self._sorted_drops: dict[tuple[str, int], np.ndarray] = {}
+
+    @property
+    def cached_partials(self) -> int:
+        """已缓存的 (月, 参数) 分段数"""
+        return self._store.records
+
+    def _compute_partials(self, month: str, lookback: int, keys: list[tuple], month_loop) -> None:
+        g = self.grid
+        start, stop = self.months[month]
+        drop, drop_bmax = g.drop(lookback)
+        min_drops = np.array([key[2] for key in keys])
+        tps = np.array([key[3] for key in keys])
+        sls = np.array([key[4] for key in keys])
+
+        # 每笔交易至少占两根K线，且不多于该月的信号数
+        window = self._sorted_drops.get((month, lookback))
+        if window is None:
+            window = drop[start:stop]
+            window = self._sorted_drops[(month, lookback)] = np.sort(window[~np.isnan(window)])
+        signals = len(window) - np.searchsorted(window, min_drops, side="left")
+        capacity = np.minimum(signals, (stop - start) // 2 + 1)
+        offsets = self._store.trades + np.concatenate([[0], np.cumsum(capacity)[:-1]])
+
+        store = self._store
+        store.reserve(len(keys), int(capacity.sum()))
+        rows = slice(store.records, store.records + len(keys))
+        count = np.empty(len(keys), dtype=np.int64)
+        holding = np.empty(len(keys), dtype=np.bool_)
+        qrel = np.empty(len(keys))
+        price = np.empty(len(keys))
+        month_loop(g.open, g.close, g.trig_hi, g.trig_lo, g.curve_px, drop, drop_bmax,
+                   g.hi_bmax, g.lo_bmin, g.px_bmax, g.px_bmin, g.px_bdd,
+                   start, stop, min_drops, tps, sls, g.fee_rate, g.exit_mode == "tradingview",
+                   offsets, count, holding, qrel, price,
+                   store.entry, store.factor, store.min, store.max, store.dd, store.n_trades, store.wins)
+        store.offset[rows] = offsets
+        store.count[rows] = count
+        store.holding[rows] = holding
+        store.qrel[rows] = qrel
+        store.price[rows] = price
+        for i, key in enumerate(keys):
+            self._index[key] = store.records + i
+        store.records += len(keys)
+        store.trades += int(capacity.sum())
+
+    def evaluate(self, params: pd.DataFrame, months: Sequence[str]) -> pd.DataFrame:
+        """评估参数组合在由连续月份组成的窗口上的表现
+
+        Args:
+            params: 含 lookback, minDrop, TP, SL 列的表；月分段不支持交易规则，
+                RULE_COLUMNS（cooldown/maxDaily/minHold）列只能取默认值，否则报错（改用 GridEvaluator）
+            months: 窗口包含的月份（按时间顺序、相邻）
+
+        Returns:
+            列为 GRID_COLUMNS 的结果表，行顺序与 params 一致
+        """
+        missing = [c for c in PARAM_COLUMNS if c not in params.columns]
+        if missing:
+            raise ValueError(f"参数表缺少列: {missing}")
+        rules = [name for name, default in RULE_COLUMNS.items()
+                 if name in params.columns and np.any(params[name].to_numpy(dtype=np.int64) != default)]
+        if rules:
+            raise ValueError(f"增量评估不支持交易规则列: {rules}（请改用 GridEvaluator）")
+        months = list(months)
+        g = self.grid
+        starts = np.array([self.months[m][0] for m in months], dtype=np.int64)
+        stops = np.array([self.months[m][1] for m in months], dtype=np.int64)
+        if np.any(starts[1:] != stops[:-1]):
+            raise ValueError(f"窗口月份不连续: {months}")
+
+        lookbacks = params["lookback"].to_numpy(dtype=np.int64)
+        min_drops = params["minDrop"].to_numpy(dtype=np.float64)
+        tps = params["TP"].to_numpy(dtype=np.float64)
+        sls = params["SL"].to_numpy(dtype=np.float64)
+
+        final_capital = np.empty(len(params))
+        trades = np.zeros(len(params), dtype=np.int64)
+        wins = np.zeros(len(params), dtype=np.int64)
+        max_dd = np.zeros(len(params))
+
+        kernels = _jit_kernels()
+        if stops[-1] - starts[0] < 10:
+            final_capital[:] = g.initial_capital
+        elif kernels is None:
+            self._evaluate_direct(starts[0], stops[-1], lookbacks, min_drops, tps, sls,
+                                  final_capital, trades, wins, max_dd)
+        else:
+            month_loop, combine_loop = kernels
+            for lookback in np.unique(lookbacks):
+                rows = np.flatnonzero(lookbacks == lookback)
+                lookback = int(lookback)
+                keys = [(lookback, float(min_drops[r]), float(tps[r]), float(sls[r])) for r in rows]
+                records = np.empty((len(rows), len(months)), dtype=np.int64)
+                for mi, month in enumerate(months):
+                    month_keys = [(month,) + key for key in keys]
+                    todo = [key for key in dict.fromkeys(month_keys) if key not in self._index]
+                    if todo:
+                        self._compute_partials(month, lookback, todo, month_loop)
+                    records[:, mi] = [self._index[key] for key in month_keys]
+
+                drop, drop_bmax = g.drop(lookback)
+                store = self._store
+                out = (np.empty(len(rows)), np.empty(len(rows), dtype=np.int64),
+                       np.empty(len(rows), dtype=np.int64), np.empty(len(rows)))
+                combine_loop(g.open, g.close, g.trig_hi, g.trig_lo, g.curve_px, drop, drop_bmax,
+                             g.hi_bmax, g.lo_bmin, g.px_bmax, g.px_bmin, g.px_bdd,
+                             starts, stops, records, store.offset, store.count, store.holding,
+                             store.qrel, store.price, store.entry, store.factor, store.min, store.max,
+                             store.dd, store.n_trades, store.wins,
+                             np.ascontiguousarray(min_drops[rows]), np.ascontiguousarray(tps[rows]),
+                             np.ascontiguousarray(sls[rows]), g.initial_capital, g.fee_rate,
+                             g.exit_mode == "tradingview", *out)
+                final_capital[rows], trades[rows], wins[rows], max_dd[rows] = out
+
+        return grid_results(lookbacks, min_drops, tps, sls, final_capital, trades, wins, max_dd,
+                            g.initial_capital, index=params.index)
+
+    def _evaluate_direct(self, start, stop, lookbacks, min_drops, tps, sls,
+                         final_capital, trades, wins, max_dd) -> None:
+        # 无 numba 时逐组合在窗口切片上回测（信号取自整段跌幅序列）
+        g = self.grid
+        window = slice(start, stop)
+        for idx in range(len(lookbacks)):
+            drop, _ = g.drop(int(lookbacks[idx]))
+            result = run_backtest(g.open[window], g.high[window], g.low[window], g.close[window],
+                                  drop[window] >= min_drops[idx], tps[idx], sls[idx],
+                                  initial_capital=g.initial_capital, fee_rate=g.fee_rate,
+                                  exit_mode=g.exit_mode)
+            final_capital[idx] = result.final_capital
+            trades[idx] = result.trade_count
+            wins[idx] = (result.trades["PnLPercent"] > 0).sum() if result.trade_count else 0
+            max_dd[idx] = result.max_drawdown
@@ -0,0 +1,162 @@
+"""
+指标序列磁盘缓存（内容寻址，LRU 淘汰）
+真实波幅、Wilder ATR、滚动最大值等只依赖 (输入序列, 指标名, 参数)，在每次优化、Walk-Forward、
+对比运行中反复计算。这里按内容寻址把结果存为 `.npy`，重复运行时直接映射读取：
+
+- 键 = SHA-256(指标名 + 参数 + 输入数组的 dtype/形状/内容哈希 + 缓存版本)，输入数据一变键就变，不需要手动失效
+- 存储：`<root>/<键前两位>/<键>.npy`，读取用 `np.load(mmap_mode="r")`，返回只读映射数组（零拷贝）
+- LRU：命中时刷新文件 mtime；写入后总大小超过上限时按 mtime 从旧到新删除，直到低于上限
+- 并发：写入临时文件后 `os.replace` 原子替换；没有共享索引文件，多个工作进程同时读写不需要加锁。
+  已映射的文件被其他进程淘汰时映射仍然有效（POSIX 语义），读到一半被删除的条目按未命中重新计算
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Mapping
+
+import numpy as np
+
+from .signals import atr_wilder, rolling_max, true_range
+
+INDICATOR_CACHE_DIR = Path("outputs") / ".cache" / "indicators"
+DEFAULT_MAX_BYTES = 2 << 30
+
+# 缓存格式版本：指标实现或存储格式变化时递增，旧条目不再命中（随后被 LRU 淘汰）
+CACHE_VERSION = 1
+
+# 可缓存的指标：{名称: (输入列, 计算函数(*输入, **参数))}
+INDICATORS: dict[str, tuple[tuple[str, ...], Callable[..., np.ndarray]]] = {
+    "true_range": (("High", "Low", "Close"), true_range),
+    "atr_wilder": (("High", "Low", "Close"),
+                   lambda high, low, close, atr_length=14: atr_wilder(true_range(high, low, close), atr_length)),
+    "rolling_max": (("High",), lambda high, window: rolling_max(high, window)),
+}
+
+
+def array_digest(values: np.ndarray) -> str:
+    """数组内容哈希（含 dtype 与形状）"""
+    values = np.ascontiguousarray(values)
+    digest = hashlib.sha256(f"{values.dtype.str}{values.shape}".encode("ascii"))
+    digest.update(values)
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    """指标序列的磁盘缓存
+
+    Args:
+        root: 缓存目录
+        max_bytes: 总大小上限（字节），超过时按最近使用时间淘汰
+    """
+
+    def __init__(self, root: str | os.PathLike = INDICATOR_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, name: str, inputs: list[np.ndarray] | tuple[np.ndarray, ...], params: Mapping) -> str:
+        payload = {
+            "version": CACHE_VERSION,
+            "name": name,
+            "params": dict(params),
+            "inputs": [array_digest(values) for values in inputs],
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.npy"
+
+    def get(self, key: str) -> np.ndarray | None:
+        """读取缓存条目（只读映射数组），不存在或已损坏时返回 None"""
+        path = self.path(key)
+        try:
+            values = np.load(path, mmap_mode="r", allow_pickle=False)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            path.unlink(missing_ok=True)
+            return None
+        return values
+
+    def put(self, key: str, values: np.ndarray) -> np.ndarray:
+        """写入缓存条目并按需淘汰，返回写入后的映射数组"""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{key}.", suffix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(values), allow_pickle=False)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+        cached = self.get(key)
+        return cached if cached is not None else np.asarray(values)
+
+    def compute(self, name: str, data: Mapping[str, np.ndarray], **params) -> np.ndarray:
+        """取指标序列：命中时映射读取，未命中时计算并写入
+
+        Args:
+            name: INDICATORS 中的指标名
+            data: 含该指标输入列的 DataFrame 或数组字典
+            **params: 指标参数（如 atr_length=14、window=20）
+        """
+        if name not in INDICATORS:
+            raise ValueError(f"未知指标: {name!r}（可选: {sorted(INDICATORS)}）")
+        columns, func = INDICATORS[name]
+        inputs = [np.ascontiguousarray(data[column], dtype=np.float64) for column in columns]
+        key = self.key(name, inputs, params)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        return self.put(key, func(*inputs, **params))
+
+    def entries(self) -> list[tuple[Path, int, int]]:
+        """全部条目的 (路径, 大小, mtime_ns)，按 mtime 从旧到新排序"""
+        entries = []
+        if not self.root.is_dir():
+            return entries
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(".npy"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((Path(entry.path), stat.st_size, stat.st_mtime_ns))
+        entries.sort(key=lambda e: e[2])
+        return entries
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes: int | None = None) -> int:
+        """淘汰最久未使用的条目直到总大小不超过上限，返回删除的条目数"""
+        limit = self.max_bytes if max_bytes is None else int(max_bytes)
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= limit:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        return self.evict(0)
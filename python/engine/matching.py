@@ -0,0 +1,244 @@
+"""
+交易匹配（R 回测 vs TradingView 订单簿对比）
+把两份交易表按入场时间在容差内一一配对，分类为：
+
+- exact：入场与出场时间都在精确容差内
+- shifted：入场与出场时间都在匹配容差内，但不满足精确容差（整体平移，如时区、K线开/收盘时间口径）
+- exit_mismatch：入场配上了，但出场时间超出匹配容差（止盈止损判定不同）
+- 多余交易（extra）：只出现在我方交易表中；缺失交易（missing）：只出现在参考交易表中
+
+配对方式：两边各按入场时间排序，用 searchsorted 一次取出所有入场时间差在容差内的候选对，
+按时间差从小到大贪心分配（两边都未配对才接受）。时间差没有并列时，结果与反复取"互为最近"的交易对
+直到没有新配对相同，但只需一次排序：O(n log n + 候选对数)，间隔递增的交错交易链也不会退化为逐轮 O(n²)。
+多个交易对/周期混在同一张表时，用 `by` 指定分组列，配对不会跨组。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .trades import time_ns
+
+NS_PER_SECOND = 1_000_000_000
+
+STATUS_EXACT = "exact"
+STATUS_SHIFTED = "shifted"
+STATUS_EXIT_MISMATCH = "exit_mismatch"
+
+MATCH_COLUMNS = {
+    "Index": "int64",
+    "RefIndex": "int64",
+    "EntryTime": "datetime64[ns]",
+    "RefEntryTime": "datetime64[ns]",
+    "EntryShiftSec": "float64",
+    "ExitTime": "datetime64[ns]",
+    "RefExitTime": "datetime64[ns]",
+    "ExitShiftSec": "float64",
+    "EntryPrice": "float64",
+    "RefEntryPrice": "float64",
+    "EntryPriceDiffPct": "float64",
+    "ExitPrice": "float64",
+    "RefExitPrice": "float64",
+    "ExitPriceDiffPct": "float64",
+    "PnLPercent": "float64",
+    "RefPnLPercent": "float64",
+    "PnLDiff": "float64",
+    "Status": "category",
+}
+
+
+@dataclass(frozen=True)
+class TradeMatch:
+    """交易匹配结果
+
+    Attributes:
+        matches: 配对表，每行一对交易，列见 MATCH_COLUMNS（分组列在最前）；
+            Index/RefIndex 为两份交易表中的行位置，时间差与价格差均为"我方 - 参考"
+        extra: 只出现在我方交易表中的交易（原表的行）
+        missing: 只出现在参考交易表中的交易（原表的行）
+    """
+
+    matches: pd.DataFrame
+    extra: pd.DataFrame
+    missing: pd.DataFrame
+
+    @property
+    def exact(self) -> pd.DataFrame:
+        return self.matches[(self.matches["Status"] == STATUS_EXACT).to_numpy()]
+
+    @property
+    def shifted(self) -> pd.DataFrame:
+        return self.matches[(self.matches["Status"] == STATUS_SHIFTED).to_numpy()]
+
+    @property
+    def exit_mismatch(self) -> pd.DataFrame:
+        return self.matches[(self.matches["Status"] == STATUS_EXIT_MISMATCH).to_numpy()]
+
+    def summary(self) -> dict:
+        """各类数量与配对交易的时间/价格偏差统计"""
+        matches = self.matches
+        counts = matches["Status"].value_counts()
+        return {
+            "matched": len(matches),
+            STATUS_EXACT: int(counts.get(STATUS_EXACT, 0)),
+            STATUS_SHIFTED: int(counts.get(STATUS_SHIFTED, 0)),
+            STATUS_EXIT_MISMATCH: int(counts.get(STATUS_EXIT_MISMATCH, 0)),
+            "extra": len(self.extra),
+            "missing": len(self.missing),
+            "entry_shift_sec_median": float(matches["EntryShiftSec"].median()) if len(matches) else np.nan,
+            "exit_shift_sec_median": float(matches["ExitShiftSec"].median()) if len(matches) else np.nan,
+            "entry_price_diff_pct_max": float(matches["EntryPriceDiffPct"].abs().max()) if len(matches) else np.nan,
+            "exit_price_diff_pct_max": float(matches["ExitPriceDiffPct"].abs().max()) if len(matches) else np.nan,
+        }
+
+
+def _keys(trades: pd.DataFrame, by: list[str], offset_ns: int, name: str) -> pd.DataFrame:
+    entry_ns = time_ns(trades["EntryTime"])
+    valid = entry_ns != np.iinfo(np.int64).min
+    # 分组列统一转为字符串：两份表的 categorical 类别不同时，拼接后无法按同名分组编号
+    keys = pd.DataFrame({col: trades[col].astype(str).to_numpy()[valid] for col in by})
+    keys["t"] = (entry_ns[valid] + offset_ns).view("datetime64[ns]")
+    keys[name] = np.flatnonzero(valid)
+    # 按（加上偏移后的）入场时间排序：_candidate_edges 在参考表上用 searchsorted 取容差内的候选对
+    return keys.sort_values("t", kind="stable", ignore_index=True)
+
+
+def _candidate_edges(left_t: np.ndarray, right_t: np.ndarray, tolerance_ns: int) -> tuple[np.ndarray, ...]:
+    """right_t 已排序：返回入场时间差 <= tolerance_ns 的全部 (左位置, 右位置, 时间差)"""
+    lo = np.searchsorted(right_t, left_t - tolerance_ns, side="left")
+    hi = np.searchsorted(right_t, left_t + tolerance_ns, side="right")
+    counts = hi - lo
+    left = np.repeat(np.arange(len(left_t)), counts)
+    starts = np.cumsum(counts) - counts
+    right = np.arange(int(counts.sum())) - np.repeat(starts, counts) + np.repeat(lo, counts)
+    return left, right, np.abs(left_t[left] - right_t[right])
+
+
+def _greedy_nearest(ours: pd.DataFrame, ref: pd.DataFrame, by: list[str], tolerance: pd.Timedelta) -> pd.DataFrame:
+    """按入场时间差从小到大贪心配对，返回 (li, ri) 配对表"""
+    if by:
+        codes = pd.concat([ours[by], ref[by]], ignore_index=True).groupby(by, sort=False).ngroup().to_numpy()
+        our_groups, ref_groups = codes[:len(ours)], codes[len(ours):]
+    else:
+        our_groups = np.zeros(len(ours), dtype=np.int64)
+        ref_groups = np.zeros(len(ref), dtype=np.int64)
+    our_t = ours["t"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    ref_t = ref["t"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+    lefts, rights, dists = [], [], []
+    for group in np.intersect1d(our_groups, ref_groups):
+        left_pos = np.flatnonzero(our_groups == group)
+        right_pos = np.flatnonzero(ref_groups == group)
+        left, right, dist = _candidate_edges(our_t[left_pos], ref_t[right_pos], tolerance.value)
+        lefts.append(left_pos[left])
+        rights.append(right_pos[right])
+        dists.append(dist)
+    if not lefts:
+        return pd.DataFrame({"li": pd.Series(dtype=np.int64), "ri": pd.Series(dtype=np.int64)})
+    left, right, dist = np.concatenate(lefts), np.concatenate(rights), np.concatenate(dists)
+
+    # 时间差相同时按入场时间顺序，配对结果确定
+    order = np.lexsort((right, left, dist))
+    used_left = bytearray(len(ours))
+    used_right = bytearray(len(ref))
+    pairs_left, pairs_right = [], []
+    for a, b in zip(left[order].tolist(), right[order].tolist()):
+        if used_left[a] or used_right[b]:
+            continue
+        used_left[a] = used_right[b] = 1
+        pairs_left.append(a)
+        pairs_right.append(b)
+
+    pairs = pd.DataFrame({
+        "li": ours["li"].to_numpy(dtype=np.int64)[pairs_left],
+        "ri": ref["ri"].to_numpy(dtype=np.int64)[pairs_right],
+    })
+    return pairs.sort_values("li", ignore_index=True)
+
+
+def _column(trades: pd.DataFrame, name: str, idx: np.ndarray) -> np.ndarray:
+    if name not in trades:
+        return np.full(len(idx), np.nan)
+    return pd.to_numeric(trades[name], errors="coerce").to_numpy(dtype=np.float64)[idx]
+
+
+def match_trades(trades: pd.DataFrame, reference: pd.DataFrame,
+                 tolerance: str | pd.Timedelta = "15min",
+                 exact_tolerance: str | pd.Timedelta = "1min",
+                 reference_offset: str | pd.Timedelta = "0s",
+                 by: str | list[str] | None = None) -> TradeMatch:
+    """按入场时间把两份交易表一一配对
+
+    Args:
+        trades: 我方交易表（如 load_trades() 的结果），需有 EntryTime/ExitTime/EntryPrice/ExitPrice 列，
+            有 PnLPercent 列时一并比较盈亏
+        reference: 参考交易表（如 load_tradingview_trades() / load_tradingview_dir() 的结果），列同上
+        tolerance: 入场时间配对容差；出场时间超出该容差的配对记为 exit_mismatch
+        exact_tolerance: 入场与出场都在该容差内记为 exact
+        reference_offset: 配对前加到参考交易时间上的偏移（如时区差 "8h"）；输出中的参考时间也已平移
+        by: 分组列（如 "Symbol"），两份表都需包含
+
+    Returns:
+        TradeMatch；matches 按我方交易的行位置排序
+    """
+    by = [by] if isinstance(by, str) else list(by or [])
+    tolerance = pd.Timedelta(tolerance)
+    exact_ns = pd.Timedelta(exact_tolerance).value
+    offset_ns = pd.Timedelta(reference_offset).value
+
+    pairs = _greedy_nearest(_keys(trades, by, 0, "li"), _keys(reference, by, offset_ns, "ri"), by, tolerance)
+    li = pairs["li"].to_numpy(dtype=np.int64)
+    ri = pairs["ri"].to_numpy(dtype=np.int64)
+
+    entry_ns = time_ns(trades["EntryTime"])[li]
+    exit_ns = time_ns(trades["ExitTime"])[li]
+    ref_entry_ns = time_ns(reference["EntryTime"])[ri] + offset_ns
+    ref_exit_raw = time_ns(reference["ExitTime"])[ri]
+    ref_exit_missing = ref_exit_raw == np.iinfo(np.int64).min
+    ref_exit_ns = np.where(ref_exit_missing, ref_exit_raw, ref_exit_raw + offset_ns)
+
+    entry_shift = (entry_ns - ref_entry_ns) / NS_PER_SECOND
+    exit_shift = np.where(ref_exit_missing | (exit_ns == np.iinfo(np.int64).min), np.nan,
+                          (exit_ns - ref_exit_ns) / NS_PER_SECOND)
+
+    entry_price = _column(trades, "EntryPrice", li)
+    ref_entry_price = _column(reference, "EntryPrice", ri)
+    exit_price = _column(trades, "ExitPrice", li)
+    ref_exit_price = _column(reference, "ExitPrice", ri)
+    pnl = _column(trades, "PnLPercent", li)
+    ref_pnl = _column(reference, "PnLPercent", ri)
+
+    exit_abs = np.abs(exit_shift)
+    exact = (np.abs(entry_shift) * NS_PER_SECOND <= exact_ns) & (exit_abs * NS_PER_SECOND <= exact_ns)
+    within = exit_abs * NS_PER_SECOND <= tolerance.value
+    status = np.where(exact, STATUS_EXACT, np.where(within, STATUS_SHIFTED, STATUS_EXIT_MISMATCH))
+
+    matches = pd.DataFrame({
+        "Index": li,
+        "RefIndex": ri,
+        "EntryTime": entry_ns.view("datetime64[ns]"),
+        "RefEntryTime": ref_entry_ns.view("datetime64[ns]"),
+        "EntryShiftSec": entry_shift,
+        "ExitTime": exit_ns.view("datetime64[ns]"),
+        "RefExitTime": ref_exit_ns.view("datetime64[ns]"),
+        "ExitShiftSec": exit_shift,
+        "EntryPrice": entry_price,
+        "RefEntryPrice": ref_entry_price,
+        "EntryPriceDiffPct": (entry_price - ref_entry_price) / ref_entry_price * 100,
+        "ExitPrice": exit_price,
+        "RefExitPrice": ref_exit_price,
+        "ExitPriceDiffPct": (exit_price - ref_exit_price) / ref_exit_price * 100,
+        "PnLPercent": pnl,
+        "RefPnLPercent": ref_pnl,
+        "PnLDiff": pnl - ref_pnl,
+        "Status": status,
+    }).astype(MATCH_COLUMNS)
+    for pos, col in enumerate(by):
+        matches.insert(pos, col, trades[col].to_numpy()[li])
+
+    extra = np.setdiff1d(np.arange(len(trades)), li)
+    missing = np.setdiff1d(np.arange(len(reference)), ri)
+    return TradeMatch(matches=matches, extra=trades.iloc[extra], missing=reference.iloc[missing])
@@ -0,0 +1,170 @@
+"""
+再入场指标（一次排序，供控制台分析与综合报告共用）
+分析脚本与 `generate_final_report.py` 需要同一组统计：间隔分位数、≤15/60/1440 分钟分组计数、
+持仓0根K线数、高频交易日。这里对间隔数组只排序一次：
+
+- 分组计数（≤x、=x、(a, b]）都是有序数组上的 `searchsorted`，每个统计 O(log n)
+- 分位数直接从有序数组按线性插值取值（同 pandas `Series.quantile` 默认口径）
+- 日内统计复用 `engine.violations` 的按天聚合
+
+结果为不可变对象（数组只读），报告模板只从它取值，不再对交易表做逐统计的布尔掩码扫描。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .violations import daily_summary
+
+# 间隔分组边界（分钟）：≤15分钟、15分钟-1小时、1小时-1天、>1天
+BUCKET_EDGES = (15.0, 60.0, 1440.0)
+
+
+@dataclass(frozen=True)
+class IntervalMetrics:
+    """一组再入场间隔（分钟，已去除缺失值）的统计
+
+    Attributes:
+        values: 升序排列的间隔（只读）
+        count / min / max / mean: 基本统计，无间隔时 min/max/mean 为 NaN
+    """
+
+    values: np.ndarray = field(repr=False)
+    count: int
+    min: float
+    max: float
+    mean: float
+
+    def quantile(self, q: float) -> float:
+        """分位数（线性插值）"""
+        n = self.count
+        if n == 0:
+            return float("nan")
+        pos = q * (n - 1)
+        lo = int(np.floor(pos))
+        hi = min(lo + 1, n - 1)
+        return float(self.values[lo] + (self.values[hi] - self.values[lo]) * (pos - lo))
+
+    @property
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+    def count_le(self, minutes: float) -> int:
+        """间隔 <= minutes 的数量（含负间隔，即持仓重叠）"""
+        return int(np.searchsorted(self.values, minutes, side="right"))
+
+    def count_gt(self, minutes: float) -> int:
+        return self.count - self.count_le(minutes)
+
+    def count_eq(self, minutes: float) -> int:
+        return self.count_le(minutes) - int(np.searchsorted(self.values, minutes, side="left"))
+
+    def count_between(self, low: float, high: float) -> int:
+        """间隔在 (low, high] 内的数量"""
+        return self.count_le(high) - self.count_le(low)
+
+    def buckets(self, edges=BUCKET_EDGES) -> np.ndarray:
+        """按边界分组的数量：(-inf, e0], (e0, e1], ..., (e_last, inf)，一次 searchsorted 完成"""
+        cum = np.searchsorted(self.values, np.asarray(edges, dtype=np.float64), side="right")
+        return np.diff(np.r_[0, cum, self.count])
+
+    def share(self, count: int) -> float:
+        """count 占全部间隔的百分比"""
+        return count / self.count * 100 if self.count else float("nan")
+
+
+def interval_metrics(intervals) -> IntervalMetrics:
+    """由间隔序列（可含 NaN）构建 IntervalMetrics"""
+    values = np.asarray(intervals, dtype=np.float64)
+    values = np.sort(values[~np.isnan(values)])
+    values.flags.writeable = False
+    n = len(values)
+    return IntervalMetrics(
+        values=values,
+        count=n,
+        min=float(values[0]) if n else float("nan"),
+        max=float(values[-1]) if n else float("nan"),
+        mean=float(values.mean()) if n else float("nan"),
+    )
+
+
+@dataclass(frozen=True)
+class ReentryMetrics:
+    """交易表的再入场指标
+
+    Attributes:
+        trade_count: 交易数
+        intervals: 再入场间隔统计（ReentryInterval 列）
+        zero_holding: 持仓0根K线的交易（原表的行）
+        daily: 按入场日期汇总的统计（列同 `engine.violations.DAILY_COLUMNS`）
+        high_freq_min_trades: 高频交易日阈值（单日交易数 >= 该值）
+        reference: 参考交易表（TradingView）的指标，只含交易数与间隔统计；未提供时为 None
+    """
+
+    trade_count: int
+    intervals: IntervalMetrics
+    zero_holding: pd.DataFrame = field(repr=False)
+    daily: pd.DataFrame = field(repr=False)
+    high_freq_min_trades: int = 3
+    reference: "ReentryMetrics | None" = None
+
+    @property
+    def zero_holding_count(self) -> int:
+        return len(self.zero_holding)
+
+    @property
+    def same_bar_count(self) -> int:
+        return self.intervals.count_eq(0.0)
+
+    def count_within(self, minutes: float) -> int:
+        """出场后 minutes 分钟内再入场的交易数"""
+        return self.intervals.count_le(minutes)
+
+    def share(self, count: int) -> float:
+        """count 占总交易数的百分比"""
+        return count / self.trade_count * 100 if self.trade_count else float("nan")
+
+    @property
+    def high_freq_days(self) -> pd.DataFrame:
+        """单日交易数达到阈值的日期，按交易数降序"""
+        days = self.daily[self.daily["TradeCount"].to_numpy() >= self.high_freq_min_trades]
+        return days.sort_values("TradeCount", ascending=False, kind="stable")
+
+    @property
+    def max_daily_trades(self) -> int:
+        return int(self.daily["TradeCount"].max()) if len(self.daily) else 0
+
+
+def reentry_metrics(trades: pd.DataFrame,
+                    reference: pd.DataFrame | None = None,
+                    high_freq_min_trades: int = 3) -> ReentryMetrics:
+    """计算交易表（及可选的参考交易表）的再入场指标
+
+    Args:
+        trades: `load_trades()` 返回的交易表（需有 ReentryInterval/HoldingBars/EntryTime/ExitTime/PnL 列）
+        reference: 参考交易表（如 `load_tradingview_trades()` 的结果），只用其 ReentryInterval 与交易数
+        high_freq_min_trades: 高频交易日阈值
+
+    Returns:
+        ReentryMetrics
+    """
+    zero = np.flatnonzero(trades["HoldingBars"].to_numpy() == 0)
+    ref = None
+    if reference is not None:
+        ref = ReentryMetrics(
+            trade_count=len(reference),
+            intervals=interval_metrics(reference["ReentryInterval"]),
+            zero_holding=reference.iloc[:0],
+            daily=daily_summary(reference.iloc[:0], None),
+        )
+    return ReentryMetrics(
+        trade_count=len(trades),
+        intervals=interval_metrics(trades["ReentryInterval"]),
+        zero_holding=trades.iloc[zero],
+        daily=daily_summary(trades, None),
+        high_freq_min_trades=high_freq_min_trades,
+        reference=ref,
+    )
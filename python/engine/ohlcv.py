@@ -0,0 +1,41 @@
+"""
+K线数据（OHLCV）读取
+R 版从 `data/liaochu.RData` 的 `cryptodata` 列表中按数据集名（如 `PEPEUSDT_15m`）取 xts 对象；
+Python 侧读取由它导出的 CSV/Parquet 文件，文件名即数据集名。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+OHLCV_SUFFIXES = (".parquet", ".csv")
+
+
+def read_ohlcv(path: str | Path) -> pd.DataFrame:
+    """读取单个 OHLCV 文件（CSV/Parquet，第一列或索引为K线时间），返回按时间排序的 DataFrame"""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        data = pd.read_parquet(path)
+        if not isinstance(data.index, pd.DatetimeIndex):
+            data = data.set_index(data.columns[0])
+    else:
+        data = pd.read_csv(path, index_col=0)
+    data.index = pd.to_datetime(data.index, format="ISO8601")
+    missing = [c for c in OHLCV_COLUMNS[:4] if c not in data.columns]
+    if missing:
+        raise ValueError(f"{path} 缺少列: {missing}")
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index(kind="stable")
+    return data
+
+
+def find_dataset(data_dir: str | Path, name: str) -> Path | None:
+    """在目录中查找数据集文件 `<name>.parquet` / `<name>.csv`（优先 Parquet）"""
+    for suffix in OHLCV_SUFFIXES:
+        path = Path(data_dir) / f"{name}{suffix}"
+        if path.exists():
+            return path
+    return None
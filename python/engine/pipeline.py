@@ -0,0 +1,327 @@
+"""
+进程内 DAG 分析流水线
+替代 `run_full_analysis.py` 中逐个 `subprocess.run` 的方式：
+
+- 每个阶段声明输入/输出文件，依赖关系由文件自动推导：
+  - 读后写：阶段的输入是另一阶段的输出 → 依赖该阶段
+  - 写后写：两个阶段写同一文件 → 后声明的依赖先声明的（保持原有覆盖顺序）
+- 阶段脚本通过 `runpy` 在当前解释器中执行，不再重复支付解释器/pandas/matplotlib 启动成本
+- 无依赖关系的阶段并发执行：每个阶段一个工作进程，同时最多 max_workers 个，就绪阶段超出时排队等待。
+  Linux 下使用 fork，子进程直接继承父进程预加载的 DataFrame（见 `engine.trades` 的进程内缓存），不重复解析 CSV
+- timeout 从工作进程启动（阶段开始执行）时计时，排队等待的时间不计入；超时的工作进程立即终止
+- `max_workers=1` 时所有阶段串行执行：不限时（timeout=None）时在当前进程内执行；
+  设置了 timeout 时每个阶段在独立的工作进程中依次执行，超时的阶段会被终止而不是一直阻塞
+- 传入 `BuildCache` 时启用增量执行：指纹（输入哈希 + 参数 + 代码版本）未变且输出齐全的
+  阶段直接跳过；任一依赖阶段本次实际执行过时，下游阶段也会重新执行
+- 每个阶段记录墙钟时间、CPU 时间、峰值内存与脚本内的分段（见 `engine.tracing`）；
+  传入 `StageProfiler` 时对选定阶段做采样分析
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import multiprocessing
+import os
+import runpy
+import time
+import traceback
+from multiprocessing.connection import Connection, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Mapping
+
+from .tracing import (
+    SamplingProfiler,
+    StageProfiler,
+    collect_spans,
+    cpu_time,
+    peak_rss_mb,
+    reset_peak_rss,
+    reset_spans,
+)
+
+if TYPE_CHECKING:
+    from .buildcache import BuildCache
+
+
+@dataclass(frozen=True)
+class Stage:
+    """流水线阶段：一个分析脚本及其输入/输出文件"""
+
+    name: str
+    description: str
+    script: str | Path
+    inputs: tuple[str | Path, ...] = ()
+    outputs: tuple[str | Path, ...] = ()
+    params: Mapping[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class StageResult:
+    """阶段执行结果（字段与旧版 results[script] 字典一致）"""
+
+    name: str
+    success: bool
+    stdout: str = ""
+    stderr: str = ""
+    error: str | None = None
+    elapsed: float = 0.0
+    skipped: bool = False
+    started: float = 0.0
+    cpu_time: float = 0.0
+    peak_rss_mb: float = float("nan")
+    pid: int = 0
+    spans: list[dict] = field(default_factory=list)
+    profile: str | None = None
+
+    def to_dict(self) -> dict:
+        result = {"success": self.success, "stdout": self.stdout, "stderr": self.stderr,
+                  "skipped": self.skipped}
+        if self.error is not None:
+            result["error"] = self.error
+        return result
+
+
+def run_stage(stage: Stage, profiler: StageProfiler | None = None) -> StageResult:
+    """在当前进程中执行一个阶段脚本，捕获其标准输出与异常，并记录耗时、CPU、峰值内存与分段"""
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    sampler = SamplingProfiler(profiler.interval) if profiler is not None and profiler.wants(stage) else None
+    reset_spans()
+    reset_peak_rss()
+    started = time.time()
+    cpu_start = cpu_time()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr), \
+                (sampler or contextlib.nullcontext()):
+            runpy.run_path(str(stage.script), run_name="__main__")
+    except SystemExit as e:
+        success = e.code in (None, 0)
+        error = None if success else f"exit code {e.code}"
+    except BaseException:  # noqa: BLE001 - 阶段失败不应中断整个流水线
+        stderr.write(traceback.format_exc())
+        success = False
+        error = "exception"
+    else:
+        success = True
+        error = None
+    elapsed = time.perf_counter() - start
+
+    profile = None
+    if sampler is not None:
+        profile = str(sampler.write(profiler.path(stage)))
+
+    return StageResult(
+        name=stage.name,
+        success=success,
+        stdout=stdout.getvalue(),
+        stderr=stderr.getvalue(),
+        error=error,
+        elapsed=elapsed,
+        started=started,
+        cpu_time=cpu_time() - cpu_start,
+        peak_rss_mb=peak_rss_mb(),
+        pid=os.getpid(),
+        spans=collect_spans(),
+        profile=profile,
+    )
+
+
+def _stage_worker(conn: Connection, stage: Stage, profiler: StageProfiler | None) -> None:
+    # 工作进程入口：执行一个阶段并把结果发回父进程
+    try:
+        conn.send(run_stage(stage, profiler))
+    finally:
+        conn.close()
+
+
+def _mp_context():
+    # fork 让子进程继承父进程已加载的模块与 DataFrame；不支持 fork 的平台使用默认方式
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+class Pipeline:
+    """按依赖关系调度阶段的流水线"""
+
+    def __init__(self,
+                 stages: list[Stage],
+                 max_workers: int | None = None,
+                 timeout: float | None = 300,
+                 preload: Callable[[], None] | None = None,
+                 cache: "BuildCache | None" = None,
+                 force: bool = False,
+                 profiler: StageProfiler | None = None):
+        names = [s.name for s in stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"阶段名称重复: {names}")
+
+        self.stages = list(stages)
+        self.max_workers = max_workers if max_workers is not None else min(len(stages), os.cpu_count() or 1)
+        self.timeout = timeout
+        self.preload = preload
+        self.cache = cache
+        self.force = force
+        self.profiler = profiler
+        self._fingerprints: dict[str, str] = {}
+        self.deps = self._resolve_dependencies()
+
+    def _resolve_dependencies(self) -> dict[str, set[str]]:
+        deps: dict[str, set[str]] = {s.name: set() for s in self.stages}
+        for i, stage in enumerate(self.stages):
+            inputs = {Path(p) for p in stage.inputs}
+            outputs = {Path(p) for p in stage.outputs}
+            for other in self.stages[:i] + self.stages[i + 1:]:
+                other_outputs = {Path(p) for p in other.outputs}
+                if inputs & other_outputs:
+                    deps[stage.name].add(other.name)
+            for earlier in self.stages[:i]:
+                if outputs & {Path(p) for p in earlier.outputs}:
+                    deps[stage.name].add(earlier.name)
+
+        # 检查环
+        visiting: set[str] = set()
+        done: set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"阶段依赖存在环: {name}")
+            visiting.add(name)
+            for dep in deps[name]:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in deps:
+            visit(name)
+        return deps
+
+    def run(self, on_complete: Callable[[Stage, StageResult], None] | None = None) -> dict[str, StageResult]:
+        """执行全部阶段，返回 {阶段名: StageResult}（按声明顺序）
+
+        Args:
+            on_complete: 每个阶段结束（成功/失败/跳过）时的回调，用于即时输出
+        """
+        if self.preload is not None:
+            self.preload()
+
+        if self.max_workers <= 1 and self.timeout is None:
+            results = self._run_serial(on_complete)
+        else:
+            # 串行但限时：当前进程内无法中断卡住的阶段，改为每个阶段在独立的工作进程中执行
+            results = self._run_parallel(on_complete)
+        return {s.name: results[s.name] for s in self.stages}
+
+    def _prepare(self, stage: Stage, results: dict[str, StageResult]) -> StageResult | None:
+        """依赖失败或缓存命中时返回结果（不执行），否则返回 None 表示需要执行"""
+        deps = self.deps[stage.name]
+        failed = [d for d in deps if not results[d].success]
+        if failed:
+            return StageResult(name=stage.name, success=False,
+                               error=f"dependency failed: {', '.join(sorted(failed))}")
+
+        if self.cache is None:
+            return None
+        fingerprint = self.cache.fingerprint(stage)
+        self._fingerprints[stage.name] = fingerprint
+        upstream_ran = any(not results[d].skipped for d in deps)
+        if not self.force and not upstream_ran and self.cache.is_fresh(stage, fingerprint):
+            return StageResult(name=stage.name, success=True, skipped=True)
+        return None
+
+    def _finish(self, stage: Stage, result: StageResult, results: dict[str, StageResult], on_complete) -> None:
+        results[stage.name] = result
+        if self.cache is not None and not result.skipped:
+            if result.success and stage.name in self._fingerprints:
+                self.cache.record(stage, self._fingerprints[stage.name])
+            else:
+                self.cache.invalidate(stage)
+            self.cache.save()
+        if on_complete is not None:
+            on_complete(stage, result)
+
+    def _run_serial(self, on_complete) -> dict[str, StageResult]:
+        results: dict[str, StageResult] = {}
+        pending = list(self.stages)
+        while pending:
+            stage = next(s for s in pending if self.deps[s.name] <= results.keys())
+            pending.remove(stage)
+            result = self._prepare(stage, results) or run_stage(stage, self.profiler)
+            self._finish(stage, result, results, on_complete)
+        return results
+
+    def _run_parallel(self, on_complete) -> dict[str, StageResult]:
+        results: dict[str, StageResult] = {}
+        pending = list(self.stages)
+        # {结果管道: (阶段, 工作进程, 开始时间)}
+        running: dict[Connection, tuple[Stage, multiprocessing.process.BaseProcess, float]] = {}
+        workers = max(1, self.max_workers)
+        context = _mp_context()
+
+        def finish(stage: Stage, result: StageResult) -> None:
+            self._finish(stage, result, results, on_complete)
+
+        def stop(conn: Connection, process) -> None:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+            conn.close()
+
+        try:
+            while pending or running:
+                for stage in [s for s in pending if self.deps[s.name] <= results.keys()]:
+                    prepared = self._prepare(stage, results)
+                    if prepared is not None:
+                        pending.remove(stage)
+                        finish(stage, prepared)
+                        continue
+                    if len(running) >= workers:
+                        # 没有空闲的工作进程：留在队列中，超时从真正开始执行时计算
+                        continue
+                    pending.remove(stage)
+                    reader, writer = context.Pipe(duplex=False)
+                    process = context.Process(target=_stage_worker, args=(writer, stage, self.profiler),
+                                              name=f"stage-{stage.name}")
+                    process.start()
+                    writer.close()
+                    running[reader] = (stage, process, time.monotonic())
+
+                if not running:
+                    continue
+
+                wait_for = None
+                if self.timeout is not None:
+                    oldest = min(started for _, _, started in running.values())
+                    wait_for = max(0.0, oldest + self.timeout - time.monotonic())
+
+                for conn in wait(list(running), timeout=wait_for):
+                    stage, process, _ = running.pop(conn)
+                    try:
+                        result = conn.recv()
+                    except (EOFError, OSError):
+                        # 子进程未发回结果即退出（崩溃、被信号终止等）
+                        process.join()
+                        result = StageResult(name=stage.name, success=False,
+                                             error=f"worker exited with code {process.exitcode}")
+                    stop(conn, process)
+                    finish(stage, result)
+
+                if self.timeout is not None:
+                    now = time.monotonic()
+                    for conn, (stage, process, started) in list(running.items()):
+                        if now - started >= self.timeout:
+                            running.pop(conn)
+                            stop(conn, process)
+                            finish(stage, StageResult(name=stage.name, success=False, error="timeout",
+                                                      elapsed=now - started, started=time.time() - (now - started),
+                                                      pid=process.pid or 0))
+        finally:
+            for conn, (_, process, _) in running.items():
+                stop(conn, process)
+
+        return results
@@ -0,0 +1,154 @@
+"""
+图表绘制辅助
+大量交易时避免"一笔交易一个 artist"：持仓区间用一个 LineCollection，
+入场/出场点各用一次 scatter，快速重入场标记线也合并为一个 LineCollection。
+点数超过阈值时自动栅格化这些密集图层，保存为矢量格式时文件大小与内存保持有界。
+
+多张图互不依赖时用 `render_figures` 并行渲染：每张图在独立进程中以 Agg 后端绘制，
+预先计算好的数组通过共享内存传入，子进程不重新加载数据。
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Mapping
+
+import matplotlib.dates as mdates
+import numpy as np
+from matplotlib.collections import LineCollection
+
+from .sharedmem import SharedArrays, SharedArraysSpec, attach
+
+# 输出分辨率：可通过环境变量 ANALYSIS_FIGURE_DPI 覆盖（run_full_analysis.py --dpi 会设置它）
+DEFAULT_DPI = 300
+DPI_ENV = "ANALYSIS_FIGURE_DPI"
+
+# 单个图层的点数超过该值时栅格化
+RASTERIZE_THRESHOLD = 5000
+
+# 快速重入场标记线的最多条数：更密时相邻的线在像素上本就重叠，合并到等间距的档位上绘制
+MAX_HIGHLIGHT_LINES = 2000
+
+
+def figure_dpi(default: int = DEFAULT_DPI) -> int:
+    """读取图表输出 DPI 设置"""
+    value = os.environ.get(DPI_ENV)
+    if not value:
+        return default
+    try:
+        dpi = int(value)
+    except ValueError:
+        raise ValueError(f"{DPI_ENV} 必须是正整数，当前为: {value!r}") from None
+    if dpi <= 0:
+        raise ValueError(f"{DPI_ENV} 必须是正整数，当前为: {value!r}")
+    return dpi
+
+
+def draw_trade_timeline(ax,
+                        entry_times: np.ndarray,
+                        exit_times: np.ndarray,
+                        pnl: np.ndarray,
+                        highlight_rows: np.ndarray | None = None,
+                        rasterize_threshold: int = RASTERIZE_THRESHOLD) -> None:
+    """绘制交易持仓时间线（y 轴为交易序号）
+
+    Args:
+        ax: matplotlib Axes
+        entry_times: 入场时间（datetime64）
+        exit_times: 出场时间（datetime64）
+        pnl: 盈亏百分比，>0 绘制为绿色，否则红色
+        highlight_rows: 需要用橙色虚线横贯标记的交易序号（如快速重入场）
+        rasterize_threshold: 交易数超过该值时栅格化密集图层
+    """
+    entry_times = np.asarray(entry_times, dtype="datetime64[ns]")
+    exit_times = np.asarray(exit_times, dtype="datetime64[ns]")
+    n = len(entry_times)
+    rows = np.arange(n, dtype=np.float64)
+    rasterized = n > rasterize_threshold
+
+    # 持仓区间：每笔交易一条线段 [(入场, i), (出场, i)]
+    x0 = mdates.date2num(entry_times)
+    x1 = mdates.date2num(exit_times)
+    segments = np.stack([np.column_stack([x0, rows]), np.column_stack([x1, rows])], axis=1)
+    colors = np.where(np.asarray(pnl) > 0, "#2ca02c", "#d62728")
+    spans = LineCollection(segments, colors=colors, linewidths=2, alpha=0.6, rasterized=rasterized)
+    ax.add_collection(spans)
+
+    # 入场/出场点（传入 datetime64 以启用日期坐标轴）
+    ax.scatter(entry_times, rows, c="green", s=30, marker="o", zorder=5, rasterized=rasterized)
+    ax.scatter(exit_times, rows, c="red", s=30, marker="s", zorder=5, rasterized=rasterized)
+
+    if highlight_rows is not None and len(highlight_rows) > 0:
+        # x 使用坐标轴比例(0~1)、y 使用数据坐标，与 axhline 一致横贯整个子图
+        y = np.asarray(highlight_rows, dtype=np.float64)
+        if len(y) > MAX_HIGHLIGHT_LINES:
+            step = n / MAX_HIGHLIGHT_LINES
+            y = np.unique(np.round(y / step)) * step
+        marks = np.stack([np.column_stack([np.zeros_like(y), y]), np.column_stack([np.ones_like(y), y])], axis=1)
+        ax.add_collection(LineCollection(marks, colors="orange", linestyles="--", alpha=0.3, linewidths=1,
+                                         transform=ax.get_yaxis_transform(),
+                                         rasterized=len(y) > rasterize_threshold))
+
+    ax.autoscale_view()
+
+
+# 图表渲染任务：接收 {数组名: 数组}，绘制并保存一张图，返回可 pickle 的结果（如输出文件名）
+FigureTask = Callable[[Mapping[str, np.ndarray]], Any]
+
+# 工作进程中的任务表与共享数组（fork 时由父进程继承任务表，数组在初始化时挂载）
+_TASKS: dict[str, FigureTask] = {}
+_WORKER_ARRAYS: dict[str, np.ndarray] = {}
+_WORKER_SHM = None
+
+
+def _use_agg() -> None:
+    import matplotlib.pyplot as plt
+    plt.switch_backend("Agg")
+
+
+def _init_figure_worker(spec: SharedArraysSpec) -> None:
+    global _WORKER_SHM
+    _use_agg()
+    _WORKER_SHM, arrays = attach(spec)
+    _WORKER_ARRAYS.update(arrays)
+
+
+def _run_figure_task(name: str) -> Any:
+    return _TASKS[name](_WORKER_ARRAYS)
+
+
+def render_figures(tasks: Mapping[str, FigureTask],
+                   arrays: Mapping[str, np.ndarray],
+                   max_workers: int | None = None) -> dict[str, Any]:
+    """并行渲染多张互不依赖的图
+
+    Args:
+        tasks: {任务名: 渲染函数}，渲染函数签名为 fn(arrays) -> 结果
+        arrays: 各任务共享的输入数组，放入共享内存后传给工作进程
+        max_workers: 进程数（默认 min(任务数, CPU核数)；1 表示在当前进程串行渲染）
+
+    Returns:
+        {任务名: 渲染函数返回值}，按 tasks 的顺序
+    """
+    if max_workers is None:
+        max_workers = min(len(tasks), os.cpu_count() or 1)
+
+    # 任务函数通常定义在脚本中，只能通过 fork 继承给子进程；不支持 fork 的平台串行渲染
+    if max_workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        _use_agg()
+        return {name: task(arrays) for name, task in tasks.items()}
+
+    _TASKS.clear()
+    _TASKS.update(tasks)
+    try:
+        with SharedArrays(arrays) as shared, \
+                ProcessPoolExecutor(max_workers=max_workers,
+                                    mp_context=multiprocessing.get_context("fork"),
+                                    initializer=_init_figure_worker,
+                                    initargs=(shared.spec,)) as executor:
+            futures = {name: executor.submit(_run_figure_task, name) for name in tasks}
+            return {name: future.result() for name, future in futures.items()}
+    finally:
+        _TASKS.clear()
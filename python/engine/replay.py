@@ -0,0 +1,228 @@
+"""
+本地行情回放（asyncio）
+把存储中的K线按时间顺序回放给多个订阅者，用于离线测量实时信号判定的延迟与吞吐，无需连接交易所：
+
+- 多个数据集按K线时间归并；同一时间戳的K线作为一批发出（同交易所在收盘时刻推送多个币种）
+- `speedup`：回放倍速（K线时间间隔 / speedup 为实际等待时间）；0 表示不等待、尽可能快
+- 订阅方式：进程内 `asyncio.Queue`（`subscribe`），或本地 TCP（`serve_tcp`，每行一根K线的 JSON）
+- 每根K线带发出时刻 `emitted_ns`（`time.perf_counter_ns`），`LatencyRecorder` 在作出信号判定后记录端到端延迟
+
+订阅队列有上限，消费者处理不过来时回放会等待（背压），延迟中因此包含排队时间。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Callable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .streaming import DropSignalStream
+
+QUEUE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class Bar:
+    """一根回放K线
+
+    Attributes:
+        dataset: 数据集名（SYMBOL_TF）
+        time: K线时间（UTC 纳秒）
+        emitted_ns: 回放端发出时刻（perf_counter_ns）
+    """
+
+    dataset: str
+    time: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    emitted_ns: int = 0
+
+
+def _times(data) -> np.ndarray:
+    # StoredSeries 直接取时间列，DataFrame 取索引
+    if hasattr(data, "times"):
+        return np.asarray(data.times, dtype=np.int64)
+    return pd.DatetimeIndex(data.index).as_unit("ns").asi8
+
+
+class ReplayServer:
+    """多数据集K线回放
+
+    Args:
+        series: {数据集名: StoredSeries 或 OHLC DataFrame}
+        speedup: 回放倍速；0 表示不按K线间隔等待
+        queue_size: 每个进程内订阅队列的容量
+    """
+
+    def __init__(self, series: Mapping[str, Mapping[str, np.ndarray]], speedup: float = 0.0,
+                 queue_size: int = QUEUE_SIZE):
+        if speedup < 0:
+            raise ValueError("speedup 必须 >= 0")
+        self.speedup = float(speedup)
+        self.queue_size = queue_size
+        self.names = list(series)
+        self._columns = []
+        times = []
+        for name in self.names:
+            data = series[name]
+            times.append(_times(data))
+            volume = data["Volume"] if "Volume" in data else np.zeros(len(times[-1]))
+            self._columns.append([np.asarray(data[col], dtype=np.float64).tolist()
+                                  for col in ("Open", "High", "Low", "Close")]
+                                 + [np.asarray(volume, dtype=np.float64).tolist()])
+        # 按时间归并：稳定排序保证同一时间戳内按数据集顺序
+        all_times = np.concatenate(times) if times else np.zeros(0, dtype=np.int64)
+        owners = np.concatenate([np.full(len(t), k) for k, t in enumerate(times)]) if times else all_times
+        rows = np.concatenate([np.arange(len(t)) for t in times]) if times else all_times
+        order = np.argsort(all_times, kind="stable")
+        self._times = all_times[order]
+        self._owners = owners[order]
+        self._rows = rows[order]
+        self._queues: list[asyncio.Queue] = []
+        self._writers: list[asyncio.StreamWriter] = []
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def subscribe(self) -> asyncio.Queue:
+        """进程内订阅：返回的队列依次收到 Bar，回放结束时收到 None"""
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._queues.append(queue)
+        return queue
+
+    async def serve_tcp(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.base_events.Server:
+        """启动本地 TCP 服务：连接上的客户端收到每行一根K线的 JSON，回放结束时收到 `{"end": true}`"""
+
+        async def accept(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            self._writers.append(writer)
+
+        return await asyncio.start_server(accept, host, port)
+
+    async def wait_for_clients(self, count: int, timeout: float = 10.0) -> None:
+        """等待至少 count 个 TCP 客户端连接"""
+        deadline = time.monotonic() + timeout
+        while len(self._writers) < count:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{timeout}秒内只有 {len(self._writers)} 个客户端连接")
+            await asyncio.sleep(0.001)
+
+    async def _emit(self, bar: Bar) -> None:
+        for queue in self._queues:
+            await queue.put(bar)
+        if self._writers:
+            line = (json.dumps(asdict(bar)) + "\n").encode()
+            for writer in self._writers:
+                writer.write(line)
+
+    async def run(self) -> int:
+        """回放全部K线，返回发出的K线数"""
+        n = len(self._times)
+        t0 = int(self._times[0]) if n else 0
+        wall0 = time.perf_counter()
+        i = 0
+        while i < n:
+            stamp = int(self._times[i])
+            if self.speedup:
+                delay = (stamp - t0) / 1e9 / self.speedup - (time.perf_counter() - wall0)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            while i < n and self._times[i] == stamp:
+                k, row = int(self._owners[i]), int(self._rows[i])
+                o, h, lo, c, v = (column[row] for column in self._columns[k])
+                await self._emit(Bar(self.names[k], stamp, o, h, lo, c, v, time.perf_counter_ns()))
+                i += 1
+            for writer in self._writers:
+                await writer.drain()
+            # 让出事件循环，订阅者在下一批K线之前处理本批
+            await asyncio.sleep(0)
+
+        for queue in self._queues:
+            await queue.put(None)
+        for writer in self._writers:
+            writer.write(b'{"end": true}\n')
+            await writer.drain()
+            writer.close()
+        return n
+
+
+async def queue_bars(queue: asyncio.Queue) -> AsyncIterator[Bar]:
+    """把订阅队列转为异步迭代器（收到 None 时结束）"""
+    while True:
+        bar = await queue.get()
+        if bar is None:
+            return
+        yield bar
+
+
+async def tcp_bars(host: str, port: int) -> AsyncIterator[Bar]:
+    """连接回放服务并逐行解析K线"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            fields = json.loads(line)
+            if fields.get("end"):
+                return
+            yield Bar(**fields)
+    finally:
+        writer.close()
+
+
+class LatencyRecorder:
+    """记录从K线发出到信号判定完成的延迟"""
+
+    def __init__(self):
+        self._latencies: list[int] = []
+        self.signals = 0
+        self._first_ns = 0
+        self._last_ns = 0
+
+    def record(self, bar: Bar, signal: bool) -> None:
+        now = time.perf_counter_ns()
+        if not self._latencies:
+            self._first_ns = bar.emitted_ns
+        self._last_ns = now
+        self._latencies.append(now - bar.emitted_ns)
+        self.signals += bool(signal)
+
+    def summary(self) -> dict:
+        """延迟分位数（微秒）与吞吐（根/秒）"""
+        latencies = np.asarray(self._latencies, dtype=np.float64) / 1e3
+        if not len(latencies):
+            return {"bars": 0, "signals": 0}
+        elapsed = (self._last_ns - self._first_ns) / 1e9
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        return {
+            "bars": len(latencies),
+            "signals": self.signals,
+            "p50_us": float(p50),
+            "p90_us": float(p90),
+            "p99_us": float(p99),
+            "max_us": float(latencies.max()),
+            "mean_us": float(latencies.mean()),
+            "elapsed_secs": elapsed,
+            "bars_per_sec": len(latencies) / elapsed if elapsed > 0 else float("inf"),
+        }
+
+
+async def evaluate_bars(bars: AsyncIterator[Bar], streams: Mapping[str, DropSignalStream],
+                        recorder: LatencyRecorder, on_signal: Callable[[Bar], None] | None = None) -> None:
+    """逐根K线送入对应数据集的 DropSignalStream，并记录判定延迟（未配置的数据集跳过）"""
+    async for bar in bars:
+        stream = streams.get(bar.dataset)
+        if stream is None:
+            continue
+        signal = stream.update(bar.high, bar.low, bar.close)
+        recorder.record(bar, signal)
+        if signal and on_signal is not None:
+            on_signal(bar)
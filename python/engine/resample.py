@@ -0,0 +1,146 @@
+"""
+K线周期重采样
+由一个基础周期（默认 5m）一次向量化地合成任意更高周期，代替逐周期单独存放的数据集：
+
+- 聚合：Open 取首根、High 取最大、Low 取最小、Close 取末根、Volume 求和（High/Low/Volume 忽略 NaN）
+- 分桶：按 UTC epoch 对齐（同交易所K线），每根基础K线按开盘时间归入所在的桶
+- 时间戳：沿用基础序列的约定。cryptodata 的时间为收盘时间（如 `12:04:59.999`），
+  合成K线同样标在桶的收盘时间（`12:59:59.999`）；开盘时间标注的序列则标在桶的开始
+- 末尾未走完的桶默认保留（与 cryptodata 中各周期数据集一致：1h 的最后一根包含尚未收盘的部分）
+
+合成结果写入列式存储的 `derived/` 子目录作为缓存，索引中记录基础数据集列文件的指纹，
+基础序列重写后自动失效并重新合成。
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+from .store import TIME_COLUMN, OHLCVStore, StoredSeries
+
+BASE_TIMEFRAME = "5m"
+DERIVED_DIR = "derived"
+
+_UNIT_NS = {"m": 60 * 10**9, "h": 3600 * 10**9, "d": 86400 * 10**9}
+_MS = 10**6
+
+# 各列的聚合方式（reduceat 归约）
+_FIRST, _LAST = "first", "last"
+AGGREGATIONS = {"Open": _FIRST, "High": np.fmax, "Low": np.fmin, "Close": _LAST, "Volume": np.add}
+
+
+def parse_timeframe(timeframe: str) -> int:
+    """周期字符串（`5m` / `1h` / `1d`）转为纳秒"""
+    match = re.fullmatch(r"(\d+)([mhd])", timeframe)
+    if match is None or int(match.group(1)) <= 0:
+        raise ValueError(f"无法解析的时间框架: {timeframe}")
+    return int(match.group(1)) * _UNIT_NS[match.group(2)]
+
+
+def bar_label(times: np.ndarray, base_ns: int) -> str:
+    """判断时间戳约定：收盘时间（`...:04:59.999`）返回 "close"，开盘时间返回 "open" """
+    times = np.asarray(times, dtype=np.int64)
+    if np.all((times + _MS) % base_ns == 0):
+        return "close"
+    if np.all(times % base_ns == 0):
+        return "open"
+    raise ValueError("时间戳既不是K线开盘时间也不是收盘时间（可能与基础周期不符）")
+
+
+def resample_bars(times: np.ndarray, columns: Mapping[str, np.ndarray], timeframe: str,
+                  base_timeframe: str = BASE_TIMEFRAME, label: str | None = None,
+                  drop_partial: bool = False) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """把基础周期K线合成为更高周期
+
+    Args:
+        times: 基础K线时间（int64 UTC 纳秒，严格递增）
+        columns: {列名: 数值数组}；Open/High/Low/Close/Volume 之外的列取末根
+        timeframe: 目标周期，须为基础周期的整数倍
+        label: 时间戳约定 "close" / "open"（默认由 bar_label 推断）
+        drop_partial: 是否丢弃末尾未走完的桶
+
+    Returns:
+        (合成K线时间, {列名: 合成后的数组})
+    """
+    base_ns = parse_timeframe(base_timeframe)
+    target_ns = parse_timeframe(timeframe)
+    if target_ns % base_ns:
+        raise ValueError(f"{timeframe} 不是 {base_timeframe} 的整数倍")
+    times = np.asarray(times, dtype=np.int64)
+    if len(times) == 0:
+        return times.copy(), {name: np.asarray(values, dtype=np.float64)[:0] for name, values in columns.items()}
+    if label is None:
+        label = bar_label(times, base_ns)
+
+    opens = times - (base_ns - _MS) if label == "close" else times
+    buckets = opens // target_ns
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(times)] - 1
+    if drop_partial and opens[-1] + base_ns < (buckets[-1] + 1) * target_ns:
+        starts, ends = starts[:-1], ends[:-1]
+
+    out = {}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)
+        how = AGGREGATIONS.get(name, _LAST)
+        if how == _FIRST:
+            out[name] = values[starts]
+        elif how == _LAST:
+            out[name] = values[ends]
+        else:
+            # 全为 NaN 的桶：fmax/fmin 保持 NaN，与 pandas 的 max/min 一致
+            out[name] = how.reduceat(np.nan_to_num(values, nan=0.0) if how is np.add else values, starts)
+    bucket_start = buckets[starts] * target_ns
+    out_times = bucket_start + target_ns - _MS if label == "close" else bucket_start
+    return out_times, out
+
+
+def resample_ohlcv(data: pd.DataFrame, timeframe: str, base_timeframe: str = BASE_TIMEFRAME,
+                   drop_partial: bool = False) -> pd.DataFrame:
+    """DataFrame 版 resample_bars（索引为K线时间）"""
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    times, columns = resample_bars(index.as_unit("ns").asi8, {c: data[c].to_numpy() for c in data.columns},
+                                   timeframe, base_timeframe, drop_partial=drop_partial)
+    result = pd.DataFrame(columns, index=pd.DatetimeIndex(times.view("datetime64[ns]"), name=data.index.name))
+    if data.index.tz is not None:
+        result.index = result.index.tz_localize("UTC").tz_convert(data.index.tz)
+    return result
+
+
+def _base_fingerprint(store: OHLCVStore, name: str) -> dict:
+    # 列文件在重写时整体替换，大小+修改时间足以识别基础序列的变化
+    directory = store.root / name
+    files = {}
+    for column in (TIME_COLUMN, *store.entry(name)["columns"]):
+        stat = (directory / f"{column}.npy").stat()
+        files[column] = [stat.st_size, stat.st_mtime_ns]
+    return {"base": name, "files": files}
+
+
+def open_timeframe(store: OHLCVStore, symbol: str, timeframe: str, base_timeframe: str = BASE_TIMEFRAME,
+                   cache: OHLCVStore | None = None) -> StoredSeries:
+    """从列式存储取 `<symbol>_<timeframe>`：等于基础周期时直接映射，否则由基础周期合成（带磁盘缓存）
+
+    Args:
+        store: 基础数据所在的存储
+        cache: 合成K线的缓存存储（默认 `<store>/derived`）
+    """
+    base_name = f"{symbol}_{base_timeframe}"
+    if timeframe == base_timeframe:
+        return store.open(base_name)
+    cache = cache if cache is not None else OHLCVStore(Path(store.root) / DERIVED_DIR)
+    name = f"{symbol}_{timeframe}"
+    source = _base_fingerprint(store, base_name)
+    if name not in cache or cache.entry(name)["source"] != source:
+        base = store.open(base_name)
+        times, columns = resample_bars(base.times, base.columns, timeframe, base_timeframe)
+        cache.write(name, times, {c: columns[c] for c in base.columns if c in columns}, source=source)
+    return cache.open(name)
+
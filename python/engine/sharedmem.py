@@ -0,0 +1,82 @@
+"""
+进程间共享 numpy 数组
+把一组数组打包进同一块 `multiprocessing.shared_memory`，子进程按名称挂载为只读视图，
+不需要 pickle 复制大数组，也不需要在每个子进程中重新解析 CSV。
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Mapping
+
+import numpy as np
+
+# 每个数组的起始偏移按 64 字节对齐
+_ALIGN = 64
+
+
+@dataclass(frozen=True)
+class SharedArraysSpec:
+    """共享内存块的描述（可 pickle，传给子进程用于挂载）
+
+    Attributes:
+        shm_name: 共享内存块名称
+        layout: {数组名: (字节偏移, dtype 字符串, 形状)}
+    """
+
+    shm_name: str
+    layout: dict[str, tuple[int, str, tuple[int, ...]]]
+
+
+class SharedArrays:
+    """创建方持有的共享数组块；作为上下文管理器使用，退出时释放共享内存"""
+
+    def __init__(self, arrays: Mapping[str, np.ndarray]):
+        arrays = {name: np.ascontiguousarray(arr) for name, arr in arrays.items()}
+        layout: dict[str, tuple[int, str, tuple[int, ...]]] = {}
+        offset = 0
+        for name, arr in arrays.items():
+            if arr.dtype.hasobject:
+                raise ValueError(f"数组 {name} 为 object 类型，无法放入共享内存")
+            offset = -(-offset // _ALIGN) * _ALIGN
+            layout[name] = (offset, arr.dtype.str, arr.shape)
+            offset += arr.nbytes
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, arr in arrays.items():
+            start, dtype, shape = layout[name]
+            view = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=start)
+            view[...] = arr
+            del view
+        self.spec = SharedArraysSpec(self._shm.name, layout)
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach(spec: SharedArraysSpec) -> tuple[shared_memory.SharedMemory, dict[str, np.ndarray]]:
+    """在子进程中挂载共享数组
+
+    Returns:
+        (共享内存句柄, {数组名: 只读视图})；视图引用句柄的缓冲区，句柄需与视图同生命周期
+    """
+    if sys.version_info >= (3, 13):
+        # 挂载方不登记到 resource_tracker，共享内存只由创建方释放
+        shm = shared_memory.SharedMemory(name=spec.shm_name, track=False)
+    else:
+        shm = shared_memory.SharedMemory(name=spec.shm_name)
+    arrays = {}
+    for name, (start, dtype, shape) in spec.layout.items():
+        view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+        view.flags.writeable = False
+        arrays[name] = view
+    return shm, arrays
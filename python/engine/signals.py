@@ -0,0 +1,243 @@
+"""
+暴跌信号生成（NumPy 版）
+与 `r/engine/backtest_tradingview_aligned.R::generate_drop_signals` 逐K线一致：
+
+- 窗口最高价：`roll_max(High, lookbackBars, align="right")`；`include_current_bar=False` 时整体后移一根
+  （对齐 Pine 的 `ta.highest(high, lookbackBars)[1]`）
+- absolute 模式：`(窗口最高价 - Low) / 窗口最高价 * 100 >= min_drop_percent`
+- atr 模式：`(窗口最高价 - Low) / ATR >= min_drop_percent`，ATR 为 Wilder 平滑的真实波幅
+
+滚动最大值用分块前缀/后缀最大值（van Herk/Gil-Werman）一次向量化完成，复杂度 O(n)，与窗口长度无关；
+Wilder ATR 的递推按块展开为闭式累加，86 万根K线的单个序列在百毫秒量级内完成。
+
+lookback 扫描（参数网格、Walk-Forward）用 `WindowMaxIndex`：每个序列只建一份 2 的幂次窗口最大值表，
+任意窗口长度的滚动最大值由两段重叠的 2^k 窗口合成（一次 np.maximum），不再为每个 lookback 重新分块计算；
+`window_max_index(high, key=...)` 按 (交易对, 周期) 在进程内缓存，训练窗口用 `.rows(start, stop)` 取切片视图。
+缺失值（NaN）的传播方式与 R 中 NA 一致：窗口内有 NaN 时窗口最高价为 NaN，对应K线无信号。
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Hashable, Mapping
+
+import numpy as np
+
+SIGNAL_MODES = ("absolute", "atr")
+
+# Wilder 递推按块展开时，块内最小衰减系数 a^K 的下限（避免 a^-K 溢出）
+_MIN_BLOCK_DECAY = 1e-100
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """右对齐滚动最大值，前 window-1 个位置为 NaN（同 `RcppRoll::roll_max(fill = NA)`）"""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if window < 1:
+        raise ValueError(f"window 必须 >= 1，当前为 {window}")
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+    if window == 1:
+        out[:] = values
+        return out
+
+    # 按 window 分块：块内前缀最大值 + 块内后缀最大值，
+    # 任意长度为 window 的窗口 [i-window+1, i] 恰好跨越至多两个相邻块
+    blocks = -(-n // window)
+    padded = np.full(blocks * window, -np.inf)
+    padded[:n] = values
+    padded = padded.reshape(blocks, window)
+    prefix = np.maximum.accumulate(padded, axis=1).ravel()[:n]
+    suffix = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()[:n]
+    out[window - 1:] = np.maximum(suffix[:n - window + 1], prefix[window - 1:])
+    return out
+
+
+class WindowMaxIndex:
+    """任意窗口长度的右对齐滚动最大值（2 的幂次窗口最大值表，按需逐层构建）
+
+    第 k 层第 i 项为 values[i : i + 2^k] 的最大值；窗口 w 的滚动最大值取 k = floor(log2(w))，
+    由 [i-w+1, i-w+2^k] 与 [i-2^k+1, i] 两段合成，结果与 `rolling_max` 逐项相同（含 NaN 传播）。
+    lookback 最大为 L 时只需 log2(L) 层，内存约为序列长度的 log2(L) 倍。
+
+    Args:
+        values: 一维序列（一般为 High）
+    """
+
+    def __init__(self, values, _levels: list[np.ndarray] | None = None, _start: int = 0, _stop: int | None = None):
+        self._levels = _levels if _levels is not None else [np.ascontiguousarray(values, dtype=np.float64)]
+        self.start = _start
+        self.stop = len(self._levels[0]) if _stop is None else _stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def rows(self, start: int, stop: int) -> WindowMaxIndex:
+        """行号区间 [start, stop) 的视图（共享已构建的层，结果等同于在切片上计算）"""
+        if not 0 <= start <= stop <= len(self):
+            raise ValueError(f"行号区间 [{start}, {stop}) 超出范围 [0, {len(self)})")
+        return WindowMaxIndex(None, self._levels, self.start + start, self.start + stop)
+
+    def _level(self, k: int) -> np.ndarray:
+        levels = self._levels
+        while len(levels) <= k:
+            prev = levels[-1]
+            half = 1 << (len(levels) - 1)
+            levels.append(np.maximum(prev[:-half], prev[half:]))
+        return levels[k]
+
+    def rolling_max(self, window: int, include_current_bar: bool = True) -> np.ndarray:
+        """窗口为 window 的右对齐滚动最大值；include_current_bar=False 时整体后移一根（同 drop_series）"""
+        window = int(window)
+        if window < 1:
+            raise ValueError(f"window 必须 >= 1，当前为 {window}")
+        lag = 0 if include_current_bar else 1
+        n = len(self)
+        out = np.full(n, np.nan)
+        first = window - 1 + lag
+        if n <= first:
+            return out
+
+        k = window.bit_length() - 1
+        table = self._level(k)
+        # 第 i 行（视图内 first..n-1）的窗口右端为绝对位置 start + i - lag
+        end_lo = self.start + first - lag
+        end_hi = self.stop - lag
+        span = 1 << k
+        out[first:] = np.maximum(table[end_lo - window + 1:end_hi - window + 1],
+                                 table[end_lo - span + 1:end_hi - span + 1])
+        return out
+
+
+# 进程内缓存：{key: WindowMaxIndex}，同一 (交易对, 周期) 的所有 lookback / 训练窗口共用一份
+_WINDOW_INDEXES: dict[Hashable, WindowMaxIndex] = {}
+
+
+def window_max_index(values, key: Hashable | None = None) -> WindowMaxIndex:
+    """序列的 WindowMaxIndex；给定 key（如 ("PEPEUSDT", "15m") 或数据集名）时在进程内缓存
+
+    缓存按 key 与序列长度校验，长度不同（数据集更新）时重建。
+    """
+    if key is None:
+        return WindowMaxIndex(values)
+    index = _WINDOW_INDEXES.get(key)
+    if index is None or index.stop != len(values):
+        index = _WINDOW_INDEXES[key] = WindowMaxIndex(values)
+    return index
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """真实波幅（同 R `calc_true_range`：首根K线的前收盘取自身收盘价，忽略缺失项）"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    if not len(high) == len(low) == len(close):
+        raise ValueError("high/low/close 长度不一致")
+    prev_close = np.concatenate([close[:1], close[:-1]])
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+def atr_wilder(tr: np.ndarray, atr_length: int = 14) -> np.ndarray:
+    """Wilder ATR（同 R `calc_atr_wilder`）
+
+    atr[L-1] = mean(tr[0:L])，之后 atr[i] = (atr[i-1] * (L-1) + tr[i]) / L，之前为 NaN。
+    递推 atr[i] = a*atr[i-1] + b*tr[i] 在长度 K 的块内展开为
+    atr[s+k] = a^(k+1) * (atr[s-1] + b * Σ_{j<=k} a^-(j+1) * tr[s+j])，用 cumsum 向量化计算。
+    """
+    tr = np.asarray(tr, dtype=np.float64)
+    atr_length = int(atr_length)
+    if atr_length < 1:
+        raise ValueError("atr_length 必须 >= 1")
+
+    n = len(tr)
+    atr = np.full(n, np.nan)
+    if n < atr_length:
+        return atr
+
+    head = tr[:atr_length]
+    head = head[~np.isnan(head)]
+    atr[atr_length - 1] = head.mean() if len(head) else np.nan
+    if atr_length == 1:
+        atr[1:] = tr[1:]
+        return atr
+
+    a = (atr_length - 1) / atr_length
+    b = 1.0 / atr_length
+    block = max(1, int(math.log(_MIN_BLOCK_DECAY) / math.log(a)))
+    powers = a ** np.arange(1, block + 1)
+
+    state = atr[atr_length - 1]
+    for start in range(atr_length, n, block):
+        chunk = tr[start:start + block]
+        decay = powers[:len(chunk)]
+        values = decay * (state + b * np.cumsum(chunk / decay))
+        atr[start:start + len(chunk)] = values
+        state = values[-1]
+    return atr
+
+
+def drop_series(data: Mapping[str, np.ndarray],
+                lookback_bars: int,
+                include_current_bar: bool = True,
+                signal_mode: str = "absolute",
+                atr_length: int = 14,
+                window_index: WindowMaxIndex | None = None,
+                atr: np.ndarray | None = None) -> np.ndarray:
+    """信号判定所用的跌幅序列：absolute 模式为跌幅百分比，atr 模式为 ATR 倍数
+
+    只依赖 lookback（与 atr 参数），`drop_series(...) >= min_drop_percent` 即为对应阈值的信号，
+    参数网格中同一 lookback 的所有阈值可以共用一条序列。无法产生信号的K线为 NaN。
+    扫描多个 lookback 时传入 High 的 `window_index` 与预先算好的 `atr`（atr 模式），
+    每个 lookback 只剩一次 np.maximum 与逐项算术。
+    """
+    if signal_mode not in SIGNAL_MODES:
+        raise ValueError(f"signal_mode 必须是 {SIGNAL_MODES} 之一，当前为: {signal_mode!r}")
+
+    high = np.asarray(data["High"], dtype=np.float64)
+    low = np.asarray(data["Low"], dtype=np.float64)
+    n = len(high)
+    if n < lookback_bars + 1:
+        return np.full(n, np.nan)
+
+    if window_index is not None:
+        if len(window_index) != n:
+            raise ValueError(f"window_index 长度 {len(window_index)} 与数据长度 {n} 不一致")
+        window_high = window_index.rolling_max(lookback_bars, include_current_bar)
+    else:
+        window_high = rolling_max(high, lookback_bars)
+        if not include_current_bar:
+            window_high = np.concatenate([[np.nan], window_high[:-1]])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if signal_mode == "atr":
+            if atr is None:
+                close = np.asarray(data["Close"], dtype=np.float64)
+                atr = atr_wilder(true_range(high, low, close), atr_length)
+            drop_atr = (window_high - low) / atr
+            return np.where(np.isfinite(drop_atr) & (atr > 0), drop_atr, np.nan)
+
+        return (window_high - low) / window_high * 100
+
+
+def generate_drop_signals(data: Mapping[str, np.ndarray],
+                          lookback_bars: int,
+                          min_drop_percent: float,
+                          include_current_bar: bool = True,
+                          signal_mode: str = "absolute",
+                          atr_length: int = 14) -> np.ndarray:
+    """生成暴跌买入信号
+
+    Args:
+        data: 含 High/Low 列（atr 模式还需 Close）的 DataFrame 或数组字典
+        lookback_bars: 回看K线数量（R 中的 lookbackDays，历史遗留命名：不是天数）
+        min_drop_percent: 最小跌幅；absolute 模式为百分比，atr 模式为 ATR 倍数
+        include_current_bar: 窗口是否包含当前K线
+        signal_mode: "absolute" 或 "atr"
+        atr_length: ATR 周期（仅 atr 模式）
+
+    Returns:
+        布尔数组，True 表示该K线产生买入信号
+    """
+    drop = drop_series(data, lookback_bars, include_current_bar, signal_mode, atr_length)
+    return drop >= min_drop_percent
@@ -0,0 +1,250 @@
+"""
+内存映射列式 K线存储
+每个数据集（如 `ETHUSDT_30m`）存为一个目录，每列一个连续的 `.npy` 文件：
+
+    data/store/
+        catalog.json                 数据集索引（行数、起止时间、月份数、列类型、来源指纹）
+        ETHUSDT_30m/time.npy         int64，K线时间（UTC 纳秒）
+        ETHUSDT_30m/Open.npy ...     float64：Open/High/Low/Close/Volume
+
+读取时用 `np.load(mmap_mode="r")` 映射文件，不把整个数据集读入内存：
+
+- 打开一个数据集只读取文件头，耗时在毫秒级；常驻内存只与实际访问到的页面成正比
+- 按时间范围切片只在时间列上二分查找，返回的各列都是映射的视图（零拷贝）
+- 多个进程映射同一文件时共享操作系统页缓存，不会各自持有一份副本
+
+写入与删除在索引锁（`catalog.json.lock`，fcntl 文件锁）内重新读取索引再修改，
+多个转换进程同时写不同数据集时不会互相覆盖对方的索引条目；没有 fcntl 的平台（Windows）不加锁，
+此时不要并发转换。数据集不会自动删除：来源中已不存在的数据集需用 `remove` 显式删除。
+
+`StoredSeries` 支持 `series["Close"]` 取列与 `series.index`，可以直接传给 `engine.signals`、
+`engine.backtest`、`engine.grid`、`engine.walkforward` 等接受「DataFrame 或数组字典」的函数。
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Mapping
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+STORE_DIR = Path("data/store")
+CATALOG_FILE = "catalog.json"
+LOCK_FILE = "catalog.json.lock"
+
+# 存储格式版本：目录结构或列定义变化时递增
+STORE_VERSION = 1
+
+TIME_COLUMN = "time"
+PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+# 与 data_catalog/datasets_info.csv 相同的目录列
+CATALOG_COLUMNS = ["dataset", "pair", "timeframe", "start_date", "end_date",
+                   "total_bars", "total_months", "first_month", "last_month"]
+
+
+def _format_time(ns: int) -> str:
+    # 同 R as.character(POSIXct)：有毫秒部分时保留三位小数
+    ts = pd.Timestamp(ns)
+    text = ts.strftime("%Y-%m-%d %H:%M:%S")
+    return f"{text}.{ts.microsecond // 1000:03d}" if ts.microsecond else text
+
+
+@dataclass(frozen=True)
+class StoredSeries(Mapping[str, np.ndarray]):
+    """一个数据集（或其时间切片）的列视图
+
+    Attributes:
+        name: 数据集名（SYMBOL_TF）
+        times: K线时间（int64 UTC 纳秒，映射视图）
+        columns: {列名: float64 映射视图}
+    """
+
+    name: str
+    times: np.ndarray
+    columns: Mapping[str, np.ndarray]
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """K线时间（DatetimeIndex，基于时间列的视图）"""
+        return pd.DatetimeIndex(self.times.view("datetime64[ns]"), name="time")
+
+    def between(self, start=None, end=None) -> StoredSeries:
+        """按时间范围 [start, end] 切片（两端可省略），返回零拷贝视图"""
+        lo = 0 if start is None else int(np.searchsorted(self.times, pd.Timestamp(start).value, side="left"))
+        hi = len(self.times) if end is None else int(np.searchsorted(self.times, pd.Timestamp(end).value,
+                                                                      side="right"))
+        return self.rows(lo, hi)
+
+    def rows(self, start: int, stop: int) -> StoredSeries:
+        """按行号区间 [start, stop) 切片，返回零拷贝视图"""
+        return StoredSeries(self.name, self.times[start:stop],
+                            {name: values[start:stop] for name, values in self.columns.items()})
+
+    def to_frame(self) -> pd.DataFrame:
+        """复制为以K线时间为索引的 DataFrame（需要 pandas 操作时使用）"""
+        return pd.DataFrame({name: np.array(values) for name, values in self.columns.items()},
+                            index=pd.DatetimeIndex(np.array(self.times).view("datetime64[ns]"), name="time"))
+
+
+class OHLCVStore:
+    """列式K线存储的读写入口
+
+    Args:
+        root: 存储目录（默认 data/store）
+    """
+
+    def __init__(self, root: str | Path = STORE_DIR):
+        self.root = Path(root)
+        self._catalog: dict | None = None
+
+    @property
+    def catalog_path(self) -> Path:
+        return self.root / CATALOG_FILE
+
+    @contextlib.contextmanager
+    def _catalog_lock(self) -> Iterator[None]:
+        """持有索引锁期间重新读取索引，修改并保存后释放"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / LOCK_FILE, "a+") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                self._catalog = None
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _load_catalog(self) -> dict:
+        if self._catalog is None:
+            if self.catalog_path.exists():
+                with open(self.catalog_path, encoding="utf-8") as f:
+                    self._catalog = json.load(f)
+                if self._catalog.get("version") != STORE_VERSION:
+                    raise ValueError(f"{self.catalog_path} 的存储格式版本为 {self._catalog.get('version')}，"
+                                     f"当前为 {STORE_VERSION}，请重新转换")
+            else:
+                self._catalog = {"version": STORE_VERSION, "datasets": {}}
+        return self._catalog
+
+    def _save_catalog(self) -> None:
+        # 先写临时文件再替换，读者不会看到写了一半的索引
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.catalog_path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._load_catalog(), f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, self.catalog_path)
+
+    def names(self) -> list[str]:
+        """存储中的全部数据集名"""
+        return sorted(self._load_catalog()["datasets"])
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._load_catalog()["datasets"]
+
+    def entry(self, name: str) -> dict:
+        """数据集的索引条目（行数、起止时间、列类型、来源指纹等）"""
+        try:
+            return self._load_catalog()["datasets"][name]
+        except KeyError:
+            raise KeyError(f"存储 {self.root} 中没有数据集 {name}") from None
+
+    def catalog(self) -> pd.DataFrame:
+        """数据集目录（列同 data_catalog/datasets_info.csv）"""
+        datasets = self._load_catalog()["datasets"]
+        return pd.DataFrame([{c: datasets[name][c] for c in CATALOG_COLUMNS} for name in self.names()],
+                            columns=CATALOG_COLUMNS)
+
+    def open(self, name: str) -> StoredSeries:
+        """映射一个数据集的全部列（只读）"""
+        entry = self.entry(name)
+        directory = self.root / name
+        times = np.load(directory / f"{TIME_COLUMN}.npy", mmap_mode="r")
+        columns = {column: np.load(directory / f"{column}.npy", mmap_mode="r") for column in entry["columns"]}
+        return StoredSeries(name, times, columns)
+
+    def write(self, name: str, times: np.ndarray, columns: Mapping[str, np.ndarray],
+              source: Mapping | None = None) -> dict:
+        """写入（或覆盖）一个数据集并更新索引
+
+        Args:
+            name: 数据集名（SYMBOL_TF）
+            times: K线时间（datetime64 或 int64 UTC 纳秒），须严格递增
+            columns: {列名: 数值数组}，以 float64 保存
+            source: 来源信息（如源文件路径与指纹），原样记入索引
+        """
+        times = np.asarray(times)
+        if np.issubdtype(times.dtype, np.datetime64):
+            times = times.astype("datetime64[ns]").view(np.int64)
+        times = np.ascontiguousarray(times, dtype=np.int64)
+        if len(times) > 1 and not np.all(np.diff(times) > 0):
+            raise ValueError(f"{name} 的时间列不是严格递增")
+        arrays = {column: np.ascontiguousarray(values, dtype=np.float64) for column, values in columns.items()}
+        for column, values in arrays.items():
+            if len(values) != len(times):
+                raise ValueError(f"{name} 的列 {column} 长度为 {len(values)}，时间列为 {len(times)}")
+
+        # 写入临时目录后整体替换，已映射旧文件的读者不受影响
+        directory = self.root / name
+        tmp = self.root / f".{name}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / f"{TIME_COLUMN}.npy", times)
+        for column, values in arrays.items():
+            np.save(tmp / f"{column}.npy", values)
+        if directory.exists():
+            old = self.root / f".{name}.old{os.getpid()}"
+            os.replace(directory, old)
+            os.replace(tmp, directory)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, directory)
+
+        pair, _, timeframe = name.partition("_")
+        index = pd.DatetimeIndex(times.view("datetime64[ns]"))
+        months = pd.unique(index.strftime("%Y-%m")) if len(index) else []
+        entry = {
+            "dataset": name,
+            "pair": pair,
+            "timeframe": timeframe,
+            "start_date": _format_time(int(times[0])) if len(times) else "",
+            "end_date": _format_time(int(times[-1])) if len(times) else "",
+            "total_bars": int(len(times)),
+            "total_months": int(len(months)),
+            "first_month": months[0] if len(months) else "",
+            "last_month": months[-1] if len(months) else "",
+            "columns": list(arrays),
+            "source": dict(source or {}),
+        }
+        with self._catalog_lock():
+            self._load_catalog()["datasets"][name] = entry
+            self._save_catalog()
+        return entry
+
+    def remove(self, name: str) -> None:
+        """删除一个数据集（目录与索引条目）"""
+        with self._catalog_lock():
+            self._load_catalog()["datasets"].pop(name, None)
+            self._save_catalog()
+        shutil.rmtree(self.root / name, ignore_errors=True)
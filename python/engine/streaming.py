@@ -0,0 +1,165 @@
+"""
+逐K线流式信号判定
+`generate_drop_signals` 每次在整段历史上重算滚动最大值，适合回测；实时监控时每收到一根收盘K线
+只需更新一次状态。`DropSignalStream` 保存：
+
+- 单调递减双端队列（下标, High）：队首即窗口最高价，每根K线均摊 O(1) 入队/出队
+- Wilder ATR 的递推状态（前收盘价、上一根 ATR），递推式与 R `calc_atr_wilder` 逐项相同
+
+判定规则与 `engine.signals.drop_series` 一致（include_current_bar、absolute/atr 两种模式、NaN 传播）。
+唯一差别：批量函数在整段序列不足 lookback+1 根时不产生任何信号，流式判定从窗口填满的那根K线起即可发出信号。
+
+`warm_up` 用批量向量化计算处理历史数据并直接构造出末尾状态，之后逐根调用 `update`。
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Mapping
+
+import numpy as np
+
+from .signals import SIGNAL_MODES, atr_wilder, drop_series, true_range
+
+_NAN = float("nan")
+
+
+class DropSignalStream:
+    """单个币种/周期的流式暴跌信号判定
+
+    Args:
+        lookback_bars: 回看K线数量
+        min_drop_percent: 最小跌幅；absolute 模式为百分比，atr 模式为 ATR 倍数
+        include_current_bar: 窗口是否包含当前K线
+        signal_mode: "absolute" 或 "atr"
+        atr_length: ATR 周期（仅 atr 模式）
+    """
+
+    def __init__(self, lookback_bars: int, min_drop_percent: float, include_current_bar: bool = True,
+                 signal_mode: str = "absolute", atr_length: int = 14):
+        if signal_mode not in SIGNAL_MODES:
+            raise ValueError(f"signal_mode 必须是 {SIGNAL_MODES} 之一，当前为: {signal_mode!r}")
+        if lookback_bars < 1:
+            raise ValueError(f"lookback_bars 必须 >= 1，当前为 {lookback_bars}")
+        if atr_length < 1:
+            raise ValueError("atr_length 必须 >= 1")
+        self.lookback_bars = int(lookback_bars)
+        self.min_drop_percent = float(min_drop_percent)
+        self.include_current_bar = bool(include_current_bar)
+        self.signal_mode = signal_mode
+        self.atr_length = int(atr_length)
+
+        self.count = 0
+        self.drop = _NAN
+        self._window: deque[tuple[int, float]] = deque()
+        self._last_nan = -1 - self.lookback_bars
+        self._prev_close = _NAN
+        self._atr = _NAN
+        self._tr_sum = 0.0
+        self._tr_n = 0
+
+    @property
+    def atr(self) -> float:
+        """最近一根K线的 Wilder ATR（尚未满 atr_length 根时为 NaN）"""
+        return self._atr
+
+    def _push_high(self, i: int, high: float) -> None:
+        if high != high:
+            self._last_nan = i
+            return
+        window = self._window
+        while window and window[-1][1] <= high:
+            window.pop()
+        window.append((i, high))
+
+    def _window_high(self, end: int) -> float:
+        # 窗口为 [end-lookback+1, end]；窗口内有 NaN 时结果为 NaN（同 roll_max）
+        start = end - self.lookback_bars + 1
+        if start < 0 or self._last_nan >= start:
+            return _NAN
+        window = self._window
+        while window[0][0] < start:
+            window.popleft()
+        return window[0][1]
+
+    def _update_atr(self, high: float, low: float, close: float) -> float:
+        prev_close = close if self.count == 0 else self._prev_close
+        self._prev_close = close
+        # np.fmax 链：忽略缺失项，全部缺失时为 NaN
+        tr = _NAN
+        for value in (high - low, abs(high - prev_close), abs(low - prev_close)):
+            if value == value and not value <= tr:
+                tr = value
+
+        length = self.atr_length
+        if self.count < length:
+            if tr == tr:
+                self._tr_sum += tr
+                self._tr_n += 1
+            if self.count == length - 1:
+                self._atr = self._tr_sum / self._tr_n if self._tr_n else _NAN
+        elif length == 1:
+            self._atr = tr
+        else:
+            self._atr = (self._atr * (length - 1) + tr) / length
+        return self._atr
+
+    def update(self, high: float, low: float, close: float = _NAN) -> bool:
+        """输入一根收盘K线，返回该K线是否产生买入信号（跌幅见 `self.drop`）"""
+        i = self.count
+        if self.include_current_bar:
+            self._push_high(i, high)
+            window_high = self._window_high(i)
+        else:
+            window_high = self._window_high(i - 1)
+            self._push_high(i, high)
+
+        if self.signal_mode == "atr":
+            atr = self._update_atr(high, low, close)
+            drop = (window_high - low) / atr if atr > 0 else _NAN
+            if not math.isfinite(drop):
+                drop = _NAN
+        else:
+            drop = (window_high - low) / window_high * 100 if window_high else _NAN
+        self.count = i + 1
+        self.drop = drop
+        return drop >= self.min_drop_percent
+
+    def warm_up(self, data: Mapping[str, np.ndarray]) -> np.ndarray:
+        """用历史K线批量初始化状态（只能在尚未 update 的新实例上调用）
+
+        Args:
+            data: 含 High/Low 列（atr 模式还需 Close）的 DataFrame 或数组字典
+
+        Returns:
+            历史K线的信号（同 generate_drop_signals）
+        """
+        if self.count:
+            raise ValueError("warm_up 只能用于尚未输入K线的实例")
+        high = np.asarray(data["High"], dtype=np.float64)
+        low = np.asarray(data["Low"], dtype=np.float64)
+        n = len(high)
+        if n == 0:
+            return np.zeros(0, dtype=bool)
+        drop = drop_series(data, self.lookback_bars, self.include_current_bar, self.signal_mode, self.atr_length)
+
+        # 只有最后 lookback 根K线会留在之后的窗口里
+        tail_start = max(0, n - self.lookback_bars)
+        for i in range(tail_start, n):
+            self._push_high(i, float(high[i]))
+
+        if self.signal_mode == "atr":
+            close = np.asarray(data["Close"], dtype=np.float64)
+            tr = true_range(high, low, close)
+            if n >= self.atr_length:
+                self._atr = float(atr_wilder(tr, self.atr_length)[-1])
+            else:
+                head = tr[~np.isnan(tr)]
+                self._tr_sum = float(head.sum())
+                self._tr_n = len(head)
+            self._prev_close = float(close[-1])
+
+        self.count = n
+        self.drop = float(drop[-1])
+        return drop >= self.min_drop_percent
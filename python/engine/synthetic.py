@@ -0,0 +1,116 @@
+"""
+合成数据生成器（基准测试用）
+按固定种子生成与真实数据同构的交易表与 K线序列，规模从 10^3 到 10^7 行：
+
+- synthetic_trades：与 `outputs/trades_tradingview_aligned.csv` 同列的交易表。
+  再入场间隔混合"同一K线 / 相邻K线 / 长间隔"三类，持仓K线数含一定比例的 0，
+  出场原因与盈亏按止盈/止损分布，使各分析阶段的分支都有数据可走
+- synthetic_ohlcv：K线网格上的几何随机游走，夹带偶发的插针暴跌K线，使暴跌信号有触发
+- synthetic_sell_signals：与 `outputs/sell_signals_detail.csv` 同列的卖出信号表
+
+同一 (n, seed) 总是生成完全相同的数据。
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+from .backtest import format_trades_df
+
+DEFAULT_START = "2023-01-01"
+
+
+def synthetic_trades(n: int, seed: int = 0, bar_minutes: int = 15, start: str = DEFAULT_START,
+                     take_profit: float = 10.0, stop_loss: float = 10.0, capital: float = 10000.0,
+                     fee_rate: float = 0.00075) -> pd.DataFrame:
+    """生成 n 笔交易（类型化，列同 `backtest_tradingview_aligned` 结果的交易表）"""
+    rng = np.random.default_rng(seed)
+    bar_ns = bar_minutes * 60 * 1_000_000_000
+
+    # 持仓K线数：约 10% 为 0（同一K线入场出场），其余几何分布
+    holding = np.where(rng.random(n) < 0.10, 0, rng.geometric(0.08, n)).astype(np.int64)
+    # 再入场间隔（K线数）：约 30% 同一K线、20% 相邻K线，其余为长间隔
+    kind = rng.random(n)
+    gap = np.where(kind < 0.30, 0, np.where(kind < 0.50, 1, rng.geometric(0.002, n))).astype(np.int64)
+    gap[0] = 0
+
+    entry_bar = np.cumsum(gap + np.r_[0, holding[:-1]])
+    exit_bar = entry_bar + holding
+    origin = pd.Timestamp(start).value
+    entry_ns = origin + entry_bar * bar_ns
+    exit_ns = origin + exit_bar * bar_ns
+
+    # 止盈/止损；少数交易同一K线内两者同时触发
+    win = rng.random(n) < 0.55
+    both = rng.random(n) < 0.03
+    reasons = np.where(win, np.where(both, "TP_first_in_both", "TP"), np.where(both, "SL_first_in_both", "SL"))
+    pnl = np.where(win, take_profit, -stop_loss) + rng.normal(0.0, 0.05, n)
+
+    # 入场价独立抽样（不做随机游走累积，10^7 笔时也不会溢出）
+    price = 1e-5 * np.exp(rng.normal(0.0, 0.5, n))
+    exit_price = price * (1 + pnl / 100)
+    amount = capital * pnl / 100
+    fee = capital * fee_rate * (2 + pnl / 100)
+
+    return pd.DataFrame({
+        "TradeId": np.arange(1, n + 1, dtype=np.int64),
+        "EntryTime": entry_ns.view("datetime64[ns]"),
+        "EntryPrice": price,
+        "ExitTime": exit_ns.view("datetime64[ns]"),
+        "ExitPrice": exit_price,
+        "ExitReason": reasons,
+        "HoldingBars": holding,
+        "PnLPercent": pnl,
+        "PnLAmount": amount,
+        "TotalFee": fee,
+    })
+
+
+def write_synthetic_trades_csv(trades: pd.DataFrame, path: str | os.PathLike) -> None:
+    """按 R `format_trades_df` 的文本格式写出（同 `write_trades_csv`），供 `load_trades()` 解析"""
+    format_trades_df(trades).to_csv(path, index=False, quoting=csv.QUOTE_NONNUMERIC)
+
+
+def synthetic_ohlcv(n: int, seed: int = 0, bar_minutes: int = 15, start: str = DEFAULT_START,
+                    start_price: float = 1e-5, crash_rate: float = 0.002) -> pd.DataFrame:
+    """生成 n 根K线（DatetimeIndex，Open/High/Low/Close/Volume）"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0, 0.004, n)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.r_[start_price, close[:-1]]
+
+    body_high = np.maximum(open_, close)
+    body_low = np.minimum(open_, close)
+    high = body_high * (1 + np.abs(rng.normal(0.0, 0.002, n)))
+    low = body_low * (1 - np.abs(rng.normal(0.0, 0.002, n)))
+    # 插针：少数K线的最低价大幅下探后收回
+    crash = rng.random(n) < crash_rate
+    low[crash] = body_low[crash] * (1 - rng.uniform(0.05, 0.35, int(crash.sum())))
+
+    index = pd.date_range(start, periods=n, freq=f"{bar_minutes}min")
+    return pd.DataFrame({
+        "Open": open_,
+        "High": high,
+        "Low": low,
+        "Close": close,
+        "Volume": rng.lognormal(10.0, 1.0, n),
+    }, index=index)
+
+
+def synthetic_sell_signals(n: int, seed: int = 0, bar_minutes: int = 15, start: str = DEFAULT_START) -> pd.DataFrame:
+    """生成 n 条卖出信号记录（列同 R 导出的 sell_signals_detail.csv）"""
+    rng = np.random.default_rng(seed)
+    index = np.cumsum(rng.geometric(0.05, n))
+    close = 1e-5 * np.exp(rng.normal(0.0, 0.5, n))
+    timestamps = pd.Timestamp(start) + pd.to_timedelta(index * bar_minutes, unit="min")
+    return pd.DataFrame({
+        "Index": index,
+        "Timestamp": timestamps.strftime("%Y-%m-%d %H:%M:%S"),
+        "Close": close,
+        "High": close * 1.01,
+        "Low": close * 0.99,
+    })
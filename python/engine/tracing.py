@@ -0,0 +1,290 @@
+"""
+流水线阶段计时与资源埋点
+记录每个阶段的墙钟时间、CPU 时间与峰值内存，以及脚本内部的分段耗时，输出为：
+
+- 结构化 JSON 追踪（`pipeline_trace.json`）：每个阶段的指标与分段列表，便于脚本化比较
+- Chrome 追踪格式（`pipeline_trace.chrome.json`）：可直接拖入 chrome://tracing 或 https://ui.perfetto.dev 查看，
+  并发阶段按工作进程分行显示
+
+约定：
+- 阶段脚本用 `phase("load")` / `phase("compute")` / `phase("render")` / `phase("write")` 标记分段，
+  每次调用结束上一分段并开始新分段，不需要改动缩进；细粒度的嵌套分段用 `with span("名称"):`
+- 分段记录在进程内，由 `run_stage` 在阶段开始时清空、结束时收集；脚本单独运行时标记几乎没有开销
+- 峰值内存为阶段执行期间本进程的 RSS 峰值（Linux 下每个阶段开始时通过 /proc/self/clear_refs 重置；
+  其他平台退化为进程生命周期内的峰值）；CPU 时间包含阶段内已回收子进程（如渲染进程池）的用时
+- `StageProfiler` 为可选的采样分析器：后台线程按固定间隔采样阶段主线程的调用栈，
+  输出 flamegraph.pl / speedscope 可读的折叠栈文件（`<阶段名>.collapsed`）
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Mapping
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+if TYPE_CHECKING:
+    from .pipeline import Stage, StageResult
+
+TRACE_JSON = "pipeline_trace.json"
+CHROME_TRACE_JSON = "pipeline_trace.chrome.json"
+
+_SPANS: list[dict] = []
+_PHASE: dict | None = None
+_DEPTH = 0
+
+
+def _open(name: str, depth: int) -> dict:
+    return {"name": name, "ts_ns": time.time_ns(), "t0": time.perf_counter_ns(),
+            "cpu0": time.process_time(), "depth": depth}
+
+
+def _close(entry: dict) -> None:
+    _SPANS.append({
+        "name": entry["name"],
+        "ts_ns": entry["ts_ns"],
+        "elapsed": (time.perf_counter_ns() - entry["t0"]) / 1e9,
+        "cpu_time": time.process_time() - entry["cpu0"],
+        "depth": entry["depth"],
+    })
+
+
+def phase(name: str | None) -> None:
+    """结束当前分段并开始名为 name 的新分段（name 为 None 时只结束）"""
+    global _PHASE
+    if _PHASE is not None:
+        _close(_PHASE)
+    _PHASE = _open(name, 0) if name is not None else None
+
+
+@contextlib.contextmanager
+def span(name: str) -> Iterator[None]:
+    """嵌套分段；在 phase 分段内使用时层级自动加一"""
+    global _DEPTH
+    entry = _open(name, _DEPTH + (1 if _PHASE is not None else 0))
+    _DEPTH += 1
+    try:
+        yield
+    finally:
+        _DEPTH -= 1
+        _close(entry)
+
+
+def reset_spans() -> None:
+    global _PHASE, _DEPTH
+    _SPANS.clear()
+    _PHASE = None
+    _DEPTH = 0
+
+
+def collect_spans() -> list[dict]:
+    """结束未关闭的分段，返回并清空本进程记录的分段（按开始时间排序）"""
+    phase(None)
+    spans = sorted(_SPANS, key=lambda s: (s["ts_ns"], s["depth"]))
+    _SPANS.clear()
+    return spans
+
+
+def reset_peak_rss() -> bool:
+    """重置本进程的 RSS 峰值（仅 Linux），成功返回 True"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def peak_rss_mb() -> float:
+    """本进程 RSS 峰值（MB）：优先读 /proc/self/status 的 VmHWM（可被 reset_peak_rss 重置）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 的 ru_maxrss 单位为字节，Linux 为 KB
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def cpu_time() -> float:
+    """本进程 CPU 时间 + 已回收子进程的 CPU 时间（秒）"""
+    total = time.process_time()
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+class SamplingProfiler:
+    """后台线程定时采样目标线程的调用栈，累计折叠栈计数"""
+
+    def __init__(self, interval: float = 0.005, thread_id: int | None = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def write(self, path: str | os.PathLike) -> Path:
+        """写出折叠栈文件（每行 "栈;帧 次数"，按次数降序）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp, path)
+        return path
+
+
+@dataclass(frozen=True)
+class StageProfiler:
+    """流水线的采样分析器配置（可 pickle，随阶段一起传入工作进程）
+
+    Attributes:
+        output_dir: 折叠栈文件输出目录
+        interval: 采样间隔（秒）
+        stages: 只分析这些阶段；None 表示全部阶段
+    """
+
+    output_dir: str
+    interval: float = 0.005
+    stages: frozenset[str] | None = None
+
+    def wants(self, stage: "Stage") -> bool:
+        return self.stages is None or stage.name in self.stages
+
+    def path(self, stage: "Stage") -> Path:
+        return Path(self.output_dir) / f"{Path(stage.name).stem}.collapsed"
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def _finite(value: float) -> float | None:
+    return value if value == value else None
+
+
+def trace_records(results: Mapping[str, "StageResult"]) -> list[dict]:
+    """把阶段结果整理为 JSON 追踪中的阶段记录"""
+    records = []
+    for name, r in results.items():
+        records.append({
+            "name": name,
+            "success": r.success,
+            "skipped": r.skipped,
+            "error": r.error,
+            "pid": r.pid,
+            "start": _iso(r.started) if r.started else None,
+            "elapsed": r.elapsed,
+            "cpu_time": r.cpu_time,
+            "peak_rss_mb": _finite(r.peak_rss_mb),
+            "profile": r.profile,
+            "spans": [{
+                "name": s["name"],
+                "offset": (s["ts_ns"] / 1e9 - r.started) if r.started else None,
+                "elapsed": s["elapsed"],
+                "cpu_time": s["cpu_time"],
+                "depth": s["depth"],
+            } for s in r.spans],
+        })
+    return records
+
+
+def chrome_trace_events(results: Mapping[str, "StageResult"]) -> list[dict]:
+    """Chrome 追踪事件：每个阶段及其分段为一个完整事件（ph="X"），时间单位为微秒"""
+    events = []
+    pids = set()
+    for name, r in results.items():
+        if not r.started or r.skipped:
+            continue
+        pid = r.pid or os.getpid()
+        pids.add(pid)
+        events.append({
+            "name": name, "cat": "stage", "ph": "X", "pid": pid, "tid": pid,
+            "ts": r.started * 1e6, "dur": r.elapsed * 1e6,
+            "args": {"success": r.success, "error": r.error, "cpu_time": r.cpu_time,
+                     "peak_rss_mb": _finite(r.peak_rss_mb)},
+        })
+        for s in r.spans:
+            events.append({
+                "name": s["name"], "cat": "span", "ph": "X", "pid": pid, "tid": pid,
+                "ts": s["ts_ns"] / 1e3, "dur": s["elapsed"] * 1e6,
+                "args": {"stage": name, "cpu_time": s["cpu_time"]},
+            })
+    for pid in sorted(pids):
+        label = "main" if pid == os.getpid() else f"worker {pid}"
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": label}})
+    return events
+
+
+def _write_json(path: Path, payload) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def write_trace(results: Mapping[str, "StageResult"], directory: str | os.PathLike,
+                **meta) -> tuple[Path, Path]:
+    """写出 JSON 追踪与 Chrome 追踪文件，返回 (json 路径, chrome 路径)"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    json_path = directory / TRACE_JSON
+    chrome_path = directory / CHROME_TRACE_JSON
+    _write_json(json_path, {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "meta": {"pid": os.getpid(), "cpu_count": os.cpu_count(), **meta},
+        "stages": trace_records(results),
+    })
+    _write_json(chrome_path, {"traceEvents": chrome_trace_events(results), "displayTimeUnit": "ms"})
+    return json_path, chrome_path
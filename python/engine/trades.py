@@ -0,0 +1,180 @@
+"""
+R回测交易明细加载器
+解析 `outputs/trades_tradingview_aligned.csv` 一次，并把类型化结果缓存为 Feather 文件
+
+缓存约定：
+- 缓存位于 `<源文件目录>/.cache/<文件名>.feather`，旁边的 `.meta.json` 记录源文件的 mtime/大小/哈希
+- mtime 与大小未变时直接读缓存；mtime 变了但内容哈希相同（例如文件被重新拷贝）时也复用缓存
+- EntryTime/ExitTime/NextEntryTime 在缓存中保存为 int64 纳秒，ExitReason 保存为 categorical
+- 未安装 pyarrow 时自动退化为每次直接解析 CSV
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+OUTPUT_DIR = Path("outputs")
+TRADES_CSV = OUTPUT_DIR / "trades_tradingview_aligned.csv"
+
+# 缓存格式版本：列定义或派生逻辑变化时递增，使旧缓存自动失效
+CACHE_VERSION = 1
+
+TIME_COLUMNS = ("EntryTime", "ExitTime", "NextEntryTime")
+NS_PER_MINUTE = 60 * 1_000_000_000
+
+def time_ns(series: pd.Series) -> np.ndarray:
+    """时间列转为 int64 纳秒数组（NaT 为 int64 最小值），供各模块做向量化时间运算"""
+    return series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+# 进程内结果缓存：同一进程（及 fork 出的子进程）内多个阶段共享一次解析结果
+_MEMO: dict[Path, tuple[tuple[int, int], pd.DataFrame]] = {}
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """按块计算文件的 SHA-256（大文件不整体读入内存）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_paths(source: Path) -> tuple[Path, Path]:
+    cache_dir = source.parent / ".cache"
+    return cache_dir / f"{source.name}.feather", cache_dir / f"{source.name}.meta.json"
+
+
+def _have_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parse_trades_csv(path: Path) -> pd.DataFrame:
+    """解析R导出的交易CSV，并计算再入场间隔
+
+    返回的 DataFrame 使用 RangeIndex（脚本中 `trades.iloc[idx + 1]` 依赖这一点），
+    新增 NextEntryTime（下一笔入场时间）与 ReentryInterval（分钟，最后一笔为 NaN）。
+    """
+    trades = pd.read_csv(path)
+
+    # R 的 as.character(POSIXct) 在整点午夜会省略时分秒，因此按 ISO8601 混合格式解析
+    trades["EntryTime"] = pd.to_datetime(trades["EntryTime"], format="ISO8601")
+    trades["ExitTime"] = pd.to_datetime(trades["ExitTime"], format="ISO8601")
+
+    # format_trades_df() 导出为 "12.34%"，run_and_export_trades.R 导出为数值
+    if not pd.api.types.is_numeric_dtype(trades["PnLPercent"]):
+        trades["PnLPercent"] = trades["PnLPercent"].astype(str).str.rstrip("%").astype(float)
+
+    trades["ExitReason"] = trades["ExitReason"].astype("category")
+
+    return add_reentry_columns(trades)
+
+
+def add_reentry_columns(trades: pd.DataFrame) -> pd.DataFrame:
+    """追加 NextEntryTime 与 ReentryInterval（分钟，最后一笔为 NaN），原地修改并返回"""
+    trades["NextEntryTime"] = trades["EntryTime"].shift(-1)
+    trades["ReentryInterval"] = (trades["NextEntryTime"] - trades["ExitTime"]).dt.total_seconds() / 60
+    return trades
+
+
+def _to_cache_frame(trades: pd.DataFrame) -> pd.DataFrame:
+    frame = trades.copy()
+    for col in TIME_COLUMNS:
+        # NaT 以 int64 最小值保存，读取时还原
+        frame[col] = frame[col].astype("datetime64[ns]").to_numpy().view(np.int64)
+    return frame
+
+
+def _from_cache_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    for col in TIME_COLUMNS:
+        frame[col] = pd.Series(frame[col].to_numpy(dtype=np.int64).view("datetime64[ns]"), index=frame.index)
+    return frame
+
+
+def _read_meta(meta_path: Path) -> dict | None:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path: Path, meta: dict) -> None:
+    tmp = meta_path.with_suffix(meta_path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, meta_path)
+
+
+def load_trades(path: str | os.PathLike = TRADES_CSV, use_cache: bool = True) -> pd.DataFrame:
+    """加载R回测交易明细（带 Feather 缓存）
+
+    Args:
+        path: 交易CSV路径，默认 `outputs/trades_tradingview_aligned.csv`
+        use_cache: 是否读写磁盘缓存
+
+    Returns:
+        类型化的交易表：EntryTime/ExitTime/NextEntryTime 为 datetime64[ns]，
+        PnLPercent 为 float，ExitReason 为 categorical，ReentryInterval 单位为分钟。
+        每次返回独立副本，调用方可以自由增删列。
+    """
+    source = Path(path)
+    if not use_cache:
+        return parse_trades_csv(source)
+
+    stat = source.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    memo = _MEMO.get(source.resolve())
+    if memo is not None and memo[0] == key:
+        return memo[1].copy()
+
+    trades = _load_trades_cached(source, stat)
+    _MEMO[source.resolve()] = (key, trades)
+    return trades.copy()
+
+
+def _load_trades_cached(source: Path, stat: os.stat_result) -> pd.DataFrame:
+    if not _have_pyarrow():
+        return parse_trades_csv(source)
+
+    cache_path, meta_path = _cache_paths(source)
+    meta = _read_meta(meta_path)
+
+    if meta is not None and meta.get("version") == CACHE_VERSION and cache_path.exists():
+        if meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+            return _from_cache_frame(pd.read_feather(cache_path))
+
+        # mtime 变化不一定代表内容变化（git checkout、拷贝等），用哈希确认
+        digest = file_sha256(source)
+        if digest == meta.get("sha256"):
+            meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _write_meta(meta_path, meta)
+            return _from_cache_frame(pd.read_feather(cache_path))
+    else:
+        digest = file_sha256(source)
+
+    trades = parse_trades_csv(source)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_suffix(cache_path.suffix + ".tmp")
+    _to_cache_frame(trades).to_feather(tmp)
+    os.replace(tmp, cache_path)
+    _write_meta(meta_path, {
+        "version": CACHE_VERSION,
+        "source": str(source),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": digest,
+    })
+
+    return trades
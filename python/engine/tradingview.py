@@ -0,0 +1,219 @@
+"""
+TradingView 策略交易清单解析
+把 TradingView「交易清单」导出（CSV 或 xlsx，中文或英文表头）整理成与 R 回测交易表同构的类型化 DataFrame
+
+导出格式约定：
+- 每笔交易两行：进场行与出场行，共享同一个 `交易 #`，导出中出场行通常排在进场行之前
+- `日期/时间` 为 Excel 序列日（1899-12-30 起算的天数，含小数），xlsx 中也可能已是日期单元格
+- 价格、净损益列名带计价货币后缀（`价格 USDT`、`净损益 USDT`），按前缀匹配
+- 文件名形如 `<策略名>_<交易所>_<交易对>_<导出日期>_<随机串>.xlsx`，批量导入时从中提取交易所与交易对
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from .trades import add_reentry_columns
+
+DATA_DIR = Path("data")
+TV_TRADES_CSV = DATA_DIR / "tradingview_trades.csv"
+
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+SECONDS_PER_DAY = 86400
+
+EXPORT_SUFFIXES = (".csv", ".xlsx", ".xls")
+
+# 表头别名：{内部列名: (中文前缀, 英文前缀...)}，按前缀匹配以兼容不同计价货币
+_COLUMN_PREFIXES = {
+    "TradeId": ("交易 #", "Trade #"),
+    "Type": ("类型", "Type"),
+    "Time": ("日期/时间", "Date/Time"),
+    "Signal": ("信号", "Signal"),
+    "Price": ("价格", "Price"),
+    "Quantity": ("仓位大小（数量）", "Position size (qty)", "Contracts"),
+    "PnLAmount": ("净损益", "Net P&L", "Profit"),
+    "PnLPercent": ("净损益 %", "Net P&L %", "Profit %"),
+}
+
+_FILENAME_PATTERN = re.compile(r"_(?P<exchange>[A-Z0-9]+)_(?P<symbol>[A-Z0-9.]+)_\d{4}-\d{2}-\d{2}")
+
+TRADE_COLUMNS = (
+    "TradeId", "Side", "EntryTime", "EntryPrice", "ExitTime", "ExitPrice", "ExitReason",
+    "EntrySignal", "Quantity", "PnLPercent", "PnLAmount", "NextEntryTime", "ReentryInterval",
+)
+
+
+def excel_serial_to_datetime(values) -> pd.DatetimeIndex:
+    """Excel 序列日（浮点天数）批量转为 datetime64[ns]，按秒取整以消除浮点误差，NaN 转为 NaT"""
+    serial = np.asarray(values, dtype=np.float64)
+    seconds = np.rint(serial * SECONDS_PER_DAY)
+    return pd.to_datetime(seconds, unit="s", origin=EXCEL_EPOCH)
+
+
+def _resolve_columns(columns: Iterable[str]) -> dict[str, str]:
+    """把导出表头映射到内部列名（`净损益 %` 与 `净损益 USDT` 共享前缀，金额列跳过以 % 结尾的列）"""
+    columns = [str(c).strip() for c in columns]
+    resolved: dict[str, str] = {}
+    for name, prefixes in _COLUMN_PREFIXES.items():
+        for col in columns:
+            if col in resolved.values():
+                continue
+            if any(col.startswith(p) for p in prefixes):
+                if name == "PnLAmount" and col.endswith("%"):
+                    continue
+                resolved[name] = col
+                break
+
+    missing = [name for name in ("TradeId", "Type", "Time", "Price") if name not in resolved]
+    if missing:
+        raise ValueError(f"不是 TradingView 交易清单导出：缺少列 {missing}")
+    return resolved
+
+
+def _parse_times(column: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.astype("datetime64[ns]")
+    if pd.api.types.is_numeric_dtype(column):
+        return pd.Series(excel_serial_to_datetime(column.to_numpy()), index=column.index)
+    return pd.to_datetime(column, format="ISO8601")
+
+
+def is_trade_list(frame: pd.DataFrame) -> bool:
+    """工作表是否为交易清单（其余工作表为概览/绩效等汇总表）"""
+    try:
+        _resolve_columns(frame.columns)
+    except ValueError:
+        return False
+    return True
+
+
+def _unique_headers(header: Iterable) -> list[str]:
+    """表头转为唯一字符串：空表头命名为 `...<列号>`，重名追加 `...<列号>`（同 readxl）"""
+    names: list[str] = []
+    for i, name in enumerate(header, start=1):
+        name = "" if name is None else str(name).strip()
+        if not name:
+            name = f"...{i}"
+        elif name in names:
+            name = f"{name}...{i}"
+        names.append(name)
+    return names
+
+
+def _read_xlsx_sheets(path: Path) -> dict[str, pd.DataFrame]:
+    # 只读模式按行流式读取，不为整个工作簿建立单元格对象；data_only 取公式的缓存值
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheets: dict[str, pd.DataFrame] = {}
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = list(next(rows, None) or ())
+            while header and header[-1] is None:
+                header.pop()
+            width = len(header)
+            body = [row[:width] + (None,) * (width - len(row))
+                    for row in rows if any(v is not None for v in row[:width])]
+            sheets[sheet.title] = pd.DataFrame(body, columns=_unique_headers(header))
+    finally:
+        workbook.close()
+    return sheets
+
+
+def read_export_sheets(path: str | os.PathLike) -> dict[str, pd.DataFrame]:
+    """读取一份导出文件的全部工作表 {表名: DataFrame}；CSV 视为以文件名命名的单个工作表"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return {path.stem: pd.read_csv(path, encoding="utf-8-sig")}
+    if suffix == ".xlsx":
+        return _read_xlsx_sheets(path)
+    return pd.read_excel(path, sheet_name=None)
+
+
+def read_tradingview_export(path: str | os.PathLike) -> pd.DataFrame:
+    """读取一份导出文件的原始交易清单（每笔交易两行）
+
+    xlsx 导出包含多个工作表（概览、绩效、交易清单等），取第一个带 `交易 #` 列的工作表。
+    """
+    sheets = read_export_sheets(path)
+    for frame in sheets.values():
+        if is_trade_list(frame):
+            return frame
+    raise ValueError(f"{path} 中没有交易清单工作表（工作表: {list(sheets)}）")
+
+
+def pair_tradingview_rows(raw: pd.DataFrame) -> pd.DataFrame:
+    """按 `交易 #` 把进场行与出场行配对为一笔交易一行
+
+    Returns:
+        按入场时间排序、RangeIndex 的交易表，列见 TRADE_COLUMNS：
+        EntryTime/ExitTime/NextEntryTime 为 datetime64[ns]，ExitReason 为出场行的信号（categorical），
+        PnLPercent 为百分数数值（与 R 交易表一致），ReentryInterval 单位为分钟。
+        未平仓交易的出场字段为缺失值。
+    """
+    cols = _resolve_columns(raw.columns)
+    raw = raw.rename(columns=lambda c: str(c).strip())
+    rows = pd.DataFrame({name: raw[col] for name, col in cols.items()})
+    rows["Time"] = _parse_times(rows["Time"])
+
+    kind = rows["Type"].astype(str)
+    is_entry = kind.str.contains("进场") | kind.str.contains("Entry", case=False)
+    rows["Side"] = np.where(kind.str.contains("空头") | kind.str.contains("short", case=False), "Short", "Long")
+
+    entries = rows[is_entry.to_numpy()].set_index("TradeId")
+    exits = rows[~is_entry.to_numpy()].set_index("TradeId")
+    duplicated = entries.index[entries.index.duplicated()].union(exits.index[exits.index.duplicated()])
+    if len(duplicated):
+        raise ValueError(f"交易编号重复: {list(duplicated[:10])}")
+
+    trades = pd.DataFrame({
+        "Side": entries["Side"],
+        "EntryTime": entries["Time"],
+        "EntryPrice": entries["Price"].astype(np.float64),
+        "EntrySignal": entries.get("Signal"),
+    })
+    trades["ExitTime"] = exits["Time"].reindex(trades.index)
+    trades["ExitPrice"] = exits["Price"].reindex(trades.index).astype(np.float64)
+    trades["ExitReason"] = exits.get("Signal", pd.Series(index=exits.index, dtype=object)).reindex(trades.index)
+    for name in ("Quantity", "PnLPercent", "PnLAmount"):
+        # 数量与盈亏在进场/出场两行上相同，取进场行
+        trades[name] = pd.to_numeric(entries[name], errors="coerce") if name in entries else np.nan
+
+    trades = trades.rename_axis("TradeId").reset_index()
+    trades["TradeId"] = trades["TradeId"].astype(np.int64)
+    trades["ExitReason"] = trades["ExitReason"].astype("category")
+    # 统一为纳秒：解析结果可能是 datetime64[s]/[us]，下游按 int64 纳秒做时间差
+    trades["EntryTime"] = trades["EntryTime"].astype("datetime64[ns]")
+    trades["ExitTime"] = trades["ExitTime"].astype("datetime64[ns]")
+    trades = trades.sort_values(["EntryTime", "TradeId"], kind="stable", ignore_index=True)
+
+    return add_reentry_columns(trades)[list(TRADE_COLUMNS)]
+
+
+def load_tradingview_trades(path: str | os.PathLike = TV_TRADES_CSV) -> pd.DataFrame:
+    """加载一份 TradingView 交易清单导出，默认 `data/tradingview_trades.csv`"""
+    return pair_tradingview_rows(read_tradingview_export(path))
+
+
+def parse_export_name(path: str | os.PathLike) -> tuple[str | None, str | None]:
+    """从导出文件名提取 (交易所, 交易对)，不符合命名约定时返回 (None, None)"""
+    match = _FILENAME_PATTERN.search(Path(path).stem)
+    if match is None:
+        return None, None
+    return match.group("exchange"), match.group("symbol")
+
+
+def list_tradingview_exports(directory: str | os.PathLike) -> list[Path]:
+    """目录下的导出文件（csv/xlsx/xls，按文件名排序，跳过 Excel 临时锁文件 `~$*`）"""
+    return sorted(
+        p for p in Path(directory).iterdir()
+        if p.is_file() and p.suffix.lower() in EXPORT_SUFFIXES and not p.name.startswith("~$")
+    )
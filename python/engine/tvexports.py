@@ -0,0 +1,217 @@
+"""
+TradingView 导出批量读取（带 Parquet 缓存）
+把一个目录下的 TradingView 策略报告导出（xlsx/xls/csv）逐个工作表解析，按文件内容哈希缓存为 Parquet，
+并生成全部工作表的合并索引（每个工作表一行，区分交易清单与汇总表）。
+
+缓存约定：
+- 缓存位于 `<导出目录>/.cache/tradingview/<sha256>/`：每个工作表一个 `<序号>.parquet`，`sheets.json` 记录表名/类型/行列数
+- `<导出目录>/.cache/tradingview/index.csv` 为合并索引，同时记录源文件 mtime/大小；
+  两者未变时直接复用索引中的哈希，不再读取源文件
+- 按内容哈希寻址，文件改名或被重新拷贝时仍命中缓存
+- 未命中缓存的文件在进程池中并行解析（xlsx 走 openpyxl 只读流式读取）
+- 未安装 pyarrow 时不写缓存，每次重新解析
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from .tradingview import (TRADE_COLUMNS, is_trade_list, list_tradingview_exports, pair_tradingview_rows,
+                          parse_export_name, read_export_sheets)
+from .trades import _have_pyarrow, _read_meta, _write_meta, file_sha256
+
+# 缓存格式版本：工作表规整逻辑变化时递增，使旧缓存自动失效
+CACHE_VERSION = 1
+
+SHEET_TRADES = "trades"
+SHEET_SUMMARY = "summary"
+
+INDEX_COLUMNS = ("Source", "Exchange", "Symbol", "Sha256", "MtimeNs", "Size",
+                 "SheetIndex", "Sheet", "Kind", "Rows", "Columns", "Cache")
+
+# 进程内工作表缓存：{(sha256, 工作表序号): DataFrame}；未启用磁盘缓存时解析结果只保存在这里
+_MEMO: dict[tuple[str, int], pd.DataFrame] = {}
+
+
+def _cache_root(directory: Path) -> Path:
+    return directory / ".cache" / "tradingview"
+
+
+def _normalize_sheet(frame: pd.DataFrame) -> pd.DataFrame:
+    """混合类型的 object 列规整为 Parquet 可写的类型：能全部转为数值的转数值，其余转字符串"""
+    frame = frame.copy()
+    for col in frame.columns:
+        values = frame[col]
+        if values.dtype != object:
+            continue
+        present = values.notna()
+        numeric = pd.to_numeric(values, errors="coerce")
+        if numeric[present].notna().all():
+            frame[col] = numeric
+        else:
+            frame[col] = values.astype(str).where(present, None)
+    return frame
+
+
+def _sheets_meta(cache_dir: Path) -> list[dict] | None:
+    meta = _read_meta(cache_dir / "sheets.json")
+    if meta is None or meta.get("version") != CACHE_VERSION:
+        return None
+    if not all((cache_dir / f"{sheet['index']}.parquet").exists() for sheet in meta["sheets"]):
+        return None
+    return meta["sheets"]
+
+
+def _ingest_file(path: Path, cache_root: Path | None) -> tuple[str, list[dict], dict[int, pd.DataFrame] | None]:
+    """解析一个导出文件（进程池任务）
+
+    Returns:
+        (内容哈希, 工作表描述列表, 未写磁盘缓存时的 {工作表序号: DataFrame})
+    """
+    digest = file_sha256(path)
+    if cache_root is not None:
+        sheets = _sheets_meta(cache_root / digest)
+        if sheets is not None:
+            return digest, sheets, None
+
+    sheets = []
+    frames = {}
+    for i, (name, frame) in enumerate(read_export_sheets(path).items()):
+        frame = _normalize_sheet(frame)
+        kind = SHEET_TRADES if is_trade_list(frame) else SHEET_SUMMARY
+        sheets.append({"index": i, "name": name, "kind": kind, "rows": len(frame), "columns": frame.shape[1]})
+        frames[i] = frame
+
+    if cache_root is None:
+        return digest, sheets, frames
+
+    cache_dir = cache_root / digest
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for i, frame in frames.items():
+        target = cache_dir / f"{i}.parquet"
+        tmp = target.with_suffix(".parquet.tmp")
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, target)
+    _write_meta(cache_dir / "sheets.json", {"version": CACHE_VERSION, "source": path.name, "sheets": sheets})
+    return digest, sheets, None
+
+
+def _previous_index(cache_root: Path) -> dict[str, tuple[int, int, str]]:
+    """上次索引中的 {文件名: (mtime_ns, 大小, 哈希)}"""
+    index_path = cache_root / "index.csv"
+    if not index_path.exists():
+        return {}
+    try:
+        index = pd.read_csv(index_path, usecols=["Source", "MtimeNs", "Size", "Sha256"])
+    except (OSError, ValueError):
+        return {}
+    return {row.Source: (int(row.MtimeNs), int(row.Size), row.Sha256) for row in index.itertuples(index=False)}
+
+
+def scan_tradingview_exports(directory: str | os.PathLike,
+                             max_workers: int | None = None,
+                             use_cache: bool = True) -> pd.DataFrame:
+    """解析（或从缓存加载）目录下全部导出，返回合并的工作表索引
+
+    Args:
+        directory: 导出目录
+        max_workers: 解析进程数（默认 min(待解析文件数, CPU核数)；1 表示在当前进程串行解析）
+        use_cache: 是否读写 `<导出目录>/.cache/tradingview/`
+
+    Returns:
+        每个工作表一行，列为 INDEX_COLUMNS；Kind 为 "trades"（交易清单）或 "summary"（概览/绩效等），
+        Cache 为该工作表的 Parquet 缓存路径（未启用缓存时为空字符串）。用 read_sheet() 读取工作表内容。
+    """
+    directory = Path(directory)
+    files = list_tradingview_exports(directory)
+    cache_root = _cache_root(directory) if use_cache and _have_pyarrow() else None
+    previous = _previous_index(cache_root) if cache_root is not None else {}
+
+    stats = {path: path.stat() for path in files}
+    ingested: dict[Path, tuple[str, list[dict]]] = {}
+    pending = []
+    for path in files:
+        known = previous.get(path.name)
+        if known is not None and known[:2] == (stats[path].st_mtime_ns, stats[path].st_size):
+            sheets = _sheets_meta(cache_root / known[2])
+            if sheets is not None:
+                ingested[path] = (known[2], sheets)
+                continue
+        pending.append(path)
+
+    def collect(path: Path, result: tuple[str, list[dict], dict[int, pd.DataFrame] | None]) -> None:
+        digest, sheets, frames = result
+        for i, frame in (frames or {}).items():
+            _MEMO[(digest, i)] = frame
+        ingested[path] = (digest, sheets)
+
+    if max_workers is None:
+        max_workers = min(len(pending), os.cpu_count() or 1)
+    if max_workers <= 1:
+        for path in pending:
+            collect(path, _ingest_file(path, cache_root))
+    else:
+        mp_context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+            futures = {path: executor.submit(_ingest_file, path, cache_root) for path in pending}
+            for path, future in futures.items():
+                collect(path, future.result())
+
+    rows = []
+    for path in files:
+        digest, sheets = ingested[path]
+        exchange, symbol = parse_export_name(path)
+        for sheet in sheets:
+            cache = cache_root / digest / f"{sheet['index']}.parquet" if cache_root is not None else ""
+            rows.append((path.name, exchange, symbol, digest, stats[path].st_mtime_ns, stats[path].st_size,
+                         sheet["index"], sheet["name"], sheet["kind"], sheet["rows"], sheet["columns"], str(cache)))
+    index = pd.DataFrame(rows, columns=list(INDEX_COLUMNS))
+
+    if cache_root is not None and (pending or previous.keys() != {path.name for path in files}):
+        cache_root.mkdir(parents=True, exist_ok=True)
+        tmp = cache_root / "index.csv.tmp"
+        index.to_csv(tmp, index=False)
+        os.replace(tmp, cache_root / "index.csv")
+    return index
+
+
+def read_sheet(entry) -> pd.DataFrame:
+    """读取索引中一个工作表的内容（entry 为 scan_tradingview_exports() 结果的一行）"""
+    key = (entry.Sha256, int(entry.SheetIndex))
+    frame = _MEMO.get(key)
+    if frame is None:
+        frame = pd.read_parquet(entry.Cache)
+        _MEMO[key] = frame
+    return frame.copy()
+
+
+def load_tradingview_dir(directory: str | os.PathLike,
+                         max_workers: int | None = None,
+                         use_cache: bool = True) -> pd.DataFrame:
+    """批量导入一个目录下的全部 TradingView 导出
+
+    每个交易清单工作表单独配对并计算再入场间隔（间隔不跨文件），再纵向合并。
+    额外列 Source（文件名）、Exchange、Symbol 为 categorical；汇总表与非交易清单文件被跳过。
+    """
+    index = scan_tradingview_exports(directory, max_workers=max_workers, use_cache=use_cache)
+
+    frames = []
+    for entry in index[index["Kind"] == SHEET_TRADES].itertuples(index=False):
+        trades = pair_tradingview_rows(read_sheet(entry))
+        trades.insert(0, "Symbol", entry.Symbol)
+        trades.insert(0, "Exchange", entry.Exchange)
+        trades.insert(0, "Source", entry.Source)
+        frames.append(trades)
+
+    if not frames:
+        return pd.DataFrame(columns=["Source", "Exchange", "Symbol", *TRADE_COLUMNS])
+
+    combined = pd.concat(frames, ignore_index=True)
+    for col in ("Source", "Exchange", "Symbol", "ExitReason"):
+        combined[col] = combined[col].astype("category")
+    return combined
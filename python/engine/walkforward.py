@@ -0,0 +1,584 @@
+"""
+滚动 Walk-Forward（signalMode="atr"）参数优化与样本外检验
+对应 `r/scripts/run/run_multitimeframe_wf_atr_symbols.R`：按自然月切分数据，每个窗口在训练月上做两阶段随机搜索，
+把最优参数用于随后的测试月（样本外），输出格式与 R 版相同：
+
+- `<output_dir>/<dataset>_atr_wf_details.csv`：逐窗口明细
+- `<output_dir>/<dataset>_atr_wf_summary.md`：单数据集汇总
+- `docs/reports/multitimeframe_atr_walkforward_summary.{csv,md}`：整轮汇总
+
+R 版按数据集、窗口逐个串行执行；这里每个 (数据集, 窗口) 是一个独立任务：
+
+- 任务开销按 训练K线数 × 采样数 估计，按开销从大到小提交到进程池（5m 长序列最先开始），
+  空闲的工作进程总是领取剩余任务中最大的一个，收尾阶段只剩小任务，整轮耗时接近 总开销 / 进程数
+- 数据集在工作进程初始化时传入（fork 下直接继承父进程内存，不复制），任务本身只携带K线区间
+- 训练集评估使用 `engine.grid.GridEvaluator`，同一窗口的全部采样共享跌幅序列与分块统计；
+  窗口最高价索引按数据集在工作进程内只建一次（`engine.signals.window_max_index`），各训练窗口取其切片视图；
+  设置 `indicator_cache` 目录时训练窗口的 ATR 跨运行从磁盘缓存读取（见 `engine.indicators`）
+- 增量模式（`WalkForwardConfig(incremental=True)`）下一个数据集是一个任务，窗口顺序执行，
+  训练集指标由按月缓存的交易分段拼接得到，只模拟新增月份（见 `engine.incremental`）
+
+随机采样使用 NumPy 生成器，种子规则同 R（seed_base + window_id*1000 + 阶段号），
+但与 R 的 `set.seed` 序列不同，具体采样点不会与 R 版逐个相同。
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .backtest import backtest_tradingview_aligned
+from .grid import PARAM_COLUMNS, GridEvaluator
+from .indicators import IndicatorCache
+from .signals import WindowMaxIndex, window_max_index
+
+SIGNAL_MODE = "atr"
+
+DETAIL_COLUMNS = [
+    "window_id", "train_months", "test_months", "lookback", "minDrop", "TP", "SL",
+    "train_score", "train_return_pct", "train_win_rate", "train_max_dd", "train_trades",
+    "test_return_pct", "test_win_rate", "test_max_dd", "test_trades", "test_signals", "opt_time_secs",
+]
+
+# 训练集目标函数（同 R score_result：交易数不足或收益非正时为 0）
+WF_SCORE_WEIGHTS = {"return": 0.45, "drawdown": 0.30, "win_rate": 0.05, "trades": 0.20}
+WF_SCORE_MAX_RETURN = 500
+WF_SCORE_MAX_TRADES = 250
+
+# 参数取值步长（minDrop/TP/SL 四舍五入到 0.05）
+PARAM_STEP = 0.05
+
+# fwrite 默认输出 15 位有效数字
+CSV_FLOAT_FORMAT = "%.15g"
+
+
+@dataclass(frozen=True)
+class WalkForwardConfig:
+    """Walk-Forward 设置（默认值同 R 脚本的命令行默认值）"""
+
+    train_months: int = 12
+    test_months: int = 1
+    last_windows: int = 12
+    atr_length: int = 14
+    lookback_min: int = 2
+    lookback_max: int = 20
+    drop_min: float = 4.0
+    drop_max: float = 12.0
+    tp_min: float = 1.0
+    tp_max: float = 8.0
+    sl_min: float = 1.0
+    sl_max: float = 6.0
+    phase1: int = 200
+    phase2: int = 200
+    min_trades_train: int = 10
+    seed_base: int = 20260120
+    initial_capital: float = 10000
+    fee_rate: float = 0.00075
+    exit_mode: str = "close"
+    # 增量模式：同一数据集的窗口在一个任务内顺序执行，训练集评估复用按月缓存的交易分段（见 engine.incremental）
+    incremental: bool = False
+    # 指标磁盘缓存目录（None 为不使用），多个工作进程共享
+    indicator_cache: str | None = None
+
+    def open_indicator_cache(self) -> IndicatorCache | None:
+        return IndicatorCache(self.indicator_cache) if self.indicator_cache else None
+
+    def for_timeframe(self, timeframe: str) -> WalkForwardConfig:
+        """短周期减少采样数与窗口数（同 R tf_config：5m 取 75%）"""
+        if timeframe != "5m":
+            return self
+        return replace(self,
+                       phase1=max(80, round(self.phase1 * 0.75)),
+                       phase2=max(80, round(self.phase2 * 0.75)),
+                       last_windows=max(6, min(12, round(self.last_windows * 0.75))))
+
+
+@dataclass(frozen=True)
+class Window:
+    window_id: int
+    train_months: tuple[str, ...]
+    test_months: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class WalkForwardTask:
+    """一个 (数据集, 窗口) 任务；train/test 为数据集内的K线区间 [start, stop)"""
+
+    dataset: str
+    window: Window
+    train: tuple[int, int]
+    test: tuple[int, int]
+    config: WalkForwardConfig
+
+    @property
+    def cost(self) -> int:
+        """估计开销：训练K线数 × 采样数"""
+        return (self.train[1] - self.train[0]) * (self.config.phase1 + self.config.phase2)
+
+
+@dataclass(frozen=True)
+class IncrementalTask:
+    """增量模式下一个数据集的全部窗口（按 window_id 顺序执行）"""
+
+    dataset: str
+    windows: tuple[WalkForwardTask, ...]
+    months: dict[str, tuple[int, int]]
+    config: WalkForwardConfig
+
+    @property
+    def cost(self) -> int:
+        """估计开销：涉及的训练K线数 × 采样数（每个月只模拟一次）"""
+        start = self.windows[0].train[0]
+        stop = self.windows[-1].train[1]
+        return (stop - start) * (self.config.phase1 + self.config.phase2)
+
+
+def split_symbol_timeframe(dataset: str) -> tuple[str, str]:
+    """`PEPEUSDT_15m` -> ("PEPEUSDT", "15m")"""
+    parts = dataset.split("_")
+    if len(parts) < 2:
+        raise ValueError(f"数据集名应为 SYMBOL_TF 形式: {dataset}")
+    return parts[0], parts[1]
+
+
+def month_ranges(index: pd.DatetimeIndex) -> dict[str, tuple[int, int]]:
+    """按自然月划分已排序的K线索引，返回 {"YYYY-MM": (start, stop)}（只含有数据的月份）"""
+    if len(index) == 0:
+        return {}
+    key = np.asarray(index.year, dtype=np.int64) * 12 + np.asarray(index.month, dtype=np.int64) - 1
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(key)) + 1])
+    stops = np.append(starts[1:], len(key))
+    return {f"{key[s] // 12:04d}-{key[s] % 12 + 1:02d}": (int(s), int(e)) for s, e in zip(starts, stops)}
+
+
+def rolling_windows(months: list[str], train_size: int, test_size: int = 1) -> list[Window]:
+    """滚动窗口：训练 train_size 个月，紧接着测试 test_size 个月，每次前移一个月"""
+    return [Window(i + 1, tuple(months[i:i + train_size]),
+                   tuple(months[i + train_size:i + train_size + test_size]))
+            for i in range(len(months) - train_size - test_size + 1)]
+
+
+def wf_score(return_pct: np.ndarray, win_rate: np.ndarray, max_dd: np.ndarray, trades: np.ndarray,
+             min_trades: int = 10) -> np.ndarray:
+    """Score = 0.45×收益率 + 0.30×回撤控制 + 0.05×胜率 + 0.20×交易数量"""
+    return_pct = np.asarray(return_pct, dtype=np.float64)
+    win_rate = np.asarray(win_rate, dtype=np.float64)
+    max_dd = np.asarray(max_dd, dtype=np.float64)
+    trades = np.asarray(trades, dtype=np.float64)
+    score = (WF_SCORE_WEIGHTS["return"] * np.minimum(return_pct / WF_SCORE_MAX_RETURN, 1.0)
+             + WF_SCORE_WEIGHTS["drawdown"] * (1 - np.abs(max_dd) / 100)
+             + WF_SCORE_WEIGHTS["win_rate"] * (win_rate / 100)
+             + WF_SCORE_WEIGHTS["trades"] * np.minimum(np.sqrt(trades) / np.sqrt(WF_SCORE_MAX_TRADES), 1.0))
+    valid = (np.isfinite(trades) & (trades >= min_trades) & np.isfinite(return_pct) & (return_pct > 0)
+             & np.isfinite(max_dd) & np.isfinite(win_rate))
+    return np.where(valid, score, 0.0)
+
+
+def _round_step(values: np.ndarray) -> np.ndarray:
+    return np.round(values / PARAM_STEP) * PARAM_STEP
+
+
+def sample_params(rng: np.random.Generator, n: int, config: WalkForwardConfig) -> pd.DataFrame:
+    """第一阶段：在搜索空间内均匀随机采样"""
+    return pd.DataFrame({
+        "lookback": rng.integers(config.lookback_min, config.lookback_max + 1, n),
+        "minDrop": _round_step(rng.uniform(config.drop_min, config.drop_max, n)),
+        "TP": _round_step(rng.uniform(config.tp_min, config.tp_max, n)),
+        "SL": _round_step(rng.uniform(config.sl_min, config.sl_max, n)),
+    })
+
+
+def refine_params(rng: np.random.Generator, top: pd.DataFrame, n: int, config: WalkForwardConfig) -> pd.DataFrame:
+    """第二阶段：从候选中随机选一组，加正态扰动后截断到搜索空间"""
+    base = top.iloc[rng.integers(0, len(top), n)]
+    lookback = np.round(base["lookback"].to_numpy() + rng.normal(0, 2, n))
+    return pd.DataFrame({
+        "lookback": np.clip(lookback, config.lookback_min, config.lookback_max).astype(np.int64),
+        "minDrop": _round_step(np.clip(base["minDrop"].to_numpy() + rng.normal(0, 0.8, n),
+                                       config.drop_min, config.drop_max)),
+        "TP": _round_step(np.clip(base["TP"].to_numpy() + rng.normal(0, 1.0, n), config.tp_min, config.tp_max)),
+        "SL": _round_step(np.clip(base["SL"].to_numpy() + rng.normal(0, 1.0, n), config.sl_min, config.sl_max)),
+    })
+
+
+def _rank(results: pd.DataFrame) -> pd.DataFrame:
+    # 同 R setorder(-score, -return_pct, max_dd)
+    return results.sort_values(["score", "return_pct", "max_dd"], ascending=[False, False, True],
+                               kind="stable", na_position="last").reset_index(drop=True)
+
+
+def optimize_window(train_data: pd.DataFrame | Mapping[str, np.ndarray] | None, config: WalkForwardConfig,
+                    seed: int, evaluate: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+                    candidates: pd.DataFrame | None = None,
+                    window_index: WindowMaxIndex | None = None) -> pd.DataFrame:
+    """两阶段随机搜索，返回按目标函数排序的全部评估结果（第一行为最优参数）
+
+    Args:
+        train_data: 训练集 OHLC（提供 evaluate 时可为 None）
+        seed: 窗口种子，第一/二阶段分别使用 seed+1 / seed+2
+        evaluate: 自定义评估函数（参数表 -> GRID_COLUMNS 结果表）；默认在 train_data 上构建 GridEvaluator
+        candidates: 第一阶段的候选参数表；默认按 seed+1 随机采样 config.phase1 组
+        window_index: 训练集 High 的 `WindowMaxIndex`，传给 GridEvaluator
+    """
+    if evaluate is None:
+        evaluator = GridEvaluator(train_data, initial_capital=config.initial_capital, fee_rate=config.fee_rate,
+                                  exit_mode=config.exit_mode, signal_mode=SIGNAL_MODE,
+                                  atr_length=config.atr_length, window_index=window_index,
+                                  indicator_cache=config.open_indicator_cache())
+        evaluate = evaluator.evaluate
+
+    def run(params: pd.DataFrame) -> pd.DataFrame:
+        results = evaluate(params)
+        results["score"] = wf_score(results["return_pct"], results["win_rate"], results["max_dd"],
+                                    results["trades"], config.min_trades_train)
+        return results
+
+    if candidates is None:
+        candidates = sample_params(np.random.default_rng(seed + 1), config.phase1, config)
+    phase1 = _rank(run(candidates))
+    keep_n = max(10, round(len(phase1) * 0.15))
+    top = phase1.head(keep_n)
+    positive = top[top["score"] > 0]
+    if len(positive) >= 3:
+        top = positive
+
+    phase2 = run(refine_params(np.random.default_rng(seed + 2), top, config.phase2, config))
+    return _rank(pd.concat([phase1, phase2], ignore_index=True))
+
+
+# 工作进程中的数据集：{数据集名: {"Open": ..., "High": ..., "Low": ..., "Close": ...}}
+_DATASETS: dict[str, dict[str, np.ndarray]] = {}
+
+
+def _init_worker(datasets: dict[str, dict[str, np.ndarray]]) -> None:
+    _DATASETS.clear()
+    _DATASETS.update(datasets)
+
+
+def _slice(arrays: Mapping[str, np.ndarray], bounds: tuple[int, int]) -> dict[str, np.ndarray]:
+    start, stop = bounds
+    return {name: values[start:stop] for name, values in arrays.items()}
+
+
+def run_task(task: WalkForwardTask) -> dict:
+    """执行一个窗口：训练集优化 + 测试集回测，返回明细表的一行"""
+    config = task.config
+    arrays = _DATASETS[task.dataset]
+    window = task.window
+
+    opt_start = time.perf_counter()
+    window_index = window_max_index(arrays["High"], key=task.dataset).rows(*task.train)
+    results = optimize_window(_slice(arrays, task.train), config, config.seed_base + window.window_id * 1000,
+                              window_index=window_index)
+    opt_secs = time.perf_counter() - opt_start
+    return _window_row(arrays, task, results.iloc[0], opt_secs)
+
+
+def _window_row(arrays: Mapping[str, np.ndarray], task: WalkForwardTask, best: pd.Series, opt_secs: float) -> dict:
+    # 最优参数在测试月上回测（测试集单独切片，同 R 版）
+    config = task.config
+    window = task.window
+    test = backtest_tradingview_aligned(
+        _slice(arrays, task.test),
+        lookback_bars=int(best["lookback"]),
+        min_drop_percent=best["minDrop"],
+        take_profit_percent=best["TP"],
+        stop_loss_percent=best["SL"],
+        initial_capital=config.initial_capital,
+        fee_rate=config.fee_rate,
+        exit_mode=config.exit_mode,
+        signal_mode=SIGNAL_MODE,
+        atr_length=config.atr_length,
+    )
+
+    return {
+        "window_id": window.window_id,
+        "train_months": "|".join(window.train_months),
+        "test_months": "|".join(window.test_months),
+        "lookback": int(best["lookback"]),
+        "minDrop": best["minDrop"],
+        "TP": best["TP"],
+        "SL": best["SL"],
+        "train_score": best["score"],
+        "train_return_pct": best["return_pct"],
+        "train_win_rate": best["win_rate"],
+        "train_max_dd": best["max_dd"],
+        "train_trades": int(best["trades"]),
+        "test_return_pct": test.return_percent,
+        "test_win_rate": test.win_rate,
+        "test_max_dd": test.max_drawdown,
+        "test_trades": test.trade_count,
+        "test_signals": test.signal_count,
+        "opt_time_secs": opt_secs,
+    }
+
+
+def run_incremental_task(task: IncrementalTask) -> list[dict]:
+    """增量模式：按顺序执行一个数据集的全部窗口
+
+    - 跌幅序列在「首个训练月 ~ 最后一个训练月」的数据上只计算一次，训练集评估使用 IncrementalEvaluator，
+      每个 (月, 参数) 的交易分段只模拟一次
+    - 第一阶段候选固定为按 seed_base+1 采样的一组参数（各窗口相同，才能复用月分段），
+      再加上一个窗口排名靠前的参数（热启动）；第二阶段仍按窗口种子在当前排名靠前的参数附近精细采样
+    """
+    from .incremental import IncrementalEvaluator
+
+    config = task.config
+    arrays = _DATASETS[task.dataset]
+    start = task.windows[0].train[0]
+    stop = task.windows[-1].train[1]
+    months = {m: (a - start, b - start) for m, (a, b) in task.months.items() if start <= a and b <= stop}
+    evaluator = IncrementalEvaluator(_slice(arrays, (start, stop)), months,
+                                     initial_capital=config.initial_capital, fee_rate=config.fee_rate,
+                                     exit_mode=config.exit_mode, signal_mode=SIGNAL_MODE,
+                                     atr_length=config.atr_length,
+                                     indicator_cache=config.open_indicator_cache())
+    fixed = sample_params(np.random.default_rng(config.seed_base + 1), config.phase1, config)
+    keep_n = max(10, round(config.phase1 * 0.15))
+
+    rows = []
+    carried = fixed.iloc[:0]
+    for window_task in task.windows:
+        window = window_task.window
+        candidates = pd.concat([fixed, carried], ignore_index=True).drop_duplicates(ignore_index=True)
+        opt_start = time.perf_counter()
+        results = optimize_window(None, config, config.seed_base + window.window_id * 1000,
+                                  evaluate=lambda params: evaluator.evaluate(params, window.train_months),
+                                  candidates=candidates)
+        opt_secs = time.perf_counter() - opt_start
+        carried = results[PARAM_COLUMNS].head(keep_n)
+        rows.append(_window_row(arrays, window_task, results.iloc[0], opt_secs))
+    return rows
+
+
+def _run(task: WalkForwardTask | IncrementalTask) -> list[dict]:
+    if isinstance(task, IncrementalTask):
+        return run_incremental_task(task)
+    return [run_task(task)]
+
+
+def build_tasks(dataset: str, data: pd.DataFrame, config: WalkForwardConfig) -> list[WalkForwardTask]:
+    """生成一个数据集的窗口任务（按时间框架调整采样数，只保留最后 last_windows 个窗口）"""
+    config = config.for_timeframe(split_symbol_timeframe(dataset)[1])
+    ranges = month_ranges(pd.DatetimeIndex(data.index))
+    windows = rolling_windows(list(ranges), config.train_months, config.test_months)
+    if config.last_windows > 0:
+        windows = windows[-config.last_windows:]
+    return [WalkForwardTask(dataset, w,
+                            (ranges[w.train_months[0]][0], ranges[w.train_months[-1]][1]),
+                            (ranges[w.test_months[0]][0], ranges[w.test_months[-1]][1]),
+                            config)
+            for w in windows]
+
+
+def _warm_up_kernel(incremental: bool = False) -> None:
+    # 在 fork 之前编译（或从磁盘缓存加载）numba 内核，避免每个工作进程各自编译一次
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 256)))
+    data = {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close}
+    params = pd.DataFrame({"lookback": [2], "minDrop": [1.0], "TP": [1.0], "SL": [1.0]})
+    if incremental:
+        from .incremental import IncrementalEvaluator
+        IncrementalEvaluator(data, {"0": (0, 128), "1": (128, 256)}, signal_mode=SIGNAL_MODE).evaluate(params, ["0", "1"])
+    else:
+        GridEvaluator(data, signal_mode=SIGNAL_MODE).evaluate(params)
+
+
+def run_walkforward(datasets: Mapping[str, pd.DataFrame],
+                    config: WalkForwardConfig = WalkForwardConfig(),
+                    max_workers: int | None = None,
+                    on_result: Callable[[WalkForwardTask | IncrementalTask, dict], None] | None = None,
+                    ) -> dict[str, pd.DataFrame]:
+    """对多个数据集运行 Walk-Forward
+
+    Args:
+        datasets: {数据集名（SYMBOL_TF）: OHLC DataFrame（DatetimeIndex）}
+        max_workers: 进程数（默认 min(任务数, CPU核数)；1 表示在当前进程串行执行）
+        on_result: 每个窗口完成时的回调（用于打印进度；增量模式下在整个数据集完成时依次回调）
+
+    Returns:
+        {数据集名: 明细表（列为 DETAIL_COLUMNS，按 window_id 排序）}；月份不足、没有窗口的数据集不出现在结果中
+    """
+    tasks = []
+    for name, data in datasets.items():
+        window_tasks = build_tasks(name, data, config)
+        if config.incremental and window_tasks:
+            tasks.append(IncrementalTask(name, tuple(window_tasks), month_ranges(pd.DatetimeIndex(data.index)),
+                                         window_tasks[0].config))
+        else:
+            tasks.extend(window_tasks)
+    # 大任务优先：进程池按提交顺序领取任务
+    tasks.sort(key=lambda t: (-t.cost, t.dataset, t.window.window_id if isinstance(t, WalkForwardTask) else 0))
+
+    arrays = {name: {col: np.ascontiguousarray(data[col], dtype=np.float64)
+                     for col in ("Open", "High", "Low", "Close")}
+              for name, data in datasets.items()}
+    if max_workers is None:
+        max_workers = min(len(tasks), os.cpu_count() or 1)
+
+    rows: dict[str, list[dict]] = {}
+
+    def collect(task: WalkForwardTask | IncrementalTask, results: list[dict]) -> None:
+        rows.setdefault(task.dataset, []).extend(results)
+        if on_result is not None:
+            for row in results:
+                on_result(task, row)
+
+    if max_workers <= 1:
+        _init_worker(arrays)
+        for task in tasks:
+            collect(task, _run(task))
+    else:
+        _warm_up_kernel(config.incremental)
+        mp_context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                                 initializer=_init_worker, initargs=(arrays,)) as executor:
+            futures = {executor.submit(_run, task): task for task in tasks}
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+
+    return {name: pd.DataFrame(rows[name], columns=DETAIL_COLUMNS).sort_values("window_id", ignore_index=True)
+            for name in datasets if name in rows}
+
+
+def _equity_curve(monthly_returns_pct: np.ndarray, initial_capital: float = 10000) -> np.ndarray:
+    return initial_capital * np.cumprod(1 + np.asarray(monthly_returns_pct, dtype=np.float64) / 100)
+
+
+def _max_drawdown(equity: np.ndarray) -> float:
+    if len(equity) == 0:
+        return 0.0
+    peak = np.maximum.accumulate(equity)
+    return min(0.0, float(np.min((equity / peak - 1) * 100)))
+
+
+def _sd(values: pd.Series) -> float:
+    # 同 R sd：样本标准差，有效值少于 2 个时为 NA
+    return float(values.std(ddof=1)) if values.notna().sum() >= 2 else np.nan
+
+
+def summarize_dataset(dataset: str, details: pd.DataFrame, config: WalkForwardConfig) -> dict:
+    """单数据集汇总（列同 R 的 summary_row）"""
+    symbol, timeframe = split_symbol_timeframe(dataset)
+    tf_config = config.for_timeframe(timeframe)
+    returns = details["test_return_pct"]
+    equity = _equity_curve(returns.to_numpy(), config.initial_capital)
+    avg = float(returns.mean())
+    sd = _sd(returns)
+    return {
+        "dataset": dataset,
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "signalMode": SIGNAL_MODE,
+        "atrLength": config.atr_length,
+        "train_months": config.train_months,
+        "test_months": config.test_months,
+        "windows": len(details),
+        "phase1": tf_config.phase1,
+        "phase2": tf_config.phase2,
+        "cumulative_return_pct": (equity[-1] / config.initial_capital - 1) * 100 if len(equity) else np.nan,
+        "max_drawdown_pct": _max_drawdown(equity),
+        "avg_monthly_return_pct": avg,
+        "sd_monthly_return_pct": sd,
+        "sharpe_ratio": avg / sd * np.sqrt(12) if np.isfinite(sd) and sd > 0 else np.nan,
+        "pos_months": int((returns > 0).sum()),
+        "neg_months": int((returns < 0).sum()),
+        "zero_months": int((returns == 0).sum()),
+        "lookback_mean": details["lookback"].mean(),
+        "lookback_sd": _sd(details["lookback"]),
+        "dropATR_mean": details["minDrop"].mean(),
+        "dropATR_sd": _sd(details["minDrop"]),
+        "TP_mean": details["TP"].mean(),
+        "TP_sd": _sd(details["TP"]),
+        "SL_mean": details["SL"].mean(),
+        "SL_sd": _sd(details["SL"]),
+    }
+
+
+def _f2(value: float) -> str:
+    # 同 R sprintf("%.2f", NA) -> "NA"
+    return "NA" if pd.isna(value) else f"{value:.2f}"
+
+
+def format_dataset_summary_md(summary: Mapping, detail_file: str) -> list[str]:
+    return [
+        f"# ATR Walk-Forward Summary — {summary['dataset']}",
+        "",
+        f"- signalMode: `atr` (atrLength={summary['atrLength']})",
+        f"- train/test: {summary['train_months']}/{summary['test_months']} months, windows={summary['windows']}",
+        f"- cumulative out-of-sample return: {_f2(summary['cumulative_return_pct'])}%",
+        f"- max drawdown (OS equity curve): {_f2(summary['max_drawdown_pct'])}%",
+        f"- avg monthly return: {_f2(summary['avg_monthly_return_pct'])}% "
+        f"(sd {_f2(summary['sd_monthly_return_pct'])}%), Sharpe~{_f2(summary['sharpe_ratio'])}",
+        f"- OS months: +{summary['pos_months']} / -{summary['neg_months']} / 0={summary['zero_months']}",
+        "",
+        "## Parameter stability",
+        "",
+        f"- lookback: mean={_f2(summary['lookback_mean'])} sd={_f2(summary['lookback_sd'])}",
+        f"- dropATR:  mean={_f2(summary['dropATR_mean'])} sd={_f2(summary['dropATR_sd'])}",
+        f"- TP%:     mean={_f2(summary['TP_mean'])} sd={_f2(summary['TP_sd'])}",
+        f"- SL%:     mean={_f2(summary['SL_mean'])} sd={_f2(summary['SL_sd'])}",
+        "",
+        f"Details CSV: `{detail_file}`",
+    ]
+
+
+def _write_lines(lines: list[str], path: Path) -> None:
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def write_dataset_outputs(dataset: str, details: pd.DataFrame, summary: Mapping,
+                          output_dir: str | Path) -> tuple[Path, Path]:
+    """写出 `<dataset>_atr_wf_details.csv` 与 `<dataset>_atr_wf_summary.md`"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    detail_file = output_dir / f"{dataset}_atr_wf_details.csv"
+    details.to_csv(detail_file, index=False, float_format=CSV_FLOAT_FORMAT)
+    summary_file = output_dir / f"{dataset}_atr_wf_summary.md"
+    _write_lines(format_dataset_summary_md(summary, detail_file.as_posix()), summary_file)
+    return detail_file, summary_file
+
+
+def write_round_summary(summaries: list[dict], config: WalkForwardConfig, symbols: list[str],
+                        timeframes: list[str], report_dir: str | Path) -> tuple[Path, Path]:
+    """写出整轮汇总 `multitimeframe_atr_walkforward_summary.{csv,md}`（按币种、样本外累计收益排序）"""
+    report_dir = Path(report_dir)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    table = pd.DataFrame(summaries).sort_values(["symbol", "cumulative_return_pct"], ascending=[True, False],
+                                                kind="stable", ignore_index=True)
+    summary_csv = report_dir / "multitimeframe_atr_walkforward_summary.csv"
+    table.to_csv(summary_csv, index=False, float_format=CSV_FLOAT_FORMAT)
+
+    c = config
+    lines = [
+        "# Multi-timeframe ATR Walk-Forward Summary",
+        "",
+        f"- symbols: {', '.join(symbols)}",
+        f"- timeframes: {', '.join(timeframes)}",
+        f"- train/test: {c.train_months}/{c.test_months} months, last_windows(default)={c.last_windows}",
+        f"- signalMode: `atr` (atrLength={c.atr_length})",
+        f"- search: lookback[{c.lookback_min},{c.lookback_max}], dropATR[{c.drop_min:.2f},{c.drop_max:.2f}], "
+        f"TP%[{c.tp_min:.2f},{c.tp_max:.2f}], SL%[{c.sl_min:.2f},{c.sl_max:.2f}]",
+        "",
+        "## Results (ranked by cumulative OOS return within each symbol)",
+        "",
+    ]
+    for symbol, rows in table.groupby("symbol", sort=False):
+        lines += [f"### {symbol}", ""]
+        for row in rows.itertuples():
+            lines.append(f"- {row.timeframe}: OOS {_f2(row.cumulative_return_pct)}%, "
+                         f"maxDD {_f2(row.max_drawdown_pct)}%, Sharpe {_f2(row.sharpe_ratio)}, windows {row.windows}")
+        lines.append("")
+    lines.append(f"Summary CSV: `{summary_csv.as_posix()}`")
+
+    summary_md = report_dir / "multitimeframe_atr_walkforward_summary.md"
+    _write_lines(lines, summary_md)
+    return summary_csv, summary_md
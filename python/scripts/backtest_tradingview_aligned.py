@@ -0,0 +1,82 @@
+"""
+TradingView 对齐版回测（Python 版，无需 R）
+读取 OHLCV 文件，运行 `engine.backtest.backtest_tradingview_aligned`，
+按 R 版 `format_trades_df` 的格式写出 outputs/trades_tradingview_aligned.csv，供后续分析脚本直接使用。
+
+用法:
+    python python/scripts/backtest_tradingview_aligned.py --data PEPEUSDT_15m.csv --lookback 3 --drop 20 --tp 10 --sl 10
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine.backtest import backtest_tradingview_aligned, write_trades_csv  # noqa: E402
+from engine.ohlcv import read_ohlcv  # noqa: E402
+from engine.trades import TRADES_CSV  # noqa: E402
+
+parser = argparse.ArgumentParser(description="TradingView对齐版回测（Python）")
+parser.add_argument("--data", required=True,
+                    help="OHLCV 文件（CSV/Parquet，第一列为K线时间，需含 Open/High/Low/Close 列）")
+parser.add_argument("--lookback", type=int, required=True, help="回看K线数量（R 中的 lookbackDays）")
+parser.add_argument("--drop", type=float, required=True, help="最小跌幅（absolute: 百分比；atr: ATR倍数）")
+parser.add_argument("--tp", type=float, required=True, help="止盈百分比")
+parser.add_argument("--sl", type=float, required=True, help="止损百分比")
+parser.add_argument("--capital", type=float, default=10000, help="初始资金（默认10000）")
+parser.add_argument("--fee", type=float, default=0.00075, help="手续费率（默认0.00075）")
+parser.add_argument("--exit-mode", choices=["close", "tradingview"], default="close", help="出场模式（默认close）")
+parser.add_argument("--signal-mode", choices=["absolute", "atr"], default="absolute", help="信号模式（默认absolute）")
+parser.add_argument("--atr-length", type=int, default=14, help="ATR周期（默认14）")
+parser.add_argument("--exclude-current-bar", action="store_true", help="信号窗口排除当前K线（ta.highest(...)[1]）")
+parser.add_argument("--cooldown", type=int, default=0, help="出场后的冷却K线数（默认0，不限制）")
+parser.add_argument("--max-daily", type=int, default=0, help="每日最多入场次数（默认0，不限制）")
+parser.add_argument("--min-hold", type=int, default=1, help="最少持有K线数后才检查止盈止损（默认1）")
+parser.add_argument("--output", default=str(TRADES_CSV), help=f"交易明细输出路径（默认 {TRADES_CSV}）")
+args = parser.parse_args()
+
+data_path = Path(args.data)
+data = read_ohlcv(data_path)
+
+print(f"数据: {data_path} ({len(data)} 根K线)")
+
+start = time.perf_counter()
+result = backtest_tradingview_aligned(
+    data,
+    lookback_bars=args.lookback,
+    min_drop_percent=args.drop,
+    take_profit_percent=args.tp,
+    stop_loss_percent=args.sl,
+    initial_capital=args.capital,
+    fee_rate=args.fee,
+    include_current_bar=not args.exclude_current_bar,
+    exit_mode=args.exit_mode,
+    signal_mode=args.signal_mode,
+    atr_length=args.atr_length,
+    cooldown_bars=args.cooldown,
+    max_trades_per_day=args.max_daily,
+    min_holding_bars=args.min_hold,
+)
+elapsed = time.perf_counter() - start
+
+print("\n=== TradingView对齐版回测 ===")
+print(f"参数: lookback={args.lookback}, drop={args.drop}, TP={args.tp}%, SL={args.sl}%, exitMode={args.exit_mode}")
+if args.cooldown or args.max_daily or args.min_hold != 1:
+    print(f"交易节奏规则: 冷却 {args.cooldown} 根K线, 每日最多 {args.max_daily or '不限'} 笔, 最少持有 {args.min_hold} 根K线")
+print(f"信号数: {result.signal_count}")
+print(f"交易数: {result.trade_count}")
+print(f"被忽略信号: {result.ignored_signal_count}")
+if result.error is not None:
+    print(f"[WARN] {result.error}")
+print(f"收益率: {result.return_percent:.2f}%")
+print(f"胜率: {result.win_rate:.2f}%")
+print(f"最大回撤: {result.max_drawdown:.2f}%")
+print(f"总手续费: {result.total_fees:.2f} USDT")
+print(f"止盈/止损/同时触发: {result.tp_count}/{result.sl_count}/{result.both_trigger_count}")
+print(f"执行时间: {elapsed:.3f}秒")
+
+output = Path(args.output)
+output.parent.mkdir(parents=True, exist_ok=True)
+write_trades_csv(result, output)
+print(f"\n已保存: {output}")
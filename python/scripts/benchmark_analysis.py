@@ -0,0 +1,123 @@
+"""
+分析流程基准测试（engine.benchmark）
+按固定种子生成 10^3 ~ 10^7 行的合成交易表与K线，逐项计时：交易明细解析、四个分析阶段脚本、
+暴跌信号生成（absolute/atr）与交易时间线绘制。每项在独立进程中运行，记录墙钟时间、CPU 时间与峰值 RSS。
+
+结果写入 --output（JSON），并与 --baseline 比较：任一项墙钟时间或峰值内存超出容差时列出回归项并以退出码 1 结束。
+--update-baseline 把本次结果存为新基线。基线不存在时无法比较，以退出码 2 结束
+（不作为回归门槛、只想记录结果时加 --allow-missing-baseline）；基线中没有的项会单独列出。
+
+用法:
+    python python/scripts/benchmark_analysis.py --rows 1e3,1e4,1e5
+    python python/scripts/benchmark_analysis.py --rows 1e5 --repeat 3 --update-baseline
+    python python/scripts/benchmark_analysis.py --rows 1e6 --only stage: --dpi 100
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine.benchmark import (  # noqa: E402
+    BASELINE_PATH,
+    BenchmarkError,
+    analysis_suite,
+    compare_to_baseline,
+    load_results,
+    prepare_workdir,
+    run_benchmark,
+    write_results,
+)
+from engine.plotting import DPI_ENV  # noqa: E402
+
+
+def parse_rows(text):
+    return [int(float(part)) for part in text.split(",") if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分析流程基准测试")
+    parser.add_argument("--rows", default="1e3,1e4,1e5", help="数据规模，逗号分隔（默认 1e3,1e4,1e5，最大建议 1e7）")
+    parser.add_argument("--seed", type=int, default=0, help="合成数据随机种子（默认0）")
+    parser.add_argument("--repeat", type=int, default=1, help="每项重复次数，取最快一次（默认1）")
+    parser.add_argument("--only", default="", help="只运行名称包含这些子串的基准（逗号分隔，如 stage:,signals:）")
+    parser.add_argument("--workdir", default=None, help="合成数据目录（默认系统临时目录；同种子时复用）")
+    parser.add_argument("--timeout", type=float, default=1800, help="单项超时秒数（默认1800）")
+    parser.add_argument("--dpi", type=int, default=None, help=f"阶段脚本的图表DPI（设置 {DPI_ENV}）")
+    parser.add_argument("--output", default="outputs/benchmarks/latest.json", help="结果 JSON")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="基线 JSON")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果写为基线")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="基线不存在时只给出警告并跳过比较（默认以退出码 2 结束）")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="墙钟时间容差（默认0.25，即慢25%%判为回归）")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="峰值内存容差（默认0.25）")
+    args = parser.parse_args()
+
+    if args.dpi is not None:
+        os.environ[DPI_ENV] = str(args.dpi)
+
+    sizes = parse_rows(args.rows)
+    only = [s.strip() for s in args.only.split(",") if s.strip()]
+    root = Path(args.workdir) if args.workdir else Path(tempfile.gettempdir()) / "insert_pin_benchmarks"
+
+    measurements = []
+    failures = []
+    for rows in sizes:
+        start = time.perf_counter()
+        workdir = prepare_workdir(root, rows, seed=args.seed)
+        print(f"\n=== {rows} 行（数据 {workdir}，准备 {time.perf_counter() - start:.1f}秒） ===")
+        for benchmark in analysis_suite(workdir, rows):
+            if only and not any(s in benchmark.name for s in only):
+                continue
+            try:
+                m = run_benchmark(benchmark, repeat=args.repeat, timeout=args.timeout)
+            except BenchmarkError as e:
+                failures.append(str(e))
+                print(f"  {benchmark.name:<40} 失败")
+                continue
+            measurements.append(m)
+            print(f"  {m.name:<40} 墙钟 {m.wall_s:9.3f}秒  CPU {m.cpu_s:9.3f}秒  峰值RSS {m.peak_rss_mb:9.1f}MB")
+
+    meta = {"rows": sizes, "seed": args.seed, "repeat": args.repeat}
+    write_results(measurements, args.output, **meta)
+    print(f"\n结果: {args.output}")
+
+    for message in failures:
+        print(f"\n[FAIL] {message}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        write_results(measurements, baseline_path, **meta)
+        print(f"已更新基线: {baseline_path}")
+        sys.exit(1 if failures else 0)
+
+    if not baseline_path.exists():
+        if args.allow_missing_baseline:
+            print(f"\n[WARN] 未找到基线 {baseline_path}，未做回归比较（用 --update-baseline 创建）")
+            sys.exit(1 if failures else 0)
+        print(f"\n[FAIL] 未找到基线 {baseline_path}，无法做回归比较。"
+              f"先在基准机器上用 --update-baseline 创建，或加 --allow-missing-baseline 只记录结果")
+        sys.exit(2)
+
+    baseline = load_results(baseline_path)
+    unbaselined = [m.key for m in measurements if m.key not in baseline]
+    if unbaselined:
+        print(f"\n[WARN] 基线中没有以下 {len(unbaselined)} 项，未比较（用 --update-baseline 补充）:")
+        for key in unbaselined:
+            print(f"  - {key}")
+    comparison = compare_to_baseline(measurements, baseline,
+                                     time_tolerance=args.time_tolerance, memory_tolerance=args.memory_tolerance)
+    regressions = [row for row in comparison if row["regressed"]]
+    print(f"\n与基线比较: {len(comparison)} 项指标，回归 {len(regressions)} 项")
+    for row in regressions:
+        print(f"  [REGRESSION] {row['key']:<40} {row['metric']:<12} "
+              f"基线 {row['baseline']:.3f} -> 当前 {row['current']:.3f} ({row['ratio']:.2f}x)")
+
+    sys.exit(1 if regressions or failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+构建内存映射列式 K线存储（engine.store）
+两种来源：
+
+- `--rdata data/liaochu.RData`：调用 `r/scripts/format/export_cryptodata_columns.R` 把 cryptodata
+  按列导出为原始 float64 文件，再写入存储（需要 Rscript 与 xts）
+- `--source-dir data/ohlcv`：读取已导出的 `<SYMBOL>_<TF>.parquet` / `.csv`
+
+来源文件的大小与修改时间记入索引，未变化的数据集默认跳过（--force 强制重建）。
+`--rdata` 在调用 R 之前就比对指纹：RData 未变化且所需数据集都已由它写入时，直接跳过导出。
+单个数据集写入失败（如时间列有重复K线）时报告并继续转换其余数据集，结束时以退出码 1 返回。
+来源中已不存在的数据集（RData 中删除的、目录中删除的文件）默认只列出，加 --prune 时从存储中删除。
+多个转换进程可以同时运行：索引的读-改-写在文件锁内完成（见 engine.store）。
+转换后与 `data_catalog/datasets_info.csv` 的K线数逐一核对。
+
+用法:
+    python python/scripts/build_ohlcv_store.py --rdata data/liaochu.RData
+    python python/scripts/build_ohlcv_store.py --source-dir data/ohlcv --store data/store
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine.ohlcv import OHLCV_COLUMNS, OHLCV_SUFFIXES, read_ohlcv  # noqa: E402
+from engine.store import STORE_DIR, OHLCVStore  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+R_EXPORTER = REPO_ROOT / "r" / "scripts" / "format" / "export_cryptodata_columns.R"
+
+parser = argparse.ArgumentParser(description="构建内存映射列式 K线存储")
+source = parser.add_mutually_exclusive_group(required=True)
+source.add_argument("--rdata", help="R 数据文件（cryptodata 列表），如 data/liaochu.RData")
+source.add_argument("--source-dir", help="CSV/Parquet 数据目录，如 data/ohlcv")
+parser.add_argument("--store", default=str(STORE_DIR), help="存储目录（默认 data/store）")
+parser.add_argument("--datasets", default="", help="只转换这些数据集（逗号分隔，默认全部）")
+parser.add_argument("--catalog", default="data_catalog/datasets_info.csv", help="用于核对K线数的数据目录")
+parser.add_argument("--force", action="store_true", help="来源未变化也重新写入")
+parser.add_argument("--prune", action="store_true", help="删除来源中已不存在的数据集")
+args = parser.parse_args()
+
+only = {s.strip() for s in args.datasets.split(",") if s.strip()}
+store = OHLCVStore(args.store)
+
+
+def fingerprint(path: Path) -> dict:
+    stat = path.stat()
+    return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+FINGERPRINT_KEYS = ("path", "size", "mtime_ns")
+
+
+def same_source(recorded: dict, source_info: dict) -> bool:
+    return all(recorded.get(key) == source_info[key] for key in FINGERPRINT_KEYS)
+
+
+def unchanged(name: str, source_info: dict) -> bool:
+    return not args.force and name in store and same_source(store.entry(name)["source"], source_info)
+
+
+def rdata_up_to_date(source_info: dict) -> list[str] | None:
+    """RData 未变化、所需数据集都已由它写入时返回这些数据集（无需调用 R），否则返回 None"""
+    if args.force:
+        return None
+    if only:
+        return sorted(only) if all(unchanged(name, source_info) for name in only) else None
+    # 未指定 --datasets 时，只有上一次完整导出（selection=all）且清单中的数据集（exported 个）全部写入成功，
+    # 才能说明 RData 中的数据集都已在存储里；有数据集写入失败时下次重新导出
+    names = [name for name in store.names()
+             if same_source(store.entry(name)["source"], source_info)
+             and store.entry(name)["source"].get("selection") == "all"]
+    if not names or len(names) != store.entry(names[0])["source"].get("exported"):
+        return None
+    return names
+
+
+def store_dataset(name: str, times: np.ndarray, columns: dict, info: dict) -> None:
+    try:
+        store.write(name, times, columns, source=info)
+    except ValueError as e:
+        failed[name] = str(e)
+        print(f"[FAIL] {name}: {e}")
+        return
+    written.append(name)
+    print(f"写入 {name} ({len(times)} 根K线)")
+
+
+def stale_datasets(from_source, present: set[str]) -> list[str]:
+    """由同一来源写入、但本次转换中已不存在的数据集"""
+    return [name for name in store.names()
+            if from_source(store.entry(name)["source"].get("path", "")) and name not in present]
+
+
+written = []
+skipped = []
+failed = {}
+stale = []
+start = time.perf_counter()
+
+if args.rdata:
+    rdata = Path(args.rdata)
+    if not rdata.exists():
+        sys.exit(f"错误: 找不到 {rdata}")
+    source_info = dict(fingerprint(rdata), selection="subset" if only else "all")
+    fresh = rdata_up_to_date(source_info)
+    if fresh is not None:
+        skipped.extend(fresh)
+        print(f"{rdata} 未变化，跳过导出（{len(fresh)} 个数据集）")
+    else:
+        if shutil.which("Rscript") is None:
+            sys.exit("错误: 未找到 Rscript，无法读取 RData（可先导出 CSV/Parquet 后用 --source-dir）")
+        export_dir = Path(tempfile.mkdtemp(prefix="cryptodata_columns_"))
+        try:
+            command = ["Rscript", str(R_EXPORTER), str(export_dir), str(rdata)]
+            if only:
+                command.append(",".join(sorted(only)))
+            subprocess.run(command, check=True, cwd=REPO_ROOT)
+            manifest = pd.read_csv(export_dir / "manifest.csv")
+            for name, rows in zip(manifest["dataset"], manifest["rows"]):
+                info = dict(source_info, dataset=name, exported=len(manifest))
+                if unchanged(name, info):
+                    skipped.append(name)
+                    continue
+                directory = export_dir / name
+                seconds = np.fromfile(directory / "time.f64", dtype="<f8")
+                # R POSIXct 为 epoch 秒（double），按毫秒取整避免浮点误差
+                times = np.round(seconds * 1000).astype(np.int64) * 1_000_000
+                columns = {col: np.fromfile(directory / f"{col}.f64", dtype="<f8")
+                           for col in OHLCV_COLUMNS if (directory / f"{col}.f64").exists()}
+                if len(times) != rows:
+                    failed[name] = f"导出行数 {len(times)} 与清单 {rows} 不一致"
+                    print(f"[FAIL] {name}: {failed[name]}")
+                    continue
+                store_dataset(name, times, columns, info)
+        finally:
+            shutil.rmtree(export_dir, ignore_errors=True)
+        if not only:
+            stale = stale_datasets(lambda path: path == str(rdata), set(manifest["dataset"]))
+else:
+    source_dir = Path(args.source_dir)
+    paths = {}
+    for suffix in reversed(OHLCV_SUFFIXES):
+        # 同名数据集优先 Parquet（后写入的覆盖先写入的）
+        for path in sorted(source_dir.glob(f"*{suffix}")):
+            paths[path.stem] = path
+    for name, path in sorted(paths.items()):
+        if only and name not in only:
+            continue
+        info = fingerprint(path)
+        if unchanged(name, info):
+            skipped.append(name)
+            continue
+        try:
+            data = read_ohlcv(path)
+        except (OSError, ValueError) as e:
+            failed[name] = f"读取失败: {e}"
+            print(f"[FAIL] {name}: {failed[name]}")
+            continue
+        if data.index.tz is not None:
+            data.index = data.index.tz_convert("UTC").tz_localize(None)
+        columns = {col: data[col].to_numpy(dtype=np.float64) for col in OHLCV_COLUMNS if col in data.columns}
+        store_dataset(name, data.index.to_numpy(dtype="datetime64[ns]"), columns, info)
+    if not only:
+        stale = stale_datasets(lambda path: Path(path).parent == source_dir, set(paths))
+
+if stale:
+    if args.prune:
+        for name in stale:
+            store.remove(name)
+        print(f"\n已删除来源中不存在的数据集 {len(stale)} 个: {', '.join(stale)}")
+    else:
+        print(f"\n[WARN] 以下 {len(stale)} 个数据集已不在来源中，仍保留在存储里（加 --prune 删除）:")
+        for name in stale:
+            print(f"  - {name}")
+
+elapsed = time.perf_counter() - start
+print(f"\n完成: 写入 {len(written)} 个，未变化跳过 {len(skipped)} 个，失败 {len(failed)} 个，耗时 {elapsed:.1f}秒")
+print(f"存储: {store.root}")
+for name, message in failed.items():
+    print(f"  [FAIL] {name}: {message}")
+
+catalog_path = Path(args.catalog)
+if catalog_path.exists():
+    expected = pd.read_csv(catalog_path).set_index("dataset")["total_bars"]
+    actual = store.catalog().set_index("dataset")["total_bars"]
+    common = expected.index.intersection(actual.index)
+    mismatched = [name for name in common if int(expected[name]) != int(actual[name])]
+    print(f"与 {catalog_path} 核对: {len(common)} 个数据集，K线数不一致 {len(mismatched)} 个")
+    for name in mismatched:
+        print(f"  - {name}: 目录 {int(expected[name])}，存储 {int(actual[name])}")
+
+if failed:
+    sys.exit(1)
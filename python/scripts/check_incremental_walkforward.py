@@ -0,0 +1,109 @@
+"""
+增量 Walk-Forward 回归检查
+在合成K线（或 --data 指定的 CSV/Parquet）上随机抽取参数组合与连续月份窗口，
+比较 `IncrementalEvaluator.evaluate`（月分段拼接内核）与在窗口切片上直接调用 `run_backtest` 的结果：
+交易数必须相同，胜率、收益率与最大回撤的差异不得超过 --tolerance（百分点）。
+
+参数范围偏向小止盈、浅回撤，使「窗口首根K线即入场」的情形（R 的 cummax(capitalCurve)
+不含入场前资金）能影响最大回撤；输出中会统计这类样本数。任一项超差时以退出码 1 结束。
+
+拼接内核需要 numba；未安装时 evaluate 本身就是逐窗口调用 run_backtest，检查没有意义，直接退出。
+
+用法:
+    python python/scripts/check_incremental_walkforward.py
+    python python/scripts/check_incremental_walkforward.py --rows 100000 --params 200 --seed 7
+    python python/scripts/check_incremental_walkforward.py --data data/ohlcv/PEPEUSDT_15m.parquet
+"""
+
+import argparse
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine.backtest import run_backtest  # noqa: E402
+from engine.incremental import IncrementalEvaluator  # noqa: E402
+from engine.ohlcv import read_ohlcv  # noqa: E402
+from engine.synthetic import synthetic_ohlcv  # noqa: E402
+from engine.walkforward import month_ranges  # noqa: E402
+
+parser = argparse.ArgumentParser(description="增量 Walk-Forward 与 run_backtest 的结果对照")
+parser.add_argument("--data", default=None, help="K线文件（CSV/Parquet）；缺省为合成数据")
+parser.add_argument("--rows", type=int, default=40000, help="合成K线数量（默认40000）")
+parser.add_argument("--bar-minutes", type=int, default=15, help="合成K线周期（分钟，默认15）")
+parser.add_argument("--seed", type=int, default=3, help="随机种子（默认3）")
+parser.add_argument("--params", type=int, default=60, help="参数组合数（默认60）")
+parser.add_argument("--window-months", default="1,2,3", help="窗口月数，逗号分隔（默认 1,2,3）")
+parser.add_argument("--exit-mode", choices=["close", "tradingview"], default="close")
+parser.add_argument("--tolerance", type=float, default=1e-8, help="胜率/收益率/最大回撤允许误差（百分点）")
+args = parser.parse_args()
+
+if importlib.util.find_spec("numba") is None:
+    sys.exit("未安装 numba：IncrementalEvaluator 直接调用 run_backtest，无需对照")
+
+if args.data:
+    data = read_ohlcv(args.data)
+    source = args.data
+else:
+    data = synthetic_ohlcv(args.rows, seed=args.seed, bar_minutes=args.bar_minutes, crash_rate=0.01)
+    source = f"合成数据 rows={args.rows} seed={args.seed}"
+months = month_ranges(data.index)
+names = list(months)
+
+rng = np.random.default_rng(args.seed)
+params = pd.DataFrame({
+    "lookback": rng.integers(2, 8, args.params),
+    "minDrop": rng.uniform(0.3, 3.0, args.params),
+    "TP": rng.uniform(0.1, 3.0, args.params),
+    "SL": rng.uniform(0.5, 20.0, args.params),
+})
+evaluator = IncrementalEvaluator(data, months, exit_mode=args.exit_mode)
+g = evaluator.grid
+print(f"K线: {len(data)} 根，{len(names)} 个月（{source}）")
+print(f"参数组合: {len(params)}，窗口月数: {args.window_months}")
+
+checked = 0
+start_entries = 0
+failures = []
+start = time.perf_counter()
+for size in [int(s) for s in args.window_months.split(",") if s]:
+    for first in range(len(names) - size + 1):
+        window = names[first:first + size]
+        lo, hi = months[window[0]][0], months[window[-1]][1]
+        if hi - lo < 10:
+            continue
+        result = evaluator.evaluate(params, window)
+        for row, p in enumerate(params.itertuples(index=False)):
+            drop, _ = g.drop(int(p.lookback))
+            signals = drop[lo:hi] >= p.minDrop
+            start_entries += bool(signals[0] and g.close[lo] > 0)
+            direct = run_backtest(g.open[lo:hi], g.high[lo:hi], g.low[lo:hi], g.close[lo:hi], signals,
+                                  p.TP, p.SL, initial_capital=g.initial_capital, fee_rate=g.fee_rate,
+                                  exit_mode=args.exit_mode)
+            got = result.iloc[row]
+            expected_return = (direct.final_capital - g.initial_capital) / g.initial_capital * 100
+            wins = int((direct.trades["PnLPercent"] > 0).sum()) if direct.trade_count else 0
+            expected_win_rate = wins / direct.trade_count * 100 if direct.trade_count else 0.0
+            diffs = {
+                "trades": abs(int(got["trades"]) - direct.trade_count),
+                "win_rate": abs(float(got["win_rate"]) - expected_win_rate),
+                "return_pct": abs(float(got["return_pct"]) - expected_return),
+                "max_dd": abs(float(got["max_dd"]) - (direct.max_drawdown if direct.trade_count else 0.0)),
+            }
+            checked += 1
+            if diffs["trades"] or max(diffs["win_rate"], diffs["return_pct"], diffs["max_dd"]) > args.tolerance:
+                failures.append({"window": f"{window[0]}~{window[-1]}", **p._asdict(),
+                                 "max_dd": float(got["max_dd"]), "expected_max_dd": direct.max_drawdown,
+                                 **{f"diff_{k}": v for k, v in diffs.items()}})
+elapsed = time.perf_counter() - start
+
+print(f"\n对照 {checked} 项（其中窗口首根K线入场 {start_entries} 项），耗时 {elapsed:.1f}秒")
+if failures:
+    print(f"[FAIL] {len(failures)} 项超出容差 {args.tolerance}:")
+    print(pd.DataFrame(failures).head(20).to_string(index=False))
+    sys.exit(1)
+print("[OK] 增量评估与 run_backtest 一致")
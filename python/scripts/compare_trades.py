@@ -0,0 +1,76 @@
+"""
+R 回测 vs TradingView 交易对比（engine.matching）
+按入场时间在容差内一一配对两份交易表，输出完全一致 / 时间平移 / 出场不一致的配对，以及多余与缺失的交易。
+
+参考交易可以是单个 TradingView 导出，也可以是导出目录（多币种时配合 --by Symbol，我方交易表需有同名列）。
+
+用法:
+    python python/scripts/compare_trades.py
+    python python/scripts/compare_trades.py --reference exports/tradingview --trades outputs/all_trades.csv --by Symbol
+    python python/scripts/compare_trades.py --tolerance 30min --exact-tolerance 0s --offset 8h
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine.matching import match_trades  # noqa: E402
+from engine.tradingview import TV_TRADES_CSV, load_tradingview_trades  # noqa: E402
+from engine.trades import TRADES_CSV, load_trades  # noqa: E402
+from engine.tvexports import load_tradingview_dir  # noqa: E402
+
+parser = argparse.ArgumentParser(description="R回测与TradingView交易对比")
+parser.add_argument("--trades", default=str(TRADES_CSV), help=f"我方交易明细（默认 {TRADES_CSV}）")
+parser.add_argument("--reference", default=str(TV_TRADES_CSV),
+                    help=f"TradingView 导出文件或目录（默认 {TV_TRADES_CSV}）")
+parser.add_argument("--tolerance", default="15min", help="入场/出场时间配对容差（默认15min）")
+parser.add_argument("--exact-tolerance", default="1min", help="视为完全一致的时间容差（默认1min）")
+parser.add_argument("--offset", default="0s", help="加到 TradingView 时间上的偏移，如时区差 8h（默认0s）")
+parser.add_argument("--by", default=None, help="分组列，如 Symbol（两份交易表都需包含）")
+parser.add_argument("--output-dir", default="outputs", help="结果输出目录（默认 outputs）")
+args = parser.parse_args()
+
+reference_path = Path(args.reference)
+trades = load_trades(args.trades)
+reference = load_tradingview_dir(reference_path) if reference_path.is_dir() else load_tradingview_trades(reference_path)
+print(f"我方交易: {len(trades)} 笔 ({args.trades})")
+print(f"TradingView交易: {len(reference)} 笔 ({reference_path})")
+
+start = time.perf_counter()
+result = match_trades(trades, reference, tolerance=args.tolerance, exact_tolerance=args.exact_tolerance,
+                      reference_offset=args.offset, by=args.by)
+elapsed = time.perf_counter() - start
+
+summary = result.summary()
+print(f"\n配对完成，耗时 {elapsed:.2f}秒")
+print(f"  配对: {summary['matched']} 笔")
+print(f"    完全一致: {summary['exact']} 笔")
+print(f"    时间平移: {summary['shifted']} 笔")
+print(f"    出场不一致: {summary['exit_mismatch']} 笔")
+print(f"  我方多余: {summary['extra']} 笔")
+print(f"  我方缺失: {summary['missing']} 笔")
+if summary["matched"]:
+    print(f"  入场时间偏差中位数: {summary['entry_shift_sec_median']:.0f} 秒")
+    print(f"  出场时间偏差中位数: {summary['exit_shift_sec_median']:.0f} 秒")
+    print(f"  入场价格最大偏差: {summary['entry_price_diff_pct_max']:.4f}%")
+    print(f"  出场价格最大偏差: {summary['exit_price_diff_pct_max']:.4f}%")
+
+if len(result.missing):
+    print("\n我方缺失的 TradingView 交易（前20笔）:")
+    print(result.missing[["EntryTime", "ExitTime", "EntryPrice", "ExitPrice", "PnLPercent"]].head(20).to_string())
+
+output_dir = Path(args.output_dir)
+output_dir.mkdir(parents=True, exist_ok=True)
+outputs = {
+    "交易配对明细.csv": result.matches,
+    "多余交易.csv": result.extra,
+    "缺失交易.csv": result.missing,
+    "交易对比汇总.csv": pd.DataFrame([summary]),
+}
+for name, table in outputs.items():
+    table.to_csv(output_dir / name, index=False, encoding="utf-8-sig")
+print(f"\n已保存: {', '.join(str(output_dir / name) for name in outputs)}")
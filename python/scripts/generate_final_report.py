@@ -2,37 +2,65 @@
 生成最终综合报告
 """
 
-import pandas as pd
-import numpy as np
 from datetime import datetime
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine.cooldown import (  # noqa: E402
+    REFERENCE_DATASET,
+    REFERENCE_HINT,
+    cooldown_sweep,
+    load_reference_ohlcv,
+)
+from engine.metrics import reentry_metrics  # noqa: E402
+from engine.tracing import phase  # noqa: E402
+from engine.tradingview import TV_TRADES_CSV, load_tradingview_trades  # noqa: E402
+from engine.trades import load_trades  # noqa: E402
+
 # 读取分析结果
+phase("load")
 OUTPUT_DIR = Path("outputs")
 REPORTS_DIR = Path("docs/reports")
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
-trades = pd.read_csv(OUTPUT_DIR / 'trades_tradingview_aligned.csv')
-trades['EntryTime'] = pd.to_datetime(trades['EntryTime'])
-trades['ExitTime'] = pd.to_datetime(trades['ExitTime'])
-trades['PnLPercent'] = trades['PnLPercent'].str.rstrip('%').astype(float)
-
-# 计算关键指标
-trades['NextEntryTime'] = trades['EntryTime'].shift(-1)
-trades['ReentryInterval'] = (trades['NextEntryTime'] - trades['ExitTime']).dt.total_seconds() / 60
-valid_intervals = trades['ReentryInterval'].dropna()
-
-# 统计各类情况
-zero_holding = trades[trades['HoldingBars'] == 0]
-same_bar_reentry = trades[trades['ReentryInterval'] == 0]
-quick_reentry_15min = trades[trades['ReentryInterval'] <= 15].dropna(subset=['ReentryInterval'])
-quick_reentry_1hour = trades[trades['ReentryInterval'] <= 60].dropna(subset=['ReentryInterval'])
-quick_reentry_1day = trades[trades['ReentryInterval'] <= 1440].dropna(subset=['ReentryInterval'])
+trades = load_trades(OUTPUT_DIR / 'trades_tradingview_aligned.csv')
+
+phase("compute")
+# 计算关键指标：间隔数组只排序一次，分组计数与分位数都从有序数组取得（见 engine.metrics）
+# TradingView数据（交易清单导出）作为参考交易表
+metrics = reentry_metrics(trades, load_tradingview_trades(TV_TRADES_CSV), high_freq_min_trades=3)
+tv = metrics.reference
+intervals = metrics.intervals
+tv_intervals = tv.intervals  # 分钟
+
+quick_15min = metrics.count_within(15)
+quick_1hour = metrics.count_within(60)
+quick_1day = metrics.count_within(1440)
+buckets = intervals.buckets()
+tv_buckets = tv_intervals.buckets()
+high_freq_days = metrics.high_freq_days
+
+# 冷却期/每日次数上限的影响：在参考K线上重新回测（冷却期会改变之后执行的信号，不能只删除历史短间隔交易）
+reference_data = load_reference_ohlcv()
+cooldown_table = daily_table = None
+if reference_data is not None:
+    cooldown_table = cooldown_sweep(reference_data, [tv_intervals.min, 60, 15])
+    daily_table = cooldown_sweep(reference_data, [0], max_trades_per_day=[3, 5])
+
+
+def rule_effect(table, row):
+    """重新回测结果中第 row 行相对基准的影响（无K线数据时给出说明）"""
+    if table is None:
+        return f"需 {REFERENCE_DATASET} K线数据重新回测（{REFERENCE_HINT}）"
+    # 混合类型的行取出后整数列会变成 float，格式化前转回 int
+    r = table.iloc[row]
+    return (f"交易 {int(r['trades'])} 笔（{int(r['trade_change']):+d}，{float(r['trade_change_pct']):+.1f}%），"
+            f"收益 {float(r['return_pct']):.1f}%，回撤 {float(r['max_dd']):.1f}%")
 
-# TradingView数据
-tv_intervals = [104, 53, 54, 62, 38, 14, 14, 572]  # 分钟
 
 # 生成Markdown报告
+phase("render")
 report = f"""# 快速重入场模式分析报告
 
 **生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
@@ -47,10 +75,10 @@ report = f"""# 快速重入场模式分析报告
 
 ### 核心发现
 
-1. **R系统存在大量快速重入场**: {len(quick_reentry_15min)} 笔交易在出场后15分钟内再次入场，占比 {len(quick_reentry_15min)/len(trades)*100:.2f}%
-2. **持仓0根K线的异常交易**: {len(zero_holding)} 笔交易在同一K线内完成入场和出场
-3. **TradingView采用严格冷却期**: 最小交易间隔为 {min(tv_intervals):.0f} 分钟，避免了频繁交易
-4. **交易频率差异巨大**: R系统165笔交易 vs TradingView仅9笔交易
+1. **R系统存在大量快速重入场**: {quick_15min} 笔交易在出场后15分钟内再次入场，占比 {metrics.share(quick_15min):.2f}%
+2. **持仓0根K线的异常交易**: {metrics.zero_holding_count} 笔交易在同一K线内完成入场和出场
+3. **TradingView采用严格冷却期**: 最小交易间隔为 {tv_intervals.min:.0f} 分钟，避免了频繁交易
+4. **交易频率差异巨大**: R系统{metrics.trade_count}笔交易 vs TradingView仅{tv.trade_count}笔交易
 
 ---
 
@@ -60,39 +88,39 @@ report = f"""# 快速重入场模式分析报告
 
 | 指标 | 数值 | 占比 |
 |------|------|------|
-| R系统总交易数 | {len(trades)} | 100% |
-| 持仓0根K线 | {len(zero_holding)} | {len(zero_holding)/len(trades)*100:.2f}% |
-| 同一K线再入场 | {len(same_bar_reentry)} | {len(same_bar_reentry)/len(trades)*100:.2f}% |
-| 15分钟内再入场 | {len(quick_reentry_15min)} | {len(quick_reentry_15min)/len(trades)*100:.2f}% |
-| 1小时内再入场 | {len(quick_reentry_1hour)} | {len(quick_reentry_1hour)/len(trades)*100:.2f}% |
-| 1天内再入场 | {len(quick_reentry_1day)} | {len(quick_reentry_1day)/len(trades)*100:.2f}% |
+| R系统总交易数 | {metrics.trade_count} | 100% |
+| 持仓0根K线 | {metrics.zero_holding_count} | {metrics.share(metrics.zero_holding_count):.2f}% |
+| 同一K线再入场 | {metrics.same_bar_count} | {metrics.share(metrics.same_bar_count):.2f}% |
+| 15分钟内再入场 | {quick_15min} | {metrics.share(quick_15min):.2f}% |
+| 1小时内再入场 | {quick_1hour} | {metrics.share(quick_1hour):.2f}% |
+| 1天内再入场 | {quick_1day} | {metrics.share(quick_1day):.2f}% |
 
 ### 1.2 交易间隔分布
 
 **R系统交易间隔统计**:
 
-- **最小间隔**: {valid_intervals.min():.2f} 分钟
-- **第25百分位**: {valid_intervals.quantile(0.25):.2f} 分钟
-- **中位数**: {valid_intervals.median():.2f} 分钟
-- **第75百分位**: {valid_intervals.quantile(0.75):.2f} 分钟
-- **平均间隔**: {valid_intervals.mean():.2f} 分钟 ({valid_intervals.mean()/1440:.2f} 天)
-- **最大间隔**: {valid_intervals.max():.2f} 分钟 ({valid_intervals.max()/1440:.2f} 天)
+- **最小间隔**: {intervals.min:.2f} 分钟
+- **第25百分位**: {intervals.quantile(0.25):.2f} 分钟
+- **中位数**: {intervals.median:.2f} 分钟
+- **第75百分位**: {intervals.quantile(0.75):.2f} 分钟
+- **平均间隔**: {intervals.mean:.2f} 分钟 ({intervals.mean/1440:.2f} 天)
+- **最大间隔**: {intervals.max:.2f} 分钟 ({intervals.max/1440:.2f} 天)
 
 **TradingView交易间隔统计**:
 
-- **最小间隔**: {min(tv_intervals):.0f} 分钟
-- **中位数**: {np.median(tv_intervals):.0f} 分钟
-- **平均间隔**: {np.mean(tv_intervals):.0f} 分钟 ({np.mean(tv_intervals)/1440:.2f} 天)
-- **最大间隔**: {max(tv_intervals):.0f} 分钟 ({max(tv_intervals)/1440:.2f} 天)
+- **最小间隔**: {tv_intervals.min:.0f} 分钟
+- **中位数**: {tv_intervals.median:.0f} 分钟
+- **平均间隔**: {tv_intervals.mean:.0f} 分钟 ({tv_intervals.mean/1440:.2f} 天)
+- **最大间隔**: {tv_intervals.max:.0f} 分钟 ({tv_intervals.max/1440:.2f} 天)
 
 ### 1.3 间隔时间分组
 
 | 时间段 | R系统数量 | R系统占比 | TradingView数量 |
 |--------|-----------|-----------|-----------------|
-| ≤15分钟 (立即) | {len(quick_reentry_15min)} | {len(quick_reentry_15min)/len(valid_intervals)*100:.2f}% | 0 |
-| 15分钟-1小时 | {len(quick_reentry_1hour) - len(quick_reentry_15min)} | {(len(quick_reentry_1hour) - len(quick_reentry_15min))/len(valid_intervals)*100:.2f}% | {sum(1 for x in tv_intervals if 15 < x <= 60)} |
-| 1小时-1天 | {len(quick_reentry_1day) - len(quick_reentry_1hour)} | {(len(quick_reentry_1day) - len(quick_reentry_1hour))/len(valid_intervals)*100:.2f}% | {sum(1 for x in tv_intervals if 60 < x <= 1440)} |
-| >1天 | {len(valid_intervals) - len(quick_reentry_1day)} | {(len(valid_intervals) - len(quick_reentry_1day))/len(valid_intervals)*100:.2f}% | {sum(1 for x in tv_intervals if x > 1440)} |
+| ≤15分钟 (立即) | {buckets[0]} | {intervals.share(buckets[0]):.2f}% | {tv_buckets[0]} |
+| 15分钟-1小时 | {buckets[1]} | {intervals.share(buckets[1]):.2f}% | {tv_buckets[1]} |
+| 1小时-1天 | {buckets[2]} | {intervals.share(buckets[2]):.2f}% | {tv_buckets[2]} |
+| >1天 | {buckets[3]} | {intervals.share(buckets[3]):.2f}% | {tv_buckets[3]} |
 
 ---
 
@@ -100,14 +128,14 @@ report = f"""# 快速重入场模式分析报告
 
 ### 2.1 持仓0根K线的交易
 
-找到 **{len(zero_holding)}** 笔持仓0根K线的交易，这些交易在同一K线内完成入场和出场。
+找到 **{metrics.zero_holding_count}** 笔持仓0根K线的交易，这些交易在同一K线内完成入场和出场。
 
 **典型案例**:
 """
 
 # 添加典型案例
-if len(zero_holding) > 0:
-    for i, (idx, row) in enumerate(zero_holding.head(5).iterrows()):
+if metrics.zero_holding_count > 0:
+    for i, (idx, row) in enumerate(metrics.zero_holding.head(5).iterrows()):
         report += f"""
 #### 案例 {i+1}: 交易 #{row['TradeId']}
 
@@ -127,7 +155,7 @@ report += f"""
 
 ### 2.2 同一K线再入场
 
-找到 **{len(same_bar_reentry)}** 笔在出场后的同一K线再次入场的交易。
+找到 **{metrics.same_bar_count}** 笔在出场后的同一K线再次入场的交易。
 
 **影响**:
 - 频繁交易增加手续费损耗
@@ -138,20 +166,14 @@ report += f"""
 
 """
 
-# 找出高频交易日
-trades['Date'] = trades['EntryTime'].dt.date
-daily_counts = trades.groupby('Date').size()
-high_freq_days = daily_counts[daily_counts >= 3].sort_values(ascending=False)
-
+# 高频交易日（按入场日期汇总，单日交易数 >= 3）
 report += f"""找到 **{len(high_freq_days)}** 天有3笔或以上交易。
 
 **最高频交易日**:
 """
 
-for i, (date, count) in enumerate(high_freq_days.head(5).items()):
-    day_trades = trades[trades['Date'] == date]
-    day_pnl = day_trades['PnLPercent'].sum()
-    report += f"\n{i+1}. **{date}**: {count} 笔交易，总盈亏 {day_pnl:+.2f}%"
+for i, day in enumerate(high_freq_days.head(5).itertuples(index=False)):
+    report += f"\n{i+1}. **{day.Date.date()}**: {day.TradeCount} 笔交易，总盈亏 {day.PnLPercentSum:+.2f}%"
 
 report += f"""
 
@@ -163,16 +185,16 @@ report += f"""
 
 | 指标 | TradingView | R系统 | 差异 |
 |------|-------------|-------|------|
-| 总交易数 | 9 | {len(trades)} | {len(trades)/9:.1f}x |
-| 平均交易间隔 | {np.mean(tv_intervals):.0f} 分钟 | {valid_intervals.mean():.0f} 分钟 | {valid_intervals.mean()/np.mean(tv_intervals):.1f}x |
-| 最小交易间隔 | {min(tv_intervals):.0f} 分钟 | {valid_intervals.min():.0f} 分钟 | {valid_intervals.min()/min(tv_intervals):.2f}x |
-| 15分钟内再入场 | 0 笔 | {len(quick_reentry_15min)} 笔 | - |
+| 总交易数 | {tv.trade_count} | {metrics.trade_count} | {metrics.trade_count/tv.trade_count:.1f}x |
+| 平均交易间隔 | {tv_intervals.mean:.0f} 分钟 | {intervals.mean:.0f} 分钟 | {intervals.mean/tv_intervals.mean:.1f}x |
+| 最小交易间隔 | {tv_intervals.min:.0f} 分钟 | {intervals.min:.0f} 分钟 | {intervals.min/tv_intervals.min:.2f}x |
+| 15分钟内再入场 | {tv_intervals.count_le(15)} 笔 | {quick_15min} 笔 | - |
 
 ### 3.2 规则遵循情况
 
 **TradingView**:
 OK 严格遵循"平仓前不开新仓"规则
-OK 采用冷却期机制，最小间隔{min(tv_intervals):.0f}分钟
+OK 采用冷却期机制，最小间隔{tv_intervals.min:.0f}分钟
 OK 所有交易都止盈出场（100%胜率）
 OK 交易间隔长，避免过度交易
 
@@ -200,9 +222,11 @@ FAIL 交易频率过高
 
 | 策略类型 | 冷却期 | 理由 | 预计影响 |
 |---------|--------|------|---------|
-| **保守型** | {min(tv_intervals):.0f} 分钟 | 与TV最小间隔一致 | 减少 {(valid_intervals < min(tv_intervals)).sum()} 笔交易 ({(valid_intervals < min(tv_intervals)).sum()/len(trades)*100:.1f}%) |
-| **中等型** | 60 分钟 | 避免1小时内重复交易 | 减少 {len(quick_reentry_1hour)} 笔交易 ({len(quick_reentry_1hour)/len(trades)*100:.1f}%) |
-| **激进型** | 15 分钟 | 仅避免同K线/相邻K线 | 减少 {len(quick_reentry_15min)} 笔交易 ({len(quick_reentry_15min)/len(trades)*100:.1f}%) |
+| **保守型** | {tv_intervals.min:.0f} 分钟 | 与TV最小间隔一致 | {rule_effect(cooldown_table, 1)} |
+| **中等型** | 60 分钟 | 避免1小时内重复交易 | {rule_effect(cooldown_table, 2)} |
+| **激进型** | 15 分钟 | 仅避免同K线/相邻K线 | {rule_effect(cooldown_table, 3)} |
+
+预计影响为在 {REFERENCE_DATASET} 上按冷却期重新回测的结果（相对无冷却期的基准），冷却期内被挡下的信号之后的交易也随之改变。
 
 ### 4.2 额外建议
 
@@ -211,8 +235,10 @@ FAIL 交易频率过高
    - 建议至少持仓1根K线（15分钟）
 
 2. **每日交易次数限制**:
-   - 最高频日有{daily_counts.max()}笔交易
+   - 最高频日有{metrics.max_daily_trades}笔交易
    - 建议设置每日最大3-5笔交易限制
+   - 每日最多3笔: {rule_effect(daily_table, 1)}
+   - 每日最多5笔: {rule_effect(daily_table, 2)}
 
 3. **价格确认机制**:
    - 信号出现后，等待下一根K线确认
@@ -228,7 +254,7 @@ FAIL 交易频率过高
 - [ ] 禁止同一K线内入场和出场
 - [ ] 添加每日最大交易次数限制（建议5笔）
 
-**预期效果**: 减少{len(quick_reentry_15min) + len(zero_holding)}笔异常交易
+**预期效果**: 减少{quick_15min + metrics.zero_holding_count}笔异常交易
 
 ### 阶段2: 参数优化（1周内）
 
@@ -272,9 +298,9 @@ R回测系统与TradingView存在显著的"快速重入场"差异，主要表现
 
 1. R系统缺乏冷却期机制，导致过度交易
 2. 存在大量持仓0根K线的异常交易
-3. 交易频率是TradingView的{len(trades)/9:.1f}倍
+3. 交易频率是TradingView的{metrics.trade_count/tv.trade_count:.1f}倍
 
-**关键建议**: 立即实施至少15分钟的冷却期，禁止K线内重复交易，并设置每日交易次数上限。这些措施预计可减少{len(quick_reentry_15min) + len(zero_holding)}笔({(len(quick_reentry_15min) + len(zero_holding))/len(trades)*100:.1f}%)异常交易，使R系统向TradingView的保守策略靠拢。
+**关键建议**: 立即实施至少15分钟的冷却期，禁止K线内重复交易，并设置每日交易次数上限。这些措施预计可减少{quick_15min + metrics.zero_holding_count}笔({metrics.share(quick_15min + metrics.zero_holding_count):.1f}%)异常交易，使R系统向TradingView的保守策略靠拢。
 
 ---
 
@@ -284,6 +310,7 @@ R回测系统与TradingView存在显著的"快速重入场"差异，主要表现
 """
 
 # 保存报告
+phase("write")
 with open(REPORTS_DIR / '快速重入场分析综合报告.md', 'w', encoding='utf-8') as f:
     f.write(report)
 
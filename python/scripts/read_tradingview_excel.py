@@ -1,88 +1,73 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-Read TradingView Excel export and analyze the data
-"""
-
-import sys
-
-try:
-    import pandas as pd
-    print("pandas imported successfully")
-except ImportError:
-    print("ERROR: pandas not available")
-    sys.exit(1)
+批量读取 TradingView 策略报告导出（engine.tvexports）
+解析目录下全部 xlsx/xls/csv 导出的每个工作表，按文件哈希缓存为 Parquet（`<目录>/.cache/tradingview/`），
+打印工作表合并索引（交易清单 vs 汇总表），可选写出合并后的交易表。
 
-# Try to read Excel file
-excel_file = r'C:\Users\ROG\Downloads\三日暴跌接针策略_BINANCE_PEPEUSDT_2025-10-27_df79a.xlsx'
+未变化的导出直接读缓存，重复运行几乎不再读取 Excel。
 
-print(f"Attempting to read: {excel_file}")
-
-try:
-    # Try with openpyxl engine first
-    df = pd.read_excel(excel_file, engine='openpyxl')
-    print("Successfully read with openpyxl engine")
-except Exception as e1:
-    print(f"openpyxl failed: {e1}")
-    try:
-        # Try with xlrd engine
-        df = pd.read_excel(excel_file, engine='xlrd')
-        print("Successfully read with xlrd engine")
-    except Exception as e2:
-        print(f"xlrd failed: {e2}")
-        try:
-            # Try without specifying engine
-            df = pd.read_excel(excel_file)
-            print("Successfully read without specifying engine")
-        except Exception as e3:
-            print(f"Default engine failed: {e3}")
-            print("\nTrying to read all available sheets...")
-            try:
-                xl_file = pd.ExcelFile(excel_file)
-                print(f"Available sheets: {xl_file.sheet_names}")
-                df = pd.read_excel(xl_file, sheet_name=xl_file.sheet_names[0])
-                print(f"Successfully read first sheet: {xl_file.sheet_names[0]}")
-            except Exception as e4:
-                print(f"All methods failed: {e4}")
-                sys.exit(1)
+用法:
+    python python/scripts/read_tradingview_excel.py exports/tradingview
+    python python/scripts/read_tradingview_excel.py exports/tradingview --trades-out outputs/tradingview_trades_all.csv
+    python python/scripts/read_tradingview_excel.py exports/tradingview --info docs/reports/tradingview_info.txt
+"""
 
-print(f"\nDataFrame loaded successfully!")
-print(f"Shape: {df.shape}")
-print(f"\nColumn names:")
-for i, col in enumerate(df.columns):
-    print(f"  {i}: {col}")
+import argparse
+import sys
+import time
+from pathlib import Path
 
-print(f"\nFirst 10 rows:")
-print(df.head(10))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine.tvexports import (SHEET_SUMMARY, SHEET_TRADES, load_tradingview_dir, read_sheet,  # noqa: E402
+                              scan_tradingview_exports)
 
-print(f"\nLast 5 rows:")
-print(df.tail(5))
+parser = argparse.ArgumentParser(description="批量读取 TradingView 导出")
+parser.add_argument("directory", help="导出目录（xlsx/xls/csv）")
+parser.add_argument("--jobs", type=int, default=None, help="解析进程数（默认: CPU核数；1 表示串行）")
+parser.add_argument("--no-cache", action="store_true", help="不读写 Parquet 缓存")
+parser.add_argument("--trades-out", default=None, help="合并后的交易表输出路径（CSV）")
+parser.add_argument("--info", default=None, help="把各工作表的列、类型、前20行与描述统计写到该文件")
+args = parser.parse_args()
 
-print(f"\nData types:")
-print(df.dtypes)
+directory = Path(args.directory)
+if not directory.is_dir():
+    sys.exit(f"错误: 找不到目录 {directory}")
 
-print(f"\nBasic statistics:")
-print(df.describe())
+start = time.perf_counter()
+index = scan_tradingview_exports(directory, max_workers=args.jobs, use_cache=not args.no_cache)
+elapsed = time.perf_counter() - start
 
-# Save to CSV for easier inspection
-output_csv = r'data/tradingview_results.csv'
-df.to_csv(output_csv, index=False, encoding='utf-8-sig')
-print(f"\nSaved to: {output_csv}")
+n_files = index["Source"].nunique()
+n_trades = int((index["Kind"] == SHEET_TRADES).sum())
+n_summary = int((index["Kind"] == SHEET_SUMMARY).sum())
+print(f"读取 {n_files} 个导出文件，{len(index)} 个工作表（交易清单 {n_trades}，汇总 {n_summary}），耗时 {elapsed:.2f}秒")
+print()
+print(index[["Source", "Symbol", "Sheet", "Kind", "Rows", "Columns"]].to_string(index=False))
 
-# Also save detailed info
-output_info = r'docs/reports/tradingview_info.txt'
-with open(output_info, 'w', encoding='utf-8') as f:
-    f.write(f"TradingView Results Analysis\n")
-    f.write(f"="*80 + "\n\n")
-    f.write(f"Shape: {df.shape}\n")
-    f.write(f"Rows: {len(df)}\n")
-    f.write(f"Columns: {len(df.columns)}\n\n")
-    f.write(f"Column names:\n")
-    for i, col in enumerate(df.columns):
-        f.write(f"  {i}: {col}\n")
-    f.write(f"\n")
-    f.write(f"Data types:\n{df.dtypes}\n\n")
-    f.write(f"First 20 rows:\n{df.head(20)}\n\n")
-    f.write(f"Basic statistics:\n{df.describe()}\n")
+if args.trades_out:
+    trades = load_tradingview_dir(directory, max_workers=args.jobs, use_cache=not args.no_cache)
+    out = Path(args.trades_out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    trades.to_csv(out, index=False, encoding="utf-8-sig")
+    print(f"\n合并交易表: {len(trades)} 笔交易，{trades['Symbol'].nunique()} 个交易对 -> {out}")
 
-print(f"Saved detailed info to: {output_info}")
+if args.info:
+    info_path = Path(args.info)
+    info_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(info_path, "w", encoding="utf-8") as f:
+        f.write("TradingView Results Analysis\n")
+        f.write("=" * 80 + "\n\n")
+        for entry in index.itertuples(index=False):
+            df = read_sheet(entry)
+            f.write(f"{entry.Source} / {entry.Sheet} ({entry.Kind})\n")
+            f.write("-" * 80 + "\n")
+            f.write(f"Shape: {df.shape}\n\n")
+            f.write("Column names:\n")
+            for i, col in enumerate(df.columns):
+                f.write(f"  {i}: {col}\n")
+            f.write(f"\nData types:\n{df.dtypes}\n\n")
+            f.write(f"First 20 rows:\n{df.head(20)}\n\n")
+            if len(df.columns):
+                f.write(f"Basic statistics:\n{df.describe(include='all')}\n\n")
+    print(f"\n工作表详情: {info_path}")
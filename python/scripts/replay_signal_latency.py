@@ -0,0 +1,126 @@
+"""
+行情回放 + 流式信号判定延迟测试
+从列式存储（或 CSV/Parquet 目录）取若干数据集，前段K线用于 warm_up，末尾 --replay-bars 根
+经 engine.replay 回放（进程内队列或本地 TCP），每根K线送入 DropSignalStream，
+统计从K线发出到信号判定完成的延迟分位数与吞吐，结果写入 JSON。
+
+--max-p99-us 可作为回归门槛：p99 延迟超过该值时以退出码 1 结束。
+
+用法:
+    python python/scripts/replay_signal_latency.py --store data/store --datasets PEPEUSDT_15m,XRPUSDT_15m
+    python python/scripts/replay_signal_latency.py --data-dir data/ohlcv --transport tcp --speedup 600
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine.ohlcv import OHLCV_SUFFIXES, find_dataset, read_ohlcv  # noqa: E402
+from engine.replay import (  # noqa: E402
+    LatencyRecorder,
+    ReplayServer,
+    evaluate_bars,
+    queue_bars,
+    tcp_bars,
+)
+from engine.store import OHLCVStore  # noqa: E402
+from engine.streaming import DropSignalStream  # noqa: E402
+
+parser = argparse.ArgumentParser(description="行情回放与流式信号判定延迟测试")
+parser.add_argument("--store", default=None, help="列式存储目录（如 data/store）")
+parser.add_argument("--data-dir", default="data/ohlcv", help="未指定 --store 时读取的 CSV/Parquet 目录")
+parser.add_argument("--datasets", default="", help="逗号分隔的数据集（默认全部）")
+parser.add_argument("--lookback", type=int, default=3, help="回看K线数量")
+parser.add_argument("--min-drop", type=float, default=5.0, help="最小跌幅（absolute 为百分比，atr 为 ATR 倍数）")
+parser.add_argument("--signal-mode", choices=["absolute", "atr"], default="atr")
+parser.add_argument("--atr-length", type=int, default=14)
+parser.add_argument("--exclude-current-bar", action="store_true", help="窗口不含当前K线")
+parser.add_argument("--replay-bars", type=int, default=5000, help="每个数据集回放末尾的K线数，之前的用于 warm_up")
+parser.add_argument("--speedup", type=float, default=0.0, help="回放倍速（0 为不等待）")
+parser.add_argument("--transport", choices=["queue", "tcp"], default="queue", help="进程内队列或本地 TCP")
+parser.add_argument("--output", default="outputs/replay_signal_latency.json", help="结果 JSON")
+parser.add_argument("--max-p99-us", type=float, default=None, help="p99 延迟门槛（微秒），超过时退出码为 1")
+args = parser.parse_args()
+
+only = [s.strip() for s in args.datasets.split(",") if s.strip()]
+series = {}
+if args.store:
+    store = OHLCVStore(args.store)
+    for name in only or store.names():
+        if name not in store:
+            sys.exit(f"错误: 存储 {store.root} 中没有 {name}")
+        series[name] = store.open(name)
+else:
+    names = only or sorted({p.stem for suffix in OHLCV_SUFFIXES for p in Path(args.data_dir).glob(f"*{suffix}")})
+    for name in names:
+        path = find_dataset(args.data_dir, name)
+        if path is None:
+            sys.exit(f"错误: {args.data_dir} 中没有 {name}")
+        series[name] = read_ohlcv(path)
+if not series:
+    sys.exit("错误: 没有可回放的数据集")
+
+streams = {}
+replay = {}
+for name, data in series.items():
+    split = max(0, len(data) - args.replay_bars)
+    stream = DropSignalStream(args.lookback, args.min_drop, not args.exclude_current_bar,
+                              args.signal_mode, args.atr_length)
+    history = data.rows(0, split) if hasattr(data, "rows") else data.iloc[:split]
+    stream.warm_up(history)
+    streams[name] = stream
+    replay[name] = data.rows(split, len(data)) if hasattr(data, "rows") else data.iloc[split:]
+    print(f"{name}: warm_up {split} 根，回放 {len(data) - split} 根")
+
+signals = []
+
+
+async def main() -> tuple[int, LatencyRecorder]:
+    server = ReplayServer(replay, speedup=args.speedup)
+    recorder = LatencyRecorder()
+    if args.transport == "tcp":
+        tcp = await server.serve_tcp()
+        host, port = tcp.sockets[0].getsockname()[:2]
+        consumer = asyncio.create_task(evaluate_bars(tcp_bars(host, port), streams, recorder, signals.append))
+        await server.wait_for_clients(1)
+        emitted = await server.run()
+        await consumer
+        tcp.close()
+        await tcp.wait_closed()
+    else:
+        queue = server.subscribe()
+        consumer = asyncio.create_task(evaluate_bars(queue_bars(queue), streams, recorder, signals.append))
+        emitted = await server.run()
+        await consumer
+    return emitted, recorder
+
+
+emitted, recorder = asyncio.run(main())
+summary = recorder.summary()
+result = {
+    "transport": args.transport,
+    "speedup": args.speedup,
+    "datasets": list(series),
+    "params": {"lookback": args.lookback, "min_drop": args.min_drop, "signal_mode": args.signal_mode,
+               "atr_length": args.atr_length, "include_current_bar": not args.exclude_current_bar},
+    "emitted": emitted,
+    **summary,
+}
+
+print(f"\n回放 {emitted} 根K线（{len(series)} 个数据集，{args.transport}），信号 {summary.get('signals', 0)} 个")
+if summary["bars"]:
+    print(f"延迟: p50={summary['p50_us']:.1f}us p90={summary['p90_us']:.1f}us "
+          f"p99={summary['p99_us']:.1f}us max={summary['max_us']:.1f}us")
+    print(f"吞吐: {summary['bars_per_sec']:.0f} 根/秒")
+
+output = Path(args.output)
+output.parent.mkdir(parents=True, exist_ok=True)
+output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+print(f"结果: {output}")
+
+if args.max_p99_us is not None and summary["bars"] and summary["p99_us"] > args.max_p99_us:
+    print(f"[FAIL] p99 延迟 {summary['p99_us']:.1f}us 超过门槛 {args.max_p99_us:.1f}us")
+    sys.exit(1)
@@ -0,0 +1,61 @@
+"""
+交易持仓期间最大有利/不利波动（engine.excursion）
+按K线 High/Low 为交易表逐笔计算 MFE/MAE（相对入场价的百分比），输出明细并按出场原因汇总。
+交易表可以是 R 交易明细，也可以是整份优化结果的交易明细（上百万笔一次完成）。
+
+用法:
+    python python/scripts/trade_excursions.py
+    python python/scripts/trade_excursions.py --trades outputs/all_trades.csv --dataset PEPEUSDT_15m
+    python python/scripts/trade_excursions.py --tradingview data/tradingview_trades.csv --include-entry-bar
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine.cooldown import REFERENCE_DATA_DIR, REFERENCE_DATASET, load_reference_ohlcv  # noqa: E402
+from engine.excursion import ExcursionIndex  # noqa: E402
+from engine.tradingview import load_tradingview_trades  # noqa: E402
+from engine.trades import TRADES_CSV, load_trades  # noqa: E402
+
+parser = argparse.ArgumentParser(description="交易MFE/MAE计算")
+parser.add_argument("--trades", default=str(TRADES_CSV), help=f"交易明细（默认 {TRADES_CSV}）")
+parser.add_argument("--tradingview", default=None, help="改为计算 TradingView 交易清单导出（文件路径）")
+parser.add_argument("--data-dir", default=str(REFERENCE_DATA_DIR), help=f"K线目录（默认 {REFERENCE_DATA_DIR}）")
+parser.add_argument("--dataset", default=REFERENCE_DATASET, help=f"数据集名（默认 {REFERENCE_DATASET}）")
+parser.add_argument("--include-entry-bar", action="store_true", help="把入场K线的 High/Low 计入")
+parser.add_argument("--output", default="outputs/交易MFE_MAE.csv", help="明细输出 CSV")
+args = parser.parse_args()
+
+data = load_reference_ohlcv(args.data_dir, args.dataset)
+if data is None:
+    sys.exit(f"未找到K线数据: {Path(args.data_dir) / args.dataset}.parquet/.csv")
+source = args.tradingview or args.trades
+trades = load_tradingview_trades(source) if args.tradingview else load_trades(source)
+print(f"K线: {len(data)} 根 ({args.dataset})")
+print(f"交易: {len(trades)} 笔 ({source})")
+
+start = time.perf_counter()
+index = ExcursionIndex(data)
+built = time.perf_counter()
+excursions = index.excursions(trades, include_entry_bar=args.include_entry_bar)
+elapsed = time.perf_counter() - built
+print(f"\n索引构建 {built - start:.3f}秒，查询 {elapsed:.3f}秒")
+
+unmapped = int((excursions["ExitBar"] < 0).sum())
+if unmapped:
+    print(f"[WARN] {unmapped} 笔交易的时间不在K线范围内或未平仓，结果为 NaN")
+
+result = trades.drop(columns=list(excursions.columns), errors="ignore").join(excursions)
+print("\nMFE/MAE 分布（%）:")
+print(result[["MFEPercent", "MAEPercent"]].describe(percentiles=[0.25, 0.5, 0.75, 0.9]).round(2).to_string())
+print("\n按出场原因汇总（%）:")
+summary = result.groupby("ExitReason", observed=True)[["MFEPercent", "MAEPercent"]].agg(["count", "median", "mean"])
+print(summary.round(2).to_string())
+
+output = Path(args.output)
+output.parent.mkdir(parents=True, exist_ok=True)
+result.to_csv(output, index=False, encoding="utf-8-sig")
+print(f"\n已保存: {output}")
@@ -0,0 +1,181 @@
+"""
+多币种、多时间框架 ATR Walk-Forward（Python 版，进程池并行）
+对应 `r/scripts/run/run_multitimeframe_wf_atr_symbols.R`，输出文件名与格式相同：
+<output_dir>/<dataset>_atr_wf_details.csv、<dataset>_atr_wf_summary.md，
+以及 <report_dir>/multitimeframe_atr_walkforward_summary.{csv,md}。
+
+数据从 --data-dir 读取 `<SYMBOL>_<TF>.parquet` / `.csv`（由 data/liaochu.RData 的 cryptodata 导出），
+或用 --store 从内存映射列式存储读取（见 python/scripts/build_ohlcv_store.py），各进程共享页缓存。
+缺失的数据集会跳过（R 版自动下载 DOGEUSDT 的功能不在此实现）。
+
+用法:
+    python python/scripts/walkforward_atr_symbols.py --data-dir data/ohlcv --jobs 8
+    python python/scripts/walkforward_atr_symbols.py --store data/store --jobs 8
+    python python/scripts/walkforward_atr_symbols.py --store data/store --base-timeframe 5m
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine.ohlcv import find_dataset, read_ohlcv  # noqa: E402
+from engine.resample import open_timeframe, resample_ohlcv  # noqa: E402
+from engine.store import OHLCVStore  # noqa: E402
+from engine.walkforward import (  # noqa: E402
+    WalkForwardConfig,
+    run_walkforward,
+    summarize_dataset,
+    write_dataset_outputs,
+    write_round_summary,
+)
+
+defaults = WalkForwardConfig()
+parser = argparse.ArgumentParser(description="多时间框架 ATR Walk-Forward（Python，进程池并行）")
+parser.add_argument("--data-dir", default="data/ohlcv", help="OHLCV 文件目录（默认 data/ohlcv）")
+parser.add_argument("--store", default=None, help="列式存储目录（如 data/store；指定后忽略 --data-dir）")
+parser.add_argument("--base-timeframe", default=None,
+                    help="只加载该基础周期（如 5m），其余周期由它重采样合成（--store 时合成结果缓存在 <store>/derived）")
+parser.add_argument("--symbols", default="DOGEUSDT,PEPEUSDT,XRPUSDT", help="逗号分隔的币种")
+parser.add_argument("--timeframes", default="5m,15m,30m,1h", help="逗号分隔的时间框架")
+parser.add_argument("--train-months", type=int, default=defaults.train_months, help="训练窗口月数")
+parser.add_argument("--test-months", type=int, default=defaults.test_months, help="测试窗口月数")
+parser.add_argument("--last-windows", type=int, default=defaults.last_windows, help="只运行最后 N 个窗口")
+parser.add_argument("--atr-length", type=int, default=defaults.atr_length, help="ATR周期")
+parser.add_argument("--lookback-min", type=int, default=defaults.lookback_min)
+parser.add_argument("--lookback-max", type=int, default=defaults.lookback_max)
+parser.add_argument("--drop-min", type=float, default=defaults.drop_min, help="最小跌幅阈值（ATR倍数）")
+parser.add_argument("--drop-max", type=float, default=defaults.drop_max, help="最大跌幅阈值（ATR倍数）")
+parser.add_argument("--tp-min", type=float, default=defaults.tp_min)
+parser.add_argument("--tp-max", type=float, default=defaults.tp_max)
+parser.add_argument("--sl-min", type=float, default=defaults.sl_min)
+parser.add_argument("--sl-max", type=float, default=defaults.sl_max)
+parser.add_argument("--phase1", type=int, default=defaults.phase1, help="第一阶段随机采样数")
+parser.add_argument("--phase2", type=int, default=defaults.phase2, help="第二阶段精细采样数")
+parser.add_argument("--min-trades-train", type=int, default=defaults.min_trades_train,
+                    help="训练集交易数低于该值时目标函数为 0")
+parser.add_argument("--incremental", action="store_true",
+                    help="增量模式：复用相邻窗口重叠训练月的交易分段（第一阶段候选各窗口固定）")
+parser.add_argument("--indicator-cache", default=None, metavar="DIR",
+                    help="指标磁盘缓存目录（如 outputs/.cache/indicators），重复运行时直接读取 ATR")
+parser.add_argument("--jobs", type=int, default=None, help="进程数（默认CPU核数；1 为串行）")
+parser.add_argument("--output-dir", default="walkforward_atr_symbols", help="逐数据集输出目录")
+parser.add_argument("--report-dir", default="docs/reports", help="整轮汇总输出目录")
+args = parser.parse_args()
+
+config = WalkForwardConfig(
+    train_months=args.train_months,
+    test_months=args.test_months,
+    last_windows=args.last_windows,
+    atr_length=args.atr_length,
+    lookback_min=args.lookback_min,
+    lookback_max=args.lookback_max,
+    drop_min=args.drop_min,
+    drop_max=args.drop_max,
+    tp_min=args.tp_min,
+    tp_max=args.tp_max,
+    sl_min=args.sl_min,
+    sl_max=args.sl_max,
+    phase1=args.phase1,
+    phase2=args.phase2,
+    min_trades_train=args.min_trades_train,
+    incremental=args.incremental,
+    indicator_cache=args.indicator_cache,
+)
+symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+timeframes = [t.strip() for t in args.timeframes.split(",") if t.strip()]
+
+print("\n多时间框架 ATR Walk-Forward")
+print(f"- 币种: {', '.join(symbols)}")
+print(f"- 时间框架: {', '.join(timeframes)}")
+print(f"- 训练={config.train_months}月 测试={config.test_months}月 最后窗口数={config.last_windows}")
+print(f"- 搜索空间: lookback[{config.lookback_min},{config.lookback_max}], "
+      f"dropATR[{config.drop_min:.2f},{config.drop_max:.2f}], TP%[{config.tp_min:.2f},{config.tp_max:.2f}], "
+      f"SL%[{config.sl_min:.2f},{config.sl_max:.2f}]")
+print(f"- 采样: phase1={config.phase1} phase2={config.phase2} | atrLength={config.atr_length}"
+      f"{' | 增量模式' if config.incremental else ''}\n")
+
+store = OHLCVStore(args.store) if args.store else None
+datasets = {}
+missing = []
+for symbol in symbols:
+    if args.base_timeframe:
+        # 每个币种只加载基础周期，其余周期由它合成
+        base_name = f"{symbol}_{args.base_timeframe}"
+        if store is not None:
+            if base_name not in store:
+                missing.append(base_name)
+                continue
+            for timeframe in timeframes:
+                datasets[f"{symbol}_{timeframe}"] = open_timeframe(store, symbol, timeframe, args.base_timeframe)
+        else:
+            path = find_dataset(args.data_dir, base_name)
+            if path is None:
+                missing.append(base_name)
+                continue
+            base = read_ohlcv(path)
+            for timeframe in timeframes:
+                datasets[f"{symbol}_{timeframe}"] = (base if timeframe == args.base_timeframe
+                                                     else resample_ohlcv(base, timeframe, args.base_timeframe))
+        bars = ", ".join(f"{tf}={len(datasets[f'{symbol}_{tf}'])}" for tf in timeframes)
+        print(f"{base_name} 合成: {bars} 根K线")
+        continue
+    for timeframe in timeframes:
+        name = f"{symbol}_{timeframe}"
+        if store is not None:
+            if name not in store:
+                missing.append(name)
+                continue
+            datasets[name] = store.open(name)
+            print(f"映射 {store.root / name} ({len(datasets[name])} 根K线)")
+            continue
+        path = find_dataset(args.data_dir, name)
+        if path is None:
+            missing.append(name)
+            continue
+        datasets[name] = read_ohlcv(path)
+        print(f"加载 {path} ({len(datasets[name])} 根K线)")
+
+if missing:
+    print("\n[WARN] 缺少数据集（跳过）:")
+    for name in missing:
+        print(f"  - {name}")
+if not datasets:
+    sys.exit(f"错误: {args.store or args.data_dir} 中没有所需的数据集")
+
+done = [0]
+
+
+def report(task, row):
+    done[0] += 1
+    print(f"[{done[0]}] {task.dataset} 窗口{row['window_id']} 测试={row['test_months']} | "
+          f"lookback={row['lookback']} dropATR={row['minDrop']:.2f} TP={row['TP']:.2f}% SL={row['SL']:.2f}% | "
+          f"训练收益={row['train_return_pct']:.2f}% 测试收益={row['test_return_pct']:.2f}% | "
+          f"优化{row['opt_time_secs']:.1f}秒")
+
+
+start = time.perf_counter()
+details = run_walkforward(datasets, config, max_workers=args.jobs, on_result=report)
+elapsed = time.perf_counter() - start
+
+summaries = []
+print()
+for name in datasets:
+    if name not in details:
+        print(f"跳过 {name}（月份不足）")
+        continue
+    summary = summarize_dataset(name, details[name], config)
+    write_dataset_outputs(name, details[name], summary, args.output_dir)
+    summaries.append(summary)
+    print(f"OK {name} | 样本外={summary['cumulative_return_pct']:.2f}% | "
+          f"最大回撤={summary['max_drawdown_pct']:.2f}% | Sharpe={summary['sharpe_ratio']:.2f}")
+
+if not summaries:
+    sys.exit("错误: 所有数据集均被跳过，没有结果")
+
+summary_csv, summary_md = write_round_summary(summaries, config, symbols, timeframes, args.report_dir)
+print(f"\n完成，总耗时 {elapsed:.1f}秒")
+print(f"逐数据集结果: {args.output_dir}")
+print(f"汇总: {summary_md}")
+print(f"汇总CSV: {summary_csv}")
@@ -3,69 +3,134 @@
 运行所有分析模块并生成综合报告
 """
 
-import subprocess
-import sys
+import argparse
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "python"))
+from engine.buildcache import BuildCache  # noqa: E402
+from engine.cooldown import REFERENCE_DATA_DIR, REFERENCE_DATASET, find_reference_ohlcv  # noqa: E402
+from engine.ohlcv import OHLCV_SUFFIXES  # noqa: E402
+from engine.store import STORE_DIR, OHLCVStore  # noqa: E402
+from engine.pipeline import Pipeline, Stage  # noqa: E402
+from engine.plotting import DPI_ENV, figure_dpi  # noqa: E402
+from engine.tracing import StageProfiler, write_trace  # noqa: E402
+from engine.tradingview import TV_TRADES_CSV  # noqa: E402
+from engine.trades import TRADES_CSV, load_trades  # noqa: E402
+
+parser = argparse.ArgumentParser(description="快速重入场模式完整分析")
+parser.add_argument("--jobs", type=int, default=None,
+                    help="并发执行的阶段数（默认: CPU核数；1 表示串行执行，配合 --timeout 0 时在当前进程内执行）")
+parser.add_argument("--timeout", type=float, default=300,
+                    help="单个阶段超时秒数（默认300；0 表示不限时。从阶段开始执行时计时，排队等待不计入）")
+parser.add_argument("--dpi", type=int, default=None, help=f"图表输出DPI（默认300，也可用环境变量 {DPI_ENV} 设置）")
+parser.add_argument("--force", action="store_true",
+                    help="忽略 outputs/.build_manifest.json，重新执行所有阶段")
+parser.add_argument("--trace", nargs="?", const=os.path.join("outputs", "trace"), default=None, metavar="DIR",
+                    help="写出各阶段耗时/CPU/峰值内存与分段的 JSON 追踪和 Chrome 追踪文件（默认目录 outputs/trace）")
+parser.add_argument("--profile", default=None, metavar="STAGES",
+                    help="对这些阶段做采样分析（逗号分隔的阶段名，all 表示全部），折叠栈文件写入追踪目录")
+parser.add_argument("--profile-interval", type=float, default=0.005, help="采样间隔秒数（默认0.005）")
+args = parser.parse_args()
+
+if args.dpi is not None:
+    os.environ[DPI_ENV] = str(args.dpi)
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
 
 print("=" * 100)
 print("快速重入场模式完整分析")
 print("=" * 100)
 
-# 脚本列表
-scripts = [
-    ("analyze_reentry_pattern.py", "快速重入场统计分析"),
-    ("violation_cases_analysis.py", "违规案例详细分析"),
-    ("visualize_intervals.py", "可视化图表生成"),
-    ("generate_final_report.py", "生成最终综合报告"),
+
+def out(name):
+    return os.path.join("outputs", name)
+
+
+# 阶段列表：依赖关系由输入/输出文件推导
+# - 违规案例分析与重入场统计都会写 快速重入场案例.csv，保持原顺序（后者覆盖前者）
+# - 可视化与报告只读取交易明细与 TradingView 导出，可与其他阶段并发
+# - 冷却期重新回测读取参考K线（导出文件或列式存储，不存在时跳过），列为输入以便数据更新后重跑；
+#   冷却期重新回测.csv 只在有参考K线时生成，因此只在这种情况下列为输出
+SELL_SIGNALS_CSV = out("sell_signals_detail.csv")
+REFERENCE_OHLCV = (*(str(REFERENCE_DATA_DIR / f"{REFERENCE_DATASET}{suffix}") for suffix in OHLCV_SUFFIXES),
+                   str(OHLCVStore(STORE_DIR).catalog_path))
+COOLDOWN_CSV = out("冷却期重新回测.csv")
+HAS_REFERENCE = find_reference_ohlcv() is not None
+stages = [
+    Stage("analyze_reentry_pattern.py", "快速重入场统计分析",
+          os.path.join("python", "scripts", "analyze_reentry_pattern.py"),
+          inputs=(str(TRADES_CSV), SELL_SIGNALS_CSV, str(TV_TRADES_CSV), *REFERENCE_OHLCV),
+          outputs=(out("快速重入场案例.csv"), out("交易间隔分析.csv"), out("快速重入场统计汇总.csv"),
+                   *((COOLDOWN_CSV,) if HAS_REFERENCE else ()))),
+    Stage("violation_cases_analysis.py", "违规案例详细分析",
+          os.path.join("python", "scripts", "violation_cases_analysis.py"),
+          inputs=(str(TRADES_CSV), str(TV_TRADES_CSV)),
+          outputs=(out("违规案例汇总报告.csv"), out("持仓0根K线案例.csv"), out("快速重入场案例.csv"))),
+    Stage("visualize_intervals.py", "可视化图表生成",
+          os.path.join("python", "scripts", "visualize_intervals.py"),
+          inputs=(str(TRADES_CSV), str(TV_TRADES_CSV)),
+          outputs=(out("交易间隔分布图.png"), out("交易时间线分析.png"),
+                   out("TradingView_vs_R系统_交易间隔对比.png")),
+          params={"dpi": figure_dpi()}),
+    Stage("generate_final_report.py", "生成最终综合报告",
+          os.path.join("python", "scripts", "generate_final_report.py"),
+          inputs=(str(TRADES_CSV), str(TV_TRADES_CSV), *REFERENCE_OHLCV),
+          outputs=(os.path.join("docs", "reports", "快速重入场分析综合报告.md"),
+                   os.path.join("docs", "reports", "快速重入场分析综合报告.txt"))),
 ]
+scripts = [(stage.name, stage.description) for stage in stages]
+
+trace_dir = args.trace or (os.path.join("outputs", "trace") if args.profile else None)
+profiler = None
+if args.profile:
+    names = {name.strip() for name in args.profile.split(",") if name.strip()}
+    known = {stage.name for stage in stages} | {os.path.splitext(stage.name)[0] for stage in stages}
+    unknown = names - known - {"all"}
+    if unknown:
+        parser.error(f"未知阶段: {', '.join(sorted(unknown))}")
+    selected = None if "all" in names else frozenset(
+        stage.name for stage in stages if {stage.name, os.path.splitext(stage.name)[0]} & names)
+    profiler = StageProfiler(os.path.join(trace_dir, "profiles"), interval=args.profile_interval, stages=selected)
+
+
+def preload():
+    # 在父进程中解析一次交易明细；fork 出的阶段进程直接复用内存中的结果
+    if os.path.exists(TRADES_CSV):
+        load_trades(TRADES_CSV)
 
-results = {}
 
-# 运行所有分析脚本
-for script, description in scripts:
-    script_path = os.path.join("python", "scripts", script)
+def report_stage(stage, result):
+    if result.skipped:
+        print(f"\n[SKIP] {stage.description} - 输入、参数与代码均未变化，沿用已有输出")
+        return
+
     print(f"\n{'='*100}")
-    print(f"运行: {description}")
-    print(f"脚本: {script_path}")
+    print(f"运行: {stage.description}")
+    print(f"脚本: {stage.script}")
     print(f"{'='*100}\n")
 
-    try:
-        env = os.environ.copy()
-        env["PYTHONUTF8"] = "1"
-        env["PYTHONIOENCODING"] = "utf-8"
-
-        result = subprocess.run(
-            [sys.executable, "-X", "utf8", script_path],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-            timeout=300,  # 5分钟超时
-            env=env,
-        )
-
-        print(result.stdout)
-
-        if result.stderr:
-            print(f"\n警告/错误信息:\n{result.stderr}")
-
-        results[script] = {
-            'success': result.returncode == 0,
-            'stdout': result.stdout,
-            'stderr': result.stderr
-        }
-
-        if result.returncode == 0:
-            print(f"\n[OK] {description} 完成")
-        else:
-            print(f"\n[FAIL] {description} 失败 (返回码: {result.returncode})")
-
-    except subprocess.TimeoutExpired:
-        print(f"\n[FAIL] {description} 超时")
-        results[script] = {'success': False, 'error': 'timeout'}
-    except Exception as e:
-        print(f"\n[FAIL] {description} 出错: {str(e)}")
-        results[script] = {'success': False, 'error': str(e)}
+    print(result.stdout)
+
+    if result.stderr:
+        print(f"\n警告/错误信息:\n{result.stderr}")
+
+    if result.success:
+        print(f"\n[OK] {stage.description} 完成 ({result.elapsed:.1f}s, CPU {result.cpu_time:.1f}s, "
+              f"峰值内存 {result.peak_rss_mb:.0f}MB)")
+        if result.profile:
+            print(f"     采样分析: {result.profile}")
+    elif result.error == "timeout":
+        print(f"\n[FAIL] {stage.description} 超时")
+    else:
+        print(f"\n[FAIL] {stage.description} 失败 ({result.error})")
+
+
+pipeline = Pipeline(stages, max_workers=args.jobs, timeout=args.timeout or None, preload=preload,
+                    cache=BuildCache(), force=args.force, profiler=profiler)
+stage_results = pipeline.run(on_complete=report_stage)
+results = {name: result.to_dict() for name, result in stage_results.items()}
 
 # 生成执行摘要
 print("\n" + "=" * 100)
@@ -79,8 +144,23 @@ print(f"\n总计: {success_count}/{total_count} 个脚本成功运行\n")
 
 for script, result in results.items():
     status = "[OK] 成功" if result.get('success', False) else "[FAIL] 失败"
+    if result.get('skipped', False):
+        status += " (未变化，已跳过)"
     print(f"{status} - {script}")
 
+# 各阶段耗时与资源
+print(f"\n{'阶段':<32}{'墙钟(s)':>10}{'CPU(s)':>10}{'峰值内存(MB)':>14}  分段")
+for name, result in stage_results.items():
+    if result.skipped or not result.started:
+        continue
+    spans = ", ".join(f"{s['name']} {s['elapsed']:.1f}s" for s in result.spans if s["depth"] == 0)
+    print(f"{name:<32}{result.elapsed:>10.1f}{result.cpu_time:>10.1f}{result.peak_rss_mb:>14.0f}  {spans}")
+
+if trace_dir is not None:
+    trace_json, chrome_json = write_trace(stage_results, trace_dir, jobs=pipeline.max_workers, force=args.force)
+    print(f"\n追踪文件: {trace_json}")
+    print(f"Chrome追踪: {chrome_json}（在 chrome://tracing 或 https://ui.perfetto.dev 中打开）")
+
 # 检查生成的文件
 print("\n" + "=" * 100)
 print("生成的文件清单")
@@ -93,6 +173,7 @@ expected_files = [
     os.path.join("outputs", "快速重入场统计汇总.csv"),
     os.path.join("outputs", "违规案例汇总报告.csv"),
     os.path.join("outputs", "持仓0根K线案例.csv"),
+    *([COOLDOWN_CSV] if HAS_REFERENCE else []),
 
     # 图片文件
     os.path.join("outputs", "交易间隔分布图.png"),